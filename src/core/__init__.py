@@ -1,62 +1,78 @@
 """
-<<<<<<< HEAD
 統一コンポーネントシステム - Core モジュール
 
 React風宣言的コンポーネントシステムのメインエントリーポイントです。
 既存モジュールとの互換性を保ちつつ、新しいコンポーネントシステムを提供します。
-=======
-coreパッケージの初期化
-主要モジュールを外部に公開
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
+
+各モジュールとクラスは初回参照時に読み込みます（PEP 562）。
+matplotlib、plotly、pandas等の依存ライブラリは、それを使うモジュールや描画エンジンを
+初めて使うまで読み込まれません。
 """
 
-# 既存モジュール（後方互換性のため）
-from . import base_config
-from . import config
-from . import utils
-from . import document_builder
-from . import chart_generator
-from . import table_generator
-from . import knowledge_manager
-from . import content_manager
+import importlib
+from typing import Any, List
 
-# 新しいコンポーネントシステム
-from .component_renderer import (
-    ComponentRenderer,
-    BaseComponent,
-    ComponentSpec,
-    validate_content_spec,
-    load_spec_from_yaml
+# 既存モジュール（後方互換性のため）
+_SUBMODULES = (
+    'base_config',
+    'config',
+    'utils',
+    'document_builder',
+    'chart_generator',
+    'table_generator',
+    'knowledge_manager',
+    'content_manager',
 )
 
-from .renderer_factory import (
-    RendererFactory,
-    UniversalContentGenerator
-)
+# 公開クラス・関数 -> 定義しているモジュール
+_ATTRIBUTE_MODULES = {
+    # 新しいコンポーネントシステム
+    'ComponentRenderer': 'component_renderer',
+    'BaseComponent': 'component_renderer',
+    'ComponentSpec': 'component_renderer',
+    'validate_content_spec': 'component_renderer',
+    'load_spec_from_yaml': 'component_renderer',
+    'RendererFactory': 'renderer_factory',
+    'UniversalContentGenerator': 'renderer_factory',
+    'MatplotlibRenderer': 'matplotlib_renderer',
+    'MarkdownRenderer': 'markdown_renderer',
+    'PlotlyRenderer': 'plotly_renderer',
+    'TableRenderer': 'table_renderer',
+}
+
+
+def __getattr__(name: str) -> Any:
+    """モジュール・クラスを初回参照時に読み込む"""
+    if name in _SUBMODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    elif name in _ATTRIBUTE_MODULES:
+        module = importlib.import_module(f'.{_ATTRIBUTE_MODULES[name]}', __name__)
+        value = getattr(module, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
 
-from .matplotlib_renderer import MatplotlibRenderer
-from .markdown_renderer import MarkdownRenderer
-from .plotly_renderer import PlotlyRenderer
-from .table_renderer import TableRenderer
 
 # システム初期化
 def initialize_component_system():
-    """コンポーネントシステムを初期化"""
-    # 標準レンダラーを登録
-    RendererFactory.register_engine('matplotlib', MatplotlibRenderer)
-    RendererFactory.register_engine('markdown', MarkdownRenderer)
-    RendererFactory.register_engine('plotly', PlotlyRenderer)
-    RendererFactory.register_engine('table', TableRenderer)
+    """
+    コンポーネントシステムを初期化
+    標準レンダラー（RendererFactoryの初期状態と同じ）を遅延登録し直し、各エンジンは初めて使うときに読み込まれる
+    """
+    from .renderer_factory import RendererFactory, STANDARD_ENGINES
+
+    for name, (module_name, class_name) in STANDARD_ENGINES.items():
+        RendererFactory.register_lazy_engine(name, module_name, class_name)
 
-# 自動初期化
-initialize_component_system()
 
 # 公開API
 __all__ = [
-<<<<<<< HEAD
     # 既存モジュール（後方互換性）
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
     'base_config',
     'config',
     'utils',
@@ -64,14 +80,13 @@ __all__ = [
     'chart_generator',
     'table_generator',
     'knowledge_manager',
-<<<<<<< HEAD
     'content_manager',
-    
+
     # 新しいコンポーネントシステム
     'ComponentRenderer',
     'BaseComponent',
     'ComponentSpec',
-    'RendererFactory', 
+    'RendererFactory',
     'UniversalContentGenerator',
     'MatplotlibRenderer',
     'MarkdownRenderer',
@@ -80,7 +95,4 @@ __all__ = [
     'validate_content_spec',
     'load_spec_from_yaml',
     'initialize_component_system'
-=======
-    'content_manager'
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
-]
\ No newline at end of file
+]
@@ -0,0 +1,398 @@
+"""
+適応的コンテンツ設定の事前計算テーブル
+ユーザー×コンテンツごとの難易度をNumPy配列（.npy）に書き出し、メモリマップで読み込んで
+リクエスト時には二分探索だけで設定を返す
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 難易度（配列には添字で格納する）
+DIFFICULTY_LEVELS = ("standard", "beginner", "advanced")
+
+# 現在の世代のディレクトリ名を記録するファイル
+CURRENT_POINTER = "CURRENT"
+
+# 世代ディレクトリに保存する配列
+TABLE_ARRAYS = ("users", "offsets", "contents", "row_contents", "row_levels")
+
+# 配列の行の構成（コンテンツの集合）が変わったユーザーの難易度を保持する差分ファイル
+OVERLAY_FILENAME = "overlay.json"
+
+# 差分ファイルに保持するユーザー数の上限（超えた場合は新しい世代に書き出す）
+DEFAULT_MAX_OVERLAY_USERS = 1000
+
+
+def decide_difficulty_level(quiz_performance: float, completion_rate: float) -> str:
+    """
+    コンテンツの正答率と完了率から難易度を判定
+
+    Args:
+        quiz_performance: クイズ正答率（未回答の場合は0.5）
+        completion_rate: 完了率（未閲覧の場合は0.0）
+
+    Returns:
+        "beginner" / "standard" / "advanced"
+    """
+    # 低い性能の場合：追加サポート
+    if quiz_performance < 0.4 or completion_rate < 0.3:
+        return "beginner"
+    # 高い性能の場合：発展的内容
+    if quiz_performance > 0.8 and completion_rate > 0.8:
+        return "advanced"
+    return "standard"
+
+
+def build_content_config(difficulty_level: str) -> Dict[str, Any]:
+    """
+    難易度から適応的設定を構築
+
+    Args:
+        difficulty_level: "beginner" / "standard" / "advanced"
+
+    Returns:
+        適応的設定 (難易度調整、追加説明の表示など)
+    """
+    return {
+        'difficulty_level': difficulty_level,
+        'show_additional_examples': difficulty_level == "beginner",
+        'show_prerequisite_review': difficulty_level == "beginner",
+        'show_advanced_topics': difficulty_level == "advanced"
+    }
+
+
+def decide_user_levels(
+    content_completion: Mapping[str, float], quiz_performance: Mapping[str, float]
+) -> Dict[str, str]:
+    """
+    1ユーザーの学習進捗から、記録のあるコンテンツごとの難易度を判定
+
+    Args:
+        content_completion: コンテンツID -> 完了率
+        quiz_performance: クイズID -> 正答率
+
+    Returns:
+        {コンテンツID: 難易度}
+    """
+    return {
+        content_id: decide_difficulty_level(
+            quiz_performance.get(content_id, 0.5), content_completion.get(content_id, 0.0)
+        )
+        for content_id in {*content_completion, *quiz_performance}
+    }
+
+
+class AdaptiveDecisionTable:
+    """ユーザー×コンテンツの難易度を保持するメモリマップ可能なテーブル"""
+
+    # 記録のないコンテンツは完了率0.0として判定される
+    UNSEEN_LEVEL = decide_difficulty_level(0.5, 0.0)
+
+    def __init__(
+        self, root_dir: Path, reload_interval: float = 1.0, max_overlay_users: int = DEFAULT_MAX_OVERLAY_USERS
+    ):
+        """
+        初期化（保存済みのテーブルがあればメモリマップで開く）
+
+        Args:
+            root_dir: テーブルの保存ディレクトリ
+            reload_interval: 他のプロセスが書き出した新しい世代・差分を確認する間隔（秒）
+            max_overlay_users: 差分ファイルに保持するユーザー数の上限
+        """
+        self.root_dir = Path(root_dir)
+        self.reload_interval = reload_interval
+        self.max_overlay_users = max_overlay_users
+        self._generation: Optional[str] = None
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        # ユーザーID -> {コンテンツID: 難易度}（配列より優先する）
+        self._overlay: Dict[str, Dict[str, str]] = {}
+        self._overlay_mtime: Optional[int] = None
+        self._last_checked = 0.0
+        self._write_lock = threading.Lock()
+        self.refresh()
+
+    @property
+    def is_materialized(self) -> bool:
+        """テーブルが書き出し済みか"""
+        return self._arrays is not None
+
+    @property
+    def generation(self) -> Optional[str]:
+        """読み込んでいる世代の名前"""
+        return self._generation
+
+    def _read_pointer(self) -> Optional[str]:
+        """現在の世代のディレクトリ名を読み込む"""
+        try:
+            return (self.root_dir / CURRENT_POINTER).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def refresh(self) -> bool:
+        """
+        新しい世代が書き出されていれば開き直す
+
+        Returns:
+            開き直した場合True
+        """
+        self._last_checked = time.monotonic()
+        generation = self._read_pointer()
+        if generation is None:
+            return False
+        generation_dir = self.root_dir / generation
+        reloaded = False
+        if generation != self._generation:
+            self._arrays = {
+                name: np.load(generation_dir / f"{name}.npy", mmap_mode="r") for name in TABLE_ARRAYS
+            }
+            self._generation = generation
+            self._overlay, self._overlay_mtime = {}, None
+            reloaded = True
+        return self._refresh_overlay(generation_dir) or reloaded
+
+    def _refresh_overlay(self, generation_dir: Path) -> bool:
+        """差分ファイルが更新されていれば読み込み直す"""
+        overlay_path = generation_dir / OVERLAY_FILENAME
+        try:
+            mtime = overlay_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._overlay_mtime:
+            return False
+        try:
+            self._overlay = json.loads(overlay_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"適応的コンテンツ設定の差分を読み込めません: {e}")
+            return False
+        self._overlay_mtime = mtime
+        return True
+
+    def _find_user(self, user_id: str) -> Optional[int]:
+        """配列でのユーザーの行番号（ないユーザーの場合はNone）"""
+        users = self._arrays["users"]
+        user_index = int(np.searchsorted(users, user_id))
+        if user_index == len(users) or users[user_index] != user_id:
+            return None
+        return user_index
+
+    def lookup_level(self, user_id: str, content_id: str) -> Optional[str]:
+        """
+        ユーザーとコンテンツの難易度を取得
+
+        Args:
+            user_id: ユーザーID
+            content_id: コンテンツID
+
+        Returns:
+            難易度（テーブルにないユーザーの場合はNone）
+        """
+        if time.monotonic() - self._last_checked >= self.reload_interval:
+            self.refresh()
+        if self._arrays is None:
+            return None
+
+        overlay_levels = self._overlay.get(user_id)
+        if overlay_levels is not None:
+            return overlay_levels.get(content_id, self.UNSEEN_LEVEL)
+
+        user_index = self._find_user(user_id)
+        if user_index is None:
+            return None
+
+        contents = self._arrays["contents"]
+        content_index = int(np.searchsorted(contents, content_id))
+        if content_index == len(contents) or contents[content_index] != content_id:
+            return self.UNSEEN_LEVEL
+
+        start, end = self._arrays["offsets"][user_index:user_index + 2]
+        row_contents = self._arrays["row_contents"][start:end]
+        row = int(np.searchsorted(row_contents, content_index))
+        if row == len(row_contents) or row_contents[row] != content_index:
+            return self.UNSEEN_LEVEL
+        return DIFFICULTY_LEVELS[self._arrays["row_levels"][start + row]]
+
+    def lookup(self, user_id: str, content_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ユーザーとコンテンツの適応的設定を取得
+
+        Args:
+            user_id: ユーザーID
+            content_id: コンテンツID
+
+        Returns:
+            適応的設定（テーブルにないユーザーの場合はNone）
+        """
+        level = self.lookup_level(user_id, content_id)
+        return build_content_config(level) if level is not None else None
+
+    def iter_user_levels(self) -> Iterable[Tuple[str, Dict[str, str]]]:
+        """
+        テーブルの内容をユーザーごとに列挙
+
+        Yields:
+            (ユーザーID, {コンテンツID: 難易度})
+        """
+        if self._arrays is None:
+            return
+        arrays = self._arrays
+        overlay = dict(self._overlay)
+        offsets = arrays["offsets"]
+        contents = arrays["contents"].tolist()
+        for user_index, user_id in enumerate(arrays["users"].tolist()):
+            if user_id in overlay:
+                yield user_id, overlay.pop(user_id)
+                continue
+            start, end = offsets[user_index], offsets[user_index + 1]
+            yield user_id, {
+                contents[content_index]: DIFFICULTY_LEVELS[level]
+                for content_index, level in zip(
+                    arrays["row_contents"][start:end].tolist(), arrays["row_levels"][start:end].tolist()
+                )
+            }
+        # 配列にないユーザー
+        yield from overlay.items()
+
+    def materialize(self, levels_by_user: Mapping[str, Mapping[str, str]], replace_all: bool = True):
+        """
+        難易度を新しい世代として書き出し、現在の世代を切り替える
+
+        Args:
+            levels_by_user: {ユーザーID: {コンテンツID: 難易度}}
+            replace_all: Falseの場合は指定のないユーザーの難易度を現在の世代から引き継ぐ
+        """
+        with self._write_lock:
+            self._materialize(levels_by_user, replace_all)
+
+    def _materialize(self, levels_by_user: Mapping[str, Mapping[str, str]], replace_all: bool):
+        """materialize()の本体（書き込みロックを保持して呼ぶ）"""
+        merged: Dict[str, Mapping[str, str]] = {}
+        if not replace_all:
+            merged.update(self.iter_user_levels())
+        merged.update(levels_by_user)
+
+        user_ids = sorted(merged)
+        content_ids = sorted({content_id for levels in merged.values() for content_id in levels})
+        content_positions = {content_id: index for index, content_id in enumerate(content_ids)}
+        level_codes = {level: code for code, level in enumerate(DIFFICULTY_LEVELS)}
+
+        offsets = np.zeros(len(user_ids) + 1, dtype=np.int64)
+        row_contents, row_levels = [], []
+        for user_index, user_id in enumerate(user_ids):
+            for content_id, level in sorted(merged[user_id].items()):
+                row_contents.append(content_positions[content_id])
+                row_levels.append(level_codes[level])
+            offsets[user_index + 1] = len(row_contents)
+
+        arrays = {
+            "users": np.array(user_ids, dtype=str),
+            "offsets": offsets,
+            "contents": np.array(content_ids, dtype=str),
+            "row_contents": np.array(row_contents, dtype=np.int32),
+            "row_levels": np.array(row_levels, dtype=np.uint8),
+        }
+        self._write_generation(arrays)
+        logger.info(f"適応的コンテンツ設定を事前計算しました（{len(user_ids)}人 / {len(row_levels)}件）")
+
+    def update(self, levels_by_user: Mapping[str, Mapping[str, str]]) -> Dict[str, int]:
+        """
+        一部のユーザーの難易度を反映（テーブル全体は書き直さない）
+        コンテンツの集合が変わらないユーザーは現在の世代の配列を直接書き換え、
+        それ以外（新しいユーザー・コンテンツが増えたユーザー）は差分ファイルに保持する
+        差分のユーザー数が上限を超えた場合のみ新しい世代に書き出す
+
+        Args:
+            levels_by_user: {ユーザーID: {コンテンツID: 難易度}}
+
+        Returns:
+            {"in_place": 配列を書き換えたユーザー数, "overlay": 差分に保持したユーザー数, "rebuilt": 書き出した場合1}
+        """
+        with self._write_lock:
+            self.refresh()
+            if self._arrays is None:
+                self._materialize(levels_by_user, replace_all=False)
+                return {"in_place": 0, "overlay": 0, "rebuilt": 1}
+
+            level_codes = {level: code for code, level in enumerate(DIFFICULTY_LEVELS)}
+            contents = self._arrays["contents"]
+            offsets = self._arrays["offsets"]
+            in_place: Dict[int, int] = {}
+            overlay = dict(self._overlay)
+            in_place_users = 0
+            for user_id, levels in levels_by_user.items():
+                user_index = self._find_user(user_id)
+                if user_index is not None and user_id not in overlay:
+                    start, end = int(offsets[user_index]), int(offsets[user_index + 1])
+                    content_ids = sorted(levels)
+                    positions = np.searchsorted(contents, content_ids).astype(np.int64)
+                    # 行のコンテンツの集合が同じ場合のみ、その場で書き換えられる
+                    if (
+                        len(content_ids) == end - start
+                        and np.all(positions < len(contents))
+                        and np.array_equal(contents[positions], content_ids)
+                        and np.array_equal(self._arrays["row_contents"][start:end], positions)
+                    ):
+                        for row, content_id in enumerate(content_ids):
+                            in_place[start + row] = level_codes[levels[content_id]]
+                        in_place_users += 1
+                        continue
+                overlay[user_id] = dict(levels)
+
+            if len(overlay) > self.max_overlay_users:
+                # 差分が大きくなったら配列にまとめる
+                self._overlay = overlay
+                self._materialize({}, replace_all=False)
+                return {"in_place": 0, "overlay": 0, "rebuilt": 1}
+
+            generation_dir = self.root_dir / self._generation
+            if in_place:
+                # 読み手は同じファイルをメモリマップしているため、書き換えは直ちに見える
+                row_levels = np.load(generation_dir / "row_levels.npy", mmap_mode="r+")
+                rows = np.fromiter(in_place.keys(), dtype=np.int64, count=len(in_place))
+                row_levels[rows] = np.fromiter(in_place.values(), dtype=np.uint8, count=len(in_place))
+                row_levels.flush()
+                del row_levels
+            if overlay != self._overlay:
+                self._write_overlay(generation_dir, overlay)
+
+        logger.debug(
+            f"適応的コンテンツ設定を更新しました（書き換え{in_place_users}人 / 差分{len(overlay)}人）"
+        )
+        return {"in_place": in_place_users, "overlay": len(overlay), "rebuilt": 0}
+
+    def _write_overlay(self, generation_dir: Path, overlay: Dict[str, Dict[str, str]]):
+        """差分ファイルをアトミックに置き換える"""
+        overlay_path = generation_dir / OVERLAY_FILENAME
+        tmp_path = generation_dir / f".{OVERLAY_FILENAME}.tmp{os.getpid()}"
+        tmp_path.write_text(json.dumps(overlay, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, overlay_path)
+        self._overlay = overlay
+        self._overlay_mtime = overlay_path.stat().st_mtime_ns
+
+    def _write_generation(self, arrays: Dict[str, np.ndarray]):
+        """配列を新しい世代のディレクトリに書き出し、CURRENTを置き換えて古い世代を削除"""
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        generation = f"gen-{time.time_ns()}-{os.getpid()}"
+        generation_dir = self.root_dir / generation
+        generation_dir.mkdir()
+        for name, array in arrays.items():
+            np.save(generation_dir / f"{name}.npy", array)
+
+        pointer_tmp = self.root_dir / f".{CURRENT_POINTER}.tmp{os.getpid()}"
+        pointer_tmp.write_text(generation, encoding="utf-8")
+        os.replace(pointer_tmp, self.root_dir / CURRENT_POINTER)
+        self.refresh()
+
+        # メモリマップ済みの読み手はファイル削除後も古い世代を読み続けられる
+        for old_dir in self.root_dir.glob("gen-*"):
+            if old_dir.name != generation:
+                shutil.rmtree(old_dir, ignore_errors=True)
@@ -0,0 +1,380 @@
+"""
+学習イベントの列指向ストアとベクトル化した進捗集計
+日次のイベントログを日付・イベント種別で分割したParquetに圧縮し、
+全ユーザーの進捗をpandas/NumPyで一括計算する
+"""
+
+import os
+import json
+import shutil
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import quote, unquote
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .event_store import EventStore
+
+logger = logging.getLogger(__name__)
+
+# イベントの列（Parquetファイルにはパーティション列のevent_typeを含めない）
+EVENT_COLUMNS = ["user_id", "event_type", "content_id", "timestamp", "correct", "duration_minutes", "metadata"]
+
+# 圧縮が完了したパーティションの目印
+SUCCESS_MARKER = "_SUCCESS"
+
+# ページ閲覧回数 -> 完了率（LearningAnalyzer._calculate_progressと同じく0.1を逐次加算した値）
+COMPLETION_STEPS = np.concatenate([[0.0], np.cumsum(np.full(11, 0.1))])
+
+
+def _require_parquet_engine():
+    """Parquetの読み書きに必要なpyarrowを確認"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquetの読み書きにはpyarrowが必要です（pip install pyarrow）") from e
+
+
+def events_to_frame(records: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    イベントの辞書をDataFrameに変換
+    集計に使うメタデータ（正誤・滞在時間）は列に展開し、メタデータ全体はJSON文字列で保持する
+
+    Args:
+        records: LearningEvent.to_dict()形式のイベント
+
+    Returns:
+        EVENT_COLUMNSの列を持つDataFrame
+    """
+    user_ids, event_types, content_ids, timestamps = [], [], [], []
+    correct, durations, metadata_json = [], [], []
+    for record in records:
+        metadata = record.get('metadata') or {}
+        user_ids.append(record['user_id'])
+        event_types.append(record['event_type'])
+        content_ids.append(record['content_id'])
+        timestamps.append(record['timestamp'])
+        # メタデータが空のクイズ回答は集計対象外（NaN）
+        correct.append(float(bool(metadata.get('correct', False))) if metadata else np.nan)
+        durations.append(metadata.get('duration_minutes', np.nan))
+        metadata_json.append(json.dumps(metadata, ensure_ascii=False) if metadata else "")
+
+    return pd.DataFrame({
+        "user_id": pd.Series(user_ids, dtype="object"),
+        "event_type": pd.Series(event_types, dtype="object"),
+        "content_id": pd.Series(content_ids, dtype="object"),
+        "timestamp": pd.to_datetime(pd.Series(timestamps, dtype="object")),
+        "correct": pd.Series(correct, dtype="float64"),
+        "duration_minutes": pd.Series(durations, dtype="float64"),
+        "metadata": pd.Series(metadata_json, dtype="object"),
+    })
+
+
+def compute_progress(events: pd.DataFrame, difficulty_threshold: float = 0.6) -> Dict[str, Dict[str, Any]]:
+    """
+    全ユーザーの完了率・クイズ正答率・滞在時間・苦手分野を一括計算
+    結果はLearningAnalyzer._calculate_progressと一致する
+
+    Args:
+        events: events_to_frame()形式のDataFrame（ユーザーごとに時系列順）
+        difficulty_threshold: 苦手分野と判定する正答率の閾値
+
+    Returns:
+        {ユーザーID: {"content_completion", "quiz_performance", "time_spent", "difficulty_areas"}}
+    """
+    results: Dict[str, Dict[str, Any]] = {
+        user_id: {"content_completion": {}, "quiz_performance": {}, "time_spent": {}, "difficulty_areas": []}
+        for user_id in pd.unique(events["user_id"])
+    }
+    event_type = events["event_type"]
+
+    # コンテンツ完了率: ページ閲覧1回につき0.1（最大1.0）
+    views = events.loc[event_type == "page_view", ["user_id", "content_id"]]
+    view_counts = views.groupby(["user_id", "content_id"], sort=False).size()
+    completion = np.minimum(
+        1.0, COMPLETION_STEPS[np.minimum(view_counts.to_numpy(), len(COMPLETION_STEPS) - 1)]
+    )
+    for (user_id, content_id), value in zip(view_counts.index, completion.tolist()):
+        results[user_id]["content_completion"][content_id] = value
+
+    # 滞在時間: duration_minutesを持つtime_spentイベントの合計
+    spent = events.loc[
+        (event_type == "time_spent") & events["duration_minutes"].notna(),
+        ["user_id", "content_id", "duration_minutes"]
+    ]
+    spent_totals = spent.groupby(["user_id", "content_id"], sort=False)["duration_minutes"].sum()
+    for (user_id, content_id), value in zip(spent_totals.index, spent_totals.tolist()):
+        results[user_id]["time_spent"][content_id] = value
+
+    # クイズ正答率: メタデータを持つquiz_attemptイベントの正解の割合
+    attempts = events.loc[
+        (event_type == "quiz_attempt") & events["correct"].notna(),
+        ["user_id", "content_id", "correct"]
+    ]
+    quiz_scores = attempts.groupby(["user_id", "content_id"], sort=False)["correct"].mean()
+    for (user_id, quiz_id), value in zip(quiz_scores.index, quiz_scores.tolist()):
+        results[user_id]["quiz_performance"][quiz_id] = value
+        if value < difficulty_threshold:
+            results[user_id]["difficulty_areas"].append(quiz_id)
+
+    return results
+
+
+class AnalyticsStore:
+    """日付・イベント種別で分割したParquetの学習イベントストア"""
+
+    def __init__(self, root_dir: Path):
+        """
+        初期化
+
+        Args:
+            root_dir: パーティションの保存ディレクトリ
+        """
+        self.root_dir = Path(root_dir)
+        # 圧縮と保持期間による作り直しが同じパーティションを同時に書き換えないようにする
+        self._write_lock = threading.Lock()
+
+    def partition_dir(self, date_str: str) -> Path:
+        """日付パーティションのディレクトリ（date=YYYY-MM-DD）"""
+        return self.root_dir / f"date={date_str}"
+
+    def list_dates(self) -> List[str]:
+        """
+        圧縮済みの日付の一覧
+
+        Returns:
+            日付（YYYY-MM-DD）のリスト（昇順）
+        """
+        if not self.root_dir.exists():
+            return []
+        return sorted(
+            path.name[len("date="):] for path in self.root_dir.glob("date=*")
+            if path.is_dir() and (path / SUCCESS_MARKER).exists()
+        )
+
+    def partition_bytes(self, date_str: str) -> int:
+        """
+        日付パーティションのファイルの合計サイズ
+
+        Args:
+            date_str: 日付（YYYY-MM-DD）
+
+        Returns:
+            合計サイズ（バイト、パーティションがない場合は0）
+        """
+        partition_dir = self.partition_dir(date_str)
+        if not partition_dir.exists():
+            return 0
+        return self._partition_bytes(partition_dir)
+
+    def is_compacted(self, date_str: str) -> bool:
+        """
+        指定された日付が圧縮済みか判定
+
+        Args:
+            date_str: 日付（YYYY-MM-DD）
+
+        Returns:
+            圧縮済みの場合True
+        """
+        return (self.partition_dir(date_str) / SUCCESS_MARKER).exists()
+
+    def read_watermarks(self, date_str: str) -> Optional[Dict[str, int]]:
+        """
+        圧縮時に各セグメントのどこまでを取り込んだか（セグメント名 -> バイト位置）を取得
+
+        Args:
+            date_str: 日付（YYYY-MM-DD）
+
+        Returns:
+            セグメントごとの取り込み済みの位置（未圧縮、または位置を記録していない古い形式の場合はNone）
+        """
+        try:
+            marker = json.loads((self.partition_dir(date_str) / SUCCESS_MARKER).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        return marker.get("watermarks") if isinstance(marker, dict) else None
+
+    def is_dirty(self, event_store: EventStore, date_str: str) -> bool:
+        """
+        圧縮後にその日付のセグメントが変化したか（追記・新しいセグメント・保持期間による書き直し）
+
+        Args:
+            event_store: 圧縮元のイベントストア
+            date_str: 日付（YYYY-MM-DD）
+
+        Returns:
+            圧縮し直す必要がある場合True
+        """
+        watermarks = self.read_watermarks(date_str)
+        if watermarks is None:
+            return True
+        sizes = {path.name: path.stat().st_size for path in event_store.list_segments(date_str)}
+        # 書き込み途中の行はwatermarkに含まれないため、サイズが大きいだけでは確定した追記とは限らないが、
+        # その場合も圧縮し直して問題はない
+        return sizes != watermarks
+
+    def read_tail(self, event_store: EventStore, date_str: str) -> Iterator[Dict[str, Any]]:
+        """
+        圧縮済みの日付について、圧縮後にセグメントへ追記されたイベントを読み込む
+
+        Args:
+            event_store: 圧縮元のイベントストア
+            date_str: 日付（YYYY-MM-DD）
+
+        Yields:
+            Parquetに含まれていないイベントの辞書
+        """
+        watermarks = self.read_watermarks(date_str)
+        if watermarks is None:
+            # 位置を記録していない古い形式は、圧縮し直すまで圧縮時点の内容だけを使う
+            return
+        for segment_path in event_store.list_segments(date_str):
+            watermark = watermarks.get(segment_path.name, 0)
+            if segment_path.stat().st_size <= watermark:
+                continue
+            for _, _, record in event_store.scan_segment(segment_path, watermark):
+                yield record
+
+    def compact(
+        self, event_store: EventStore, until_date: Optional[str] = None, overwrite: bool = False
+    ) -> List[str]:
+        """
+        イベントログを日付・イベント種別ごとのParquetファイルに圧縮
+        圧縮後に遅れて追記された日付は圧縮し直す
+
+        Args:
+            event_store: 圧縮元のイベントストア
+            until_date: この日付より前（この日を含まない）を圧縮する。省略時は本日（追記中のため除外）
+            overwrite: 変化のない圧縮済みの日付も作り直すか
+
+        Returns:
+            圧縮した日付のリスト
+        """
+        _require_parquet_engine()
+        until_date = until_date or datetime.now().strftime('%Y-%m-%d')
+        compacted = []
+        for date_str in event_store.list_dates():
+            if date_str >= until_date:
+                continue
+            if self.is_compacted(date_str) and not overwrite and not self.is_dirty(event_store, date_str):
+                continue
+            self.compact_date(event_store, date_str)
+            compacted.append(date_str)
+
+        if compacted:
+            logger.info(f"{len(compacted)}日分の学習イベントをParquetに圧縮しました")
+        return compacted
+
+    @staticmethod
+    def _read_date_with_watermarks(
+        event_store: EventStore, date_str: str
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """1日分のイベントと、各セグメントの読み込んだ末尾の位置を取得"""
+        records = list(event_store.read_legacy_date(date_str))
+        watermarks: Dict[str, int] = {}
+        for segment_path in event_store.list_segments(date_str):
+            end = 0
+            for offset, length, record in event_store.scan_segment(segment_path):
+                records.append(record)
+                end = offset + length
+            watermarks[segment_path.name] = end
+        return records, watermarks
+
+    def compact_date(self, event_store: EventStore, date_str: str) -> int:
+        """
+        1日分のイベントを一時ディレクトリに書き出してから置き換える
+        （イベントが1件もない日付はパーティションを削除する）
+
+        Args:
+            event_store: 圧縮元のイベントストア
+            date_str: 日付（YYYY-MM-DD）
+
+        Returns:
+            書き出したパーティションのサイズ（バイト）
+        """
+        with self._write_lock:
+            return self._write_partition(event_store, date_str)
+
+    def _write_partition(self, event_store: EventStore, date_str: str) -> int:
+        """compact_date()の本体（書き込みロックを保持して呼ぶ）"""
+        records, watermarks = self._read_date_with_watermarks(event_store, date_str)
+        final_dir = self.partition_dir(date_str)
+        if not records:
+            shutil.rmtree(final_dir, ignore_errors=True)
+            return 0
+
+        frame = events_to_frame(records)
+        tmp_dir = final_dir.with_name(f"{final_dir.name}.tmp{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        try:
+            for event_type, group in frame.groupby("event_type", sort=True):
+                type_dir = tmp_dir / f"event_type={quote(str(event_type), safe='')}"
+                type_dir.mkdir()
+                group.drop(columns="event_type").to_parquet(
+                    type_dir / "part-0.parquet", engine="pyarrow", index=False
+                )
+            (tmp_dir / SUCCESS_MARKER).write_text(
+                json.dumps({"events": len(frame), "watermarks": watermarks}), encoding="utf-8"
+            )
+            size = self._partition_bytes(tmp_dir)
+
+            if final_dir.exists():
+                shutil.rmtree(final_dir)
+            os.replace(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return size
+
+    @staticmethod
+    def _partition_bytes(partition_dir: Path) -> int:
+        """パーティション内のファイルの合計サイズ"""
+        return sum(path.stat().st_size for path in partition_dir.rglob("*") if path.is_file())
+
+    def load(
+        self,
+        start_date: str,
+        end_date: str,
+        event_types: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        圧縮済みのイベントを読み込む（期間・イベント種別で読み込むファイルを絞り込む）
+
+        Args:
+            start_date: 対象期間の開始日（YYYY-MM-DD、この日を含む）
+            end_date: 対象期間の終了日（YYYY-MM-DD、この日を含む）
+            event_types: 読み込むイベント種別（Noneの場合は全種別）
+            columns: 読み込む列（Noneの場合は全列）
+
+        Returns:
+            イベントのDataFrame（日付順、日付内はイベント種別ごと）
+        """
+        columns = columns or EVENT_COLUMNS
+        file_columns = [column for column in columns if column != "event_type"]
+        wanted_types = set(event_types) if event_types is not None else None
+
+        frames = []
+        if self.root_dir.exists():
+            _require_parquet_engine()
+            for date_dir in sorted(self.root_dir.glob("date=*")):
+                date_str = date_dir.name[len("date="):]
+                if not (start_date <= date_str <= end_date) or not (date_dir / SUCCESS_MARKER).exists():
+                    continue
+                for type_dir in sorted(date_dir.glob("event_type=*")):
+                    event_type = unquote(type_dir.name[len("event_type="):])
+                    if wanted_types is not None and event_type not in wanted_types:
+                        continue
+                    frame = pd.read_parquet(type_dir / "part-0.parquet", columns=file_columns)
+                    frame["event_type"] = event_type
+                    frames.append(frame[columns])
+
+        if not frames:
+            return events_to_frame([])[columns]
+        return pd.concat(frames, ignore_index=True)
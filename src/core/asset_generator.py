@@ -2,6 +2,9 @@
 CSS・JavaScript・その他アセットファイルを動的に生成・更新する機能
 """
 
+import os
+import re
+import hashlib
 import logging
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
@@ -90,6 +93,19 @@ class AssetGenerator:
             dependencies=['base']
         )
 
+        # data-srcのiframeを表示領域に入ったときに読み込むローダー
+        self.js_templates['lazy_embed'] = AssetTemplate(
+            name="lazy_embed",
+            content=self._get_lazy_embed_js_template()
+        )
+
+        # JSONペイロードの図表を遅延描画するローダー
+        self.js_templates['plotly_loader'] = AssetTemplate(
+            name="plotly_loader",
+            content=self._get_plotly_loader_js_template(),
+            variables={'plotly_src': ''}
+        )
+
     def generate_asset(
         self, 
         asset_type: AssetType, 
@@ -164,6 +180,78 @@ class AssetGenerator:
         logger.info(f"RAW {asset_type.value.upper()}ファイル生成完了: {file_path}")
         return file_path
 
+    def write_plotly_bundle(self, subdir: str = "assets/js") -> Path:
+        """
+        インストール済みのplotly.jsをバージョン・内容ハッシュ付きのファイル名で書き出す
+        全図表がこのファイルを相対パスで参照することで、ブラウザのキャッシュが効き、
+        オフライン環境でも図表が表示できる
+
+        Args:
+            subdir: docsディレクトリからの出力先サブディレクトリ
+
+        Returns:
+            生成されたplotly.jsのパス（plotly-{バージョン}.{ハッシュ}.min.js）
+        """
+        import plotly
+        from plotly.offline import get_plotlyjs
+
+        content = get_plotlyjs()
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()[:8]
+        filename = f"plotly-{plotly.__version__}.{content_hash}.min.js"
+
+        output_dir = self.docs_dir / subdir
+        output_dir.mkdir(parents=True, exist_ok=True)
+        file_path = output_dir / filename
+
+        # 古いバージョンのバンドルを削除
+        bundle_pattern = re.compile(r"^plotly-.+\.[0-9a-f]{8}\.min\.js$")
+        for old_path in output_dir.glob("plotly-*.min.js"):
+            if old_path != file_path and bundle_pattern.match(old_path.name):
+                old_path.unlink()
+
+        # 内容ハッシュがファイル名に含まれるため、既に存在する場合は書き込みを省略
+        if not file_path.exists():
+            file_path.write_text(content, encoding='utf-8')
+            logger.info(f"plotly.jsバンドル生成完了: {file_path}")
+
+        relative_name = f"{subdir}/{filename}"
+        self.generated_assets[relative_name] = {
+            'type': AssetType.JAVASCRIPT,
+            'template': 'plotly_bundle',
+            'path': file_path,
+            'variables': {'plotly_version': plotly.__version__}
+        }
+        return file_path
+
+    def generate_plotly_loader(
+        self, plotly_js_path: Optional[Path] = None, filename: str = "assets/js/plotly_loader.js"
+    ) -> Path:
+        """
+        JSONペイロードの図表を表示領域に入ったときに描画するローダーを生成
+        plotly.jsはローダー自身のURLからの相対パスで、最初の図表の描画時に一度だけ読み込む
+
+        Args:
+            plotly_js_path: write_plotly_bundleで配置したplotly.jsのパス（Noneの場合はCDN）
+            filename: docsディレクトリからの出力ファイル名
+
+        Returns:
+            生成されたファイルのパス
+        """
+        from .utils import get_plotlyjs_cdn_url
+
+        loader_path = self.docs_dir / filename
+        loader_path.parent.mkdir(parents=True, exist_ok=True)
+        if plotly_js_path is not None:
+            plotly_src = Path(os.path.relpath(
+                Path(plotly_js_path).resolve(), loader_path.parent.resolve()
+            )).as_posix()
+        else:
+            plotly_src = get_plotlyjs_cdn_url()
+
+        return self.generate_asset(
+            AssetType.JAVASCRIPT, 'plotly_loader', filename, variables={'plotly_src': plotly_src}
+        )
+
     def update_asset(
         self, 
         filename: str, 
@@ -380,7 +468,6 @@ body {{
     font-weight: 500;
 }
 
-<<<<<<< HEAD
 .custom-tooltip:hover {
     /* ホバー時のスタイルは維持しつつ、表示ロジックはJSに委ねる */
 }
@@ -388,23 +475,11 @@ body {{
 /* JS制御ツールチップのスタイル */
 .tooltip-popup {
     position: fixed; /* Viewport基準で配置 */
-=======
-.custom-tooltip:hover { border-bottom-color: transparent;
-}
-
-/* CSSベースのツールチップ（フォールバック） */
-.custom-tooltip::before { content: attr(data-tooltip);
-    position: absolute;
-    bottom: 125%;
-    left: 50%;
-    transform: translateX(-50%);
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
     background: #263238;
     color: white;
     padding: 8px 12px;
     border-radius: 4px;
     font-size: 14px;
-<<<<<<< HEAD
     white-space: pre-wrap;
     word-wrap: break-word;
     min-width: 200px;
@@ -419,18 +494,6 @@ body {{
 
 .tooltip-popup.visible {
     opacity: 1;
-=======
-    white-space: nowrap;
-    opacity: 0;
-    visibility: hidden;
-    transition: all 0.3s ease;
-    z-index: 9999;
-    box-shadow: 0 2px 4px rgba(0,0,0,0.2);
-    pointer-events: none;
-}
-
-.custom-tooltip:hover::before { opacity: 1;
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
     visibility: visible;
 }
 
@@ -893,10 +956,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initCustomTooltips();
     initQuizComponents();
     initMermaidFallback();
-<<<<<<< HEAD
     initResponsiveElements(); // iframeの高さ調整を初期化
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
 });
 
 function initCustomTooltips() {
@@ -1030,7 +1090,6 @@ function initMultipleChoice(quiz) {
 }
 
 function initMermaidFallback() {
-<<<<<<< HEAD
     // mkdocs-mermaid2-pluginがMermaid.jsの読み込みを管理する。
     // この関数は、ページ遷移後などに再レンダリングが必要な場合に備えて残す。
     if (typeof mermaid !== 'undefined') {
@@ -1039,35 +1098,6 @@ function initMermaidFallback() {
     } else {
         console.warn('Mermaid.jsが見つかりません。mkdocs-mermaid2-pluginが有効か確認してください。');
     }
-=======
-    // Mermaid初期化の強化版
-    setTimeout(function() {
-        if (typeof mermaid !== 'undefined') {
-            console.log('Mermaid.jsが利用可能です。再初期化を実行します。');
-            mermaid.initialize({ 
-                startOnLoad: true,
-                theme: 'default',
-                securityLevel: 'loose'
-            });
-            mermaid.init();
-        } else {
-            console.log('Mermaid.jsが読み込まれていません。手動で初期化を試みます。');
-            
-            // Mermaid.jsを動的に読み込む
-            const script = document.createElement('script');
-            script.src = 'https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js';
-            script.onload = function() {
-                mermaid.initialize({ 
-                    startOnLoad: true,
-                    theme: 'default',
-                    securityLevel: 'loose'
-                });
-                mermaid.init();
-            };
-            document.head.appendChild(script);
-        }
-    }, 500);
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
 }
 
 // レスポンシブ要素の初期化
@@ -1256,7 +1286,6 @@ window.MkDocsUtils = {
         });
     }
     
-<<<<<<< HEAD
     // ツールチップ機能（クリックベース、自動位置調整付き）
     function initClickableTooltips() {
         const HIDE_ALL_EVENT = 'hide-all-tooltips';
@@ -1326,17 +1355,12 @@ window.MkDocsUtils = {
         });
     }
 
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
     // 初期化
     document.addEventListener('DOMContentLoaded', function() {
         initAccordions();
         initTabs();
         initQuizzes();
-<<<<<<< HEAD
         initClickableTooltips(); // 新しいツールチップ初期化関数を呼び出し
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
     });
     
     // グローバル関数として公開
@@ -1690,4 +1714,170 @@ window.MkDocsUtils = {
         });
     }
     
+})();"""
+
+    def _get_lazy_embed_js_template(self) -> str:
+        """iframe遅延読み込みJavaScriptテンプレート"""
+        return """// iframeの遅延読み込み - 自動生成ファイル
+// data-src属性を持つiframeを表示領域に入ったときに読み込み、読み込み完了までサムネイルを表示する
+
+(function() {
+    'use strict';
+
+    var STYLE_ID = 'deferred-embed-style';
+
+    function injectStyle() {
+        if (document.getElementById(STYLE_ID)) {
+            return;
+        }
+        var style = document.createElement('style');
+        style.id = STYLE_ID;
+        style.textContent =
+            '.deferred-embed { position: relative; }' +
+            '.deferred-embed-placeholder { display: block; max-width: 100%; height: auto; margin: 0 auto; }' +
+            '.deferred-embed > iframe.deferred-iframe:not(.is-loaded) {' +
+            ' position: absolute; top: 0; left: 0; visibility: hidden; }';
+        document.head.appendChild(style);
+    }
+
+    function loadIframe(iframe) {
+        if (!iframe.dataset.src || iframe.getAttribute('src')) {
+            return;
+        }
+        iframe.addEventListener('load', function() {
+            iframe.classList.add('is-loaded');
+            var wrapper = iframe.parentElement;
+            var placeholder = wrapper && wrapper.querySelector('.deferred-embed-placeholder');
+            if (placeholder) {
+                placeholder.remove();
+            }
+        }, { once: true });
+        iframe.setAttribute('src', iframe.dataset.src);
+    }
+
+    function initDeferredEmbeds() {
+        injectStyle();
+        var iframes = document.querySelectorAll('iframe.deferred-iframe[data-src]');
+        if (!('IntersectionObserver' in window)) {
+            iframes.forEach(loadIframe);
+            return;
+        }
+
+        var observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    var iframe = entry.target.matches('iframe')
+                        ? entry.target
+                        : entry.target.querySelector('iframe.deferred-iframe');
+                    loadIframe(iframe);
+                }
+            });
+        }, { rootMargin: '300px 0px' });
+
+        iframes.forEach(function(iframe) {
+            // サムネイル付きの場合は、サイズを持つラッパー要素を監視する
+            var wrapper = iframe.closest('.deferred-embed');
+            observer.observe(wrapper || iframe);
+        });
+    }
+
+    // Material for MkDocsのインスタントナビゲーションではページ遷移ごとに再初期化する
+    if (window.document$ && typeof window.document$.subscribe === 'function') {
+        window.document$.subscribe(initDeferredEmbeds);
+    } else if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initDeferredEmbeds);
+    } else {
+        initDeferredEmbeds();
+    }
+})();"""
+
+    def _get_plotly_loader_js_template(self) -> str:
+        """Plotly図表の遅延描画JavaScriptテンプレート"""
+        return """// Plotly図表の遅延描画 - 自動生成ファイル
+// data-plotly-src属性を持つ要素が表示領域に入ったときにJSONペイロードを描画する
+
+(function() {
+    'use strict';
+
+    var PLOTLY_SRC = '{plotly_src}';
+    var scriptUrl = document.currentScript ? document.currentScript.src : window.location.href;
+    var plotlyReady = null;
+
+    // plotly.jsはページ内の最初の図表の描画時に一度だけ読み込む
+    function loadPlotly() {
+        if (window.Plotly) {
+            return Promise.resolve(window.Plotly);
+        }
+        if (!plotlyReady) {
+            plotlyReady = new Promise(function(resolve, reject) {
+                var script = document.createElement('script');
+                script.src = new URL(PLOTLY_SRC, scriptUrl).href;
+                script.onload = function() { resolve(window.Plotly); };
+                script.onerror = reject;
+                document.head.appendChild(script);
+            });
+        }
+        return plotlyReady;
+    }
+
+    function fetchFigure(src) {
+        return fetch(src).then(function(response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            return response.json();
+        });
+    }
+
+    function renderChart(container) {
+        if (container.dataset.plotlyState) {
+            return;
+        }
+        container.dataset.plotlyState = 'loading';
+
+        Promise.all([loadPlotly(), fetchFigure(container.dataset.plotlySrc)])
+            .then(function(results) {
+                var figure = results[1];
+                container.textContent = '';
+                return results[0].newPlot(container, figure.data, figure.layout, figure.config);
+            })
+            .then(function() {
+                container.dataset.plotlyState = 'rendered';
+            })
+            .catch(function() {
+                container.dataset.plotlyState = 'error';
+                container.textContent = '図表を読み込めませんでした';
+            });
+    }
+
+    function initLazyCharts() {
+        var containers = document.querySelectorAll('.plotly-lazy[data-plotly-src]');
+        if (!('IntersectionObserver' in window)) {
+            containers.forEach(renderChart);
+            return;
+        }
+
+        var observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    renderChart(entry.target);
+                }
+            });
+        }, { rootMargin: '200px 0px' });
+
+        containers.forEach(function(container) {
+            observer.observe(container);
+        });
+    }
+
+    // Material for MkDocsのインスタントナビゲーションではページ遷移ごとに再初期化する
+    if (window.document$ && typeof window.document$.subscribe === 'function') {
+        window.document$.subscribe(initLazyCharts);
+    } else if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initLazyCharts);
+    } else {
+        initLazyCharts();
+    }
 })();"""
\ No newline at end of file
@@ -86,7 +86,9 @@ BASE_CHART_STYLES = {
     "grid_alpha": 0.5,
     "figure_dpi": 150,      # A4想定
     "figsize": (7, 5),      # A4想定
-    "transparent_bg": False
+    "transparent_bg": False,
+    "image_mode": "inline",  # "inline": HTMLにBase64で埋め込み / "external": ハッシュ付き画像ファイルを参照
+    "image_format": "png"    # 外部画像の形式（"png"または"webp"）
 }
 
 # HTMLテーブルのデフォルトスタイル
@@ -142,12 +144,8 @@ MKDOCS_SITE_CONFIG = {
         "pymdownx.keys"
     ],
     "plugins": [
-<<<<<<< HEAD
         "search",
         "mermaid2"
-=======
-        "search"
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
     ],
     "extra_javascript": [
         "custom.js",
@@ -0,0 +1,199 @@
+"""
+章単位のインクリメンタルビルドを管理するビルドキャッシュ
+章の入力（YAML・学習オブジェクト・CSV・coreコード）のフィンガープリントを
+ディスク上のマニフェストに記録し、変更のない章の再生成をスキップする
+"""
+
+import os
+import json
+import hashlib
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# マニフェスト形式のバージョン（形式を変更した場合は上げる）
+MANIFEST_VERSION = 1
+
+
+def fingerprint_data(data: Any) -> str:
+    """
+    任意のデータ構造からフィンガープリントを算出
+
+    Args:
+        data: JSONに変換可能なデータ（変換できない値は文字列化される）
+
+    Returns:
+        SHA-256の16進文字列
+    """
+    serialized = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def fingerprint_file(file_path: Path) -> str:
+    """
+    ファイル内容のフィンガープリントを算出
+
+    Args:
+        file_path: 対象ファイルのパス
+
+    Returns:
+        SHA-256の16進文字列（ファイルが存在しない場合は"missing"）
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        return "missing"
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_core_code_version() -> str:
+    """
+    coreパッケージのソースコードからバージョンハッシュを算出
+    coreの実装が変わった場合に全章を再生成させるために使用する
+
+    Returns:
+        SHA-256の16進文字列
+    """
+    core_dir = Path(__file__).resolve().parent
+    digest = hashlib.sha256()
+    for source_path in sorted(core_dir.glob("*.py")):
+        digest.update(source_path.name.encode('utf-8'))
+        digest.update(source_path.read_bytes())
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """章の生成結果を記録するビルドマニフェスト"""
+
+    def __init__(self, manifest_path: Path, root_dir: Optional[Path] = None):
+        """
+        初期化
+
+        Args:
+            manifest_path: マニフェストファイルのパス
+            root_dir: 出力パスを相対パスで記録する際の基準ディレクトリ
+        """
+        self.manifest_path = Path(manifest_path)
+        self.root_dir = Path(root_dir) if root_dir else self.manifest_path.parent
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """マニフェストをディスクから読み込み"""
+        if not self.manifest_path.exists():
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"ビルドマニフェストの読み込みに失敗したため破棄します: {e}")
+            return
+
+        if manifest.get('version') != MANIFEST_VERSION:
+            logger.info("ビルドマニフェストの形式が古いため破棄します")
+            return
+
+        self.entries = manifest.get('entries', {})
+
+    def _to_key(self, key: Union[str, Path]) -> str:
+        """基準ディレクトリからの相対ファイル名をエントリのキーに変換"""
+        return self._to_stored_path(self.root_dir / key)
+
+    def _to_stored_path(self, path: Union[str, Path]) -> str:
+        """出力パスをマニフェスト保存用の文字列に変換"""
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.root_dir.resolve()).as_posix()
+        except ValueError:
+            return path.resolve().as_posix()
+
+    def _from_stored_path(self, stored: str) -> Path:
+        """マニフェストに保存された文字列を出力パスに戻す"""
+        path = Path(stored)
+        return path if path.is_absolute() else self.root_dir / path
+
+    def lookup(self, key: Union[str, Path], fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        フィンガープリントが一致し、出力が揃っているエントリを取得
+
+        Args:
+            key: エントリのキー（基準ディレクトリからの章の出力ファイル名）
+            fingerprint: 現在の入力から算出したフィンガープリント
+
+        Returns:
+            キャッシュヒットした場合は {"output": Path, "outputs": [Path], "term_usage": [...]}、
+            再生成が必要な場合はNone
+        """
+        entry = self.entries.get(self._to_key(key))
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            self.misses += 1
+            return None
+
+        outputs = [self._from_stored_path(p) for p in entry.get('outputs', [])]
+        if not all(path.exists() for path in outputs):
+            logger.debug(f"出力ファイルが欠けているため再生成します: {key}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            'output': self._from_stored_path(entry['output']),
+            'outputs': outputs,
+            'term_usage': entry.get('term_usage', [])
+        }
+
+    def record(
+        self,
+        key: Union[str, Path],
+        fingerprint: str,
+        output: Path,
+        outputs: List[Path],
+        term_usage: Optional[List[Dict[str, str]]] = None
+    ):
+        """
+        生成結果をマニフェストに記録
+
+        Args:
+            key: エントリのキー（基準ディレクトリからの章の出力ファイル名）
+            fingerprint: 生成時の入力フィンガープリント
+            output: 生成されたMarkdownファイルのパス
+            outputs: 生成された全ファイル（Markdown・図表・表）のパス
+            term_usage: この章で記録された用語使用箇所
+        """
+        all_outputs = [output] + [p for p in outputs if Path(p) != Path(output)]
+        self.entries[self._to_key(key)] = {
+            'fingerprint': fingerprint,
+            'output': self._to_stored_path(output),
+            'outputs': [self._to_stored_path(p) for p in all_outputs],
+            'term_usage': term_usage or []
+        }
+
+    def invalidate(self, key: Optional[Union[str, Path]] = None):
+        """
+        エントリを無効化
+
+        Args:
+            key: 無効化するキー（Noneの場合は全エントリ）
+        """
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(self._to_key(key), None)
+
+    def save(self):
+        """マニフェストをディスクにアトミックに書き込み"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {'version': MANIFEST_VERSION, 'entries': self.entries}
+
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+        logger.debug(f"ビルドマニフェストを保存しました: {self.manifest_path}")
@@ -0,0 +1,346 @@
+"""
+図表のレンダリング結果を再利用するディスクキャッシュ
+描画メソッド・データ・設定・カラー・スタイルから算出したキーで
+生成済みのHTML/PNG/GIFを保存し、同一入力の再レンダリングを省略する
+"""
+
+import os
+import json
+import shutil
+import inspect
+import logging
+import functools
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+
+from .build_cache import fingerprint_data, get_core_code_version
+from .utils import slugify
+
+logger = logging.getLogger(__name__)
+
+# キャッシュエントリのメタデータファイル名
+ENTRY_META_FILENAME = "entry.json"
+
+# キャッシュキーから除外する引数（出力先はファイル名としてキーに含める）
+OUTPUT_ARGUMENTS = ("output_filename", "output_dir")
+
+
+class UncacheableValueError(TypeError):
+    """キャッシュキーに変換できない引数（描画関数やFigureオブジェクトなど）"""
+
+
+def _normalize_for_key(value: Any) -> Any:
+    """
+    引数の値をキャッシュキー算出用のJSON互換データに変換
+
+    Args:
+        value: 描画メソッドに渡された引数の値
+
+    Returns:
+        JSON互換のデータ
+
+    Raises:
+        UncacheableValueError: 内容から同一性を判定できない値の場合
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Path):
+        return value.as_posix()
+    if isinstance(value, dict):
+        return {str(k): _normalize_for_key(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_for_key(v) for v in value]
+    if hasattr(value, "to_plotly_json"):
+        # Plotly Figureはシリアライズ結果で同一性を判定する
+        return _normalize_for_key(value.to_plotly_json())
+    if hasattr(value, "tolist"):
+        # numpy配列・スカラー、pandas Series
+        return _normalize_for_key(value.tolist())
+    if hasattr(value, "to_dict") and hasattr(value, "columns"):
+        # pandas DataFrame
+        return _normalize_for_key(value.to_dict(orient="list"))
+    raise UncacheableValueError(f"キャッシュできない引数の型です: {type(value).__name__}")
+
+
+class ChartCache:
+    """図表レンダリング結果のLRUディスクキャッシュ"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024):
+        """
+        初期化（保存済みのエントリを一度だけ走査して使用量とLRUの順序を把握する）
+
+        Args:
+            cache_dir: キャッシュの保存ディレクトリ
+            max_bytes: キャッシュ全体の上限サイズ（バイト）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.reset_stats()
+        # キー -> サイズ（最終使用時刻の古い順）。保存のたびにディレクトリを走査しないよう、メモリ上で管理する
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load_entries()
+
+    def reset_stats(self):
+        """統計情報をリセット"""
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0}
+
+    def merge_stats(self, stats: Dict[str, int]):
+        """
+        他のインスタンス（並列ビルドのワーカー）の統計情報を統合
+
+        Args:
+            stats: get_stats()で取得した統計情報
+        """
+        for name in self.stats:
+            self.stats[name] += stats.get(name, 0)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        統計情報を取得
+
+        Returns:
+            {"hits", "misses", "bypassed", "evictions"}
+        """
+        return dict(self.stats)
+
+    def report(self) -> str:
+        """
+        統計情報のレポート文字列を生成
+
+        Returns:
+            ヒット率を含むレポート
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups * 100 if lookups else 0.0
+        return (
+            f"図表キャッシュ: ヒット {self.stats['hits']}件 / ミス {self.stats['misses']}件 "
+            f"(ヒット率 {hit_rate:.1f}%), 対象外 {self.stats['bypassed']}件, "
+            f"削除 {self.stats['evictions']}件, 使用量 {self.total_bytes() / 1024:.1f}KB"
+        )
+
+    def make_key(self, method_name: str, params: Dict[str, Any], context: Dict[str, Any]) -> str:
+        """
+        キャッシュキーを算出
+
+        Args:
+            method_name: 描画メソッド名
+            params: 出力先を除いた描画メソッドの引数
+            context: カラー・スタイルなど描画結果に影響する設定
+
+        Returns:
+            キャッシュキー（SHA-256の16進文字列）
+
+        Raises:
+            UncacheableValueError: キーに変換できない引数が含まれる場合
+        """
+        return fingerprint_data({
+            "method": method_name,
+            "params": _normalize_for_key(params),
+            "context": _normalize_for_key(context),
+            "code_version": get_core_code_version()
+        })
+
+    def _entry_dir(self, key: str) -> Path:
+        """キーに対応するエントリのディレクトリ"""
+        return self.cache_dir / key[:2] / key
+
+    def fetch(self, key: str, output_path: Path) -> Optional[List[Path]]:
+        """
+        キャッシュ済みの成果物を出力先にコピー
+
+        Args:
+            key: キャッシュキー
+            output_path: 図表の出力先パス
+
+        Returns:
+            キャッシュヒットした場合は復元した付随ファイルのパスリスト、ミスの場合はNone
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = entry_dir / ENTRY_META_FILENAME
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            # 並列ビルドの他プロセスが削除したエントリは索引からも除く
+            self._forget(key)
+            self.stats["misses"] += 1
+            return None
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        restored = []
+        try:
+            shutil.copyfile(entry_dir / meta["main"], output_path)
+            for companion in meta.get("companions", []):
+                target_path = output_path.parent / companion
+                shutil.copyfile(entry_dir / companion, target_path)
+                restored.append(target_path)
+        except OSError as e:
+            logger.warning(f"図表キャッシュの復元に失敗したため再生成します: {e}")
+            self.stats["misses"] += 1
+            return None
+
+        # LRU判定用に最終使用時刻を更新（ファイルの時刻は次回起動時の順序の復元に使う）
+        os.utime(meta_path)
+        self._touch(key, meta.get("size", 0))
+        self.stats["hits"] += 1
+        logger.debug(f"図表キャッシュを使用しました: {output_path}")
+        return restored
+
+    def store(self, key: str, output_path: Path, companions: Optional[List[Path]] = None):
+        """
+        生成された成果物をキャッシュに保存
+
+        Args:
+            key: キャッシュキー
+            output_path: 生成された図表のパス
+            companions: 図表と一緒に生成された付随ファイル（外部PNGなど）のパス
+        """
+        output_path = Path(output_path)
+        if not output_path.exists():
+            return
+
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return
+
+        tmp_dir = entry_dir.with_name(f"{key}.tmp{os.getpid()}")
+        try:
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            main_name = "main" + output_path.suffix
+            shutil.copyfile(output_path, tmp_dir / main_name)
+            size = (tmp_dir / main_name).stat().st_size
+
+            stored_companions = []
+            for companion in companions or []:
+                companion = Path(companion)
+                name = companion.name
+                shutil.copyfile(companion, tmp_dir / name)
+                size += (tmp_dir / name).stat().st_size
+                stored_companions.append(name)
+
+            meta = {"main": main_name, "companions": stored_companions, "size": size}
+            (tmp_dir / ENTRY_META_FILENAME).write_text(json.dumps(meta), encoding="utf-8")
+            # 並列ビルドの他プロセスと競合しないようディレクトリ単位で確定する
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            logger.warning(f"図表キャッシュの保存に失敗しました: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        self._touch(key, size)
+        self._evict()
+
+    def _load_entries(self):
+        """保存済みエントリを走査し、最終使用時刻の古い順に索引を作成（起動時のみ）"""
+        entries = []
+        if self.cache_dir.exists():
+            for meta_path in self.cache_dir.glob(f"*/*/{ENTRY_META_FILENAME}"):
+                try:
+                    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                    entries.append((meta_path.stat().st_mtime, meta_path.parent.name, meta.get("size", 0)))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        self._entries.clear()
+        self._total_bytes = 0
+        for _, key, size in sorted(entries):
+            self._touch(key, size)
+
+    def _touch(self, key: str, size: int):
+        """エントリを最近使用したものとして索引に記録"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = size
+        self._total_bytes += size
+
+    def _forget(self, key: str):
+        """エントリを索引から除く"""
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def total_bytes(self) -> int:
+        """
+        キャッシュ全体の使用量を取得（並列ビルドの他プロセスが保存したエントリは、
+        このインスタンスで使用するか次に起動するまで含まれない）
+
+        Returns:
+            使用量（バイト）
+        """
+        return self._total_bytes
+
+    def _evict(self):
+        """上限サイズを超えた分を最終使用時刻の古い順に削除"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, _ = next(iter(self._entries.items()))
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            self._forget(key)
+            self.stats["evictions"] += 1
+            logger.debug(f"図表キャッシュを削除しました: {key}")
+
+    def clear(self):
+        """全エントリを削除"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._entries.clear()
+        self._total_bytes = 0
+
+
+def cached_chart(method: Optional[Callable] = None, *, suffix: str = ".html") -> Callable:
+    """
+    ChartGeneratorの描画メソッドにレンダリングキャッシュを適用するデコレータ
+    インスタンスのrender_cacheがNoneの場合や、描画関数など内容を判定できない
+    引数が渡された場合はそのまま描画する
+
+    Args:
+        method: output_filename/output_dir引数を持つ描画メソッド
+        suffix: 描画メソッドが出力するファイルの拡張子
+
+    Returns:
+        キャッシュ対応の描画メソッド
+    """
+    if method is None:
+        return functools.partial(cached_chart, suffix=suffix)
+
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.last_companion_files = []
+        cache: Optional[ChartCache] = getattr(self, "render_cache", None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        # 描画メソッドと同じ規則で出力先を決定
+        output_filename = bound.arguments["output_filename"]
+        safe_filename = slugify(output_filename.replace(suffix, '')) + suffix
+        output_dir = bound.arguments.get("output_dir")
+        output_path = Path(output_dir) / safe_filename if output_dir else Path(safe_filename)
+
+        # 付随ファイル名がHTML内で参照されるため、ファイル名はキーに含める
+        params = {
+            name: value for name, value in bound.arguments.items()
+            if name != "self" and name not in OUTPUT_ARGUMENTS
+        }
+        params["_output_name"] = safe_filename
+
+        try:
+            key = cache.make_key(method.__name__, params, self._get_cache_context(output_dir))
+        except UncacheableValueError as e:
+            logger.debug(f"{method.__name__}はキャッシュ対象外です: {e}")
+            cache.stats["bypassed"] += 1
+            return method(self, *args, **kwargs)
+
+        restored = cache.fetch(key, output_path)
+        if restored is not None:
+            self.last_companion_files = restored
+            return output_path
+
+        output_path = method(self, *args, **kwargs)
+        cache.store(key, output_path, self.last_companion_files)
+        return output_path
+
+    return wrapper
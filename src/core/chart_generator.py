@@ -4,20 +4,27 @@ Matplotlib/Seaborn、Plotlyをサポートし、インタラクティブ要素
 """
 
 import io
+import json
 import base64
 import logging
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Callable
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
-import seaborn as sns
+import plotly
 import plotly.graph_objects as go
 import plotly.io as pio
 from PIL import Image
-import imageio
 
-from .utils import apply_matplotlib_japanese_font, slugify
+from .utils import slugify, save_figure_image, resolve_plotlyjs_src, get_plotlyjs_cdn_url
+from .plotting_env import init_plotting_environment
+from .figure_pool import get_figure_pool
+from .gif_writer import StreamingGifWriter, figure_to_rgba
+from .frame_renderer import AnimationFrameRenderer, create_frame_pool, resolve_worker_count
+from .chart_cache import ChartCache, cached_chart
 from .config import GLOBAL_COLORS, BASE_CHART_STYLES
 
 logger = logging.getLogger(__name__)
@@ -26,27 +33,49 @@ logger = logging.getLogger(__name__)
 class ChartGenerator:
     """図表生成クラス"""
     
-    def __init__(self, colors: Dict[str, str] = None, styles: Dict[str, Any] = None):
+    def __init__(
+        self,
+        colors: Dict[str, str] = None,
+        styles: Dict[str, Any] = None,
+        render_cache: Optional[ChartCache] = None,
+        plotly_js_path: Optional[Path] = None,
+        plotly_output: str = "html",
+        thumbnails: bool = False,
+        animation_workers: Optional[int] = 1
+    ):
         """
         初期化
         
         Args:
             colors: カスタムカラーパレット
             styles: カスタムスタイル設定
+            render_cache: 図表のレンダリングキャッシュ（Noneの場合は毎回描画）
+            plotly_js_path: 自前で配置したplotly.jsのパス（Noneの場合はCDNから読み込み）
+            plotly_output: Plotly図表の出力形式
+                "html": plotly.jsを読み込む単体のHTML
+                "json": 図表のJSONペイロード（ページ共通のローダーで描画）と軽量な表示用HTML
+            thumbnails: Matplotlib図表の低解像度サムネイル（{stem}.thumb.png）を生成するか
+            animation_workers: アニメーションのフレーム描画に使うプロセス数
+                （1の場合は現在のプロセスで描画、Noneの場合はメインプロセスでのみCPU数）
         """
+        if plotly_output not in ("html", "json"):
+            raise ValueError(f"サポートされていないPlotly出力形式です: {plotly_output}")
+
         self.colors = colors or GLOBAL_COLORS
         self.styles = styles or BASE_CHART_STYLES
+        self.render_cache = render_cache
+        self.plotly_js_path = Path(plotly_js_path) if plotly_js_path else None
+        self.plotly_output = plotly_output
+        self.thumbnails = thumbnails
+        self.animation_workers = animation_workers
+        # フレーム描画のプロセスプール（最初に並列描画するときに作成し、以降のアニメーションで使い回す）
+        self._animation_pool: Optional[ProcessPoolExecutor] = None
+        self._animation_pool_workers = 0
+        # 直前の描画で図表と一緒に出力された付随ファイル（外部画像など）
+        self.last_companion_files: List[Path] = []
         
-        # 日本語フォント設定を適用
-<<<<<<< HEAD
-        apply_matplotlib_japanese_font(self.styles.get("font_family"))
-        
-        # Seabornのスタイル設定
-        sns.set_style("whitegrid")
-        sns.set_palette("husl")
-        
-        # 日本語フォント設定を適用
-        apply_matplotlib_japanese_font(self.styles.get("font_family"))
+        # Aggバックエンド・Seabornのスタイル・日本語フォントを適用（プロセスで一度だけ）
+        self.plotting_env = init_plotting_environment(self.styles.get("font_family"))
 
         # Plotlyの共通設定
         self.plotly_config = {
@@ -59,19 +88,108 @@ class ChartGenerator:
             'scrollZoom': False,
             'doubleClick': False
         }
-=======
-        apply_matplotlib_japanese_font(self.styles.get("font_family"))
-        
-        # Seabornのスタイル設定
-        sns.set_style("whitegrid")
-        sns.set_palette("husl")
-        
-        # 日本語フォント設定を適用
-        apply_matplotlib_japanese_font(self.styles.get("font_family"))
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
+    def _get_cache_context(self, output_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        レンダリングキャッシュのキーに含める、描画結果に影響する設定を取得
+
+        Args:
+            output_dir: 図表の出力ディレクトリ
+
+        Returns:
+            カラー・スタイル・Plotly設定の辞書
+        """
+        return {
+            'colors': self.colors,
+            'styles': self.styles,
+            'plotly_config': getattr(self, 'plotly_config', None),
+            'plotly_js_src': resolve_plotlyjs_src(self.plotly_js_path, output_dir),
+            'plotly_output': self.plotly_output,
+            'thumbnails': self.thumbnails,
+            'matplotlib_version': matplotlib.__version__,
+            'plotly_version': plotly.__version__
+        }
+
+    def _write_plotly_figure(self, fig: go.Figure, output_path: Path, **write_kwargs: Any) -> None:
+        """
+        PlotlyのFigureをHTMLファイルとして保存
+        plotly_js_pathが設定されている場合は、CDNの代わりに自前のplotly.jsを相対パスで参照する
+        plotly_outputが"json"の場合は{stem}.jsonにペイロードを書き出し、付随ファイルとして記録する
+
+        Args:
+            fig: Plotly Figureオブジェクト
+            output_path: 出力先パス
+            **write_kwargs: fig.write_htmlに渡す追加引数
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        plotly_src = resolve_plotlyjs_src(self.plotly_js_path, output_path.parent)
+
+        if self.plotly_output == "html":
+            fig.write_html(output_path, include_plotlyjs=plotly_src, **write_kwargs)
+            return
+
+        # JSONペイロードとして書き出し、HTMLはペイロードを読み込むだけの軽量版にする
+        figure = json.loads(fig.to_json())
+        figure['config'] = write_kwargs.get('config', {})
+        json_path = output_path.with_suffix('.json')
+        json_path.write_text(
+            json.dumps(figure, ensure_ascii=False, separators=(',', ':')), encoding='utf-8'
+        )
+        self.last_companion_files.append(json_path)
+
+        if plotly_src == 'cdn':
+            plotly_src = get_plotlyjs_cdn_url()
+        output_path.write_text(
+            f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <script src="{plotly_src}"></script>
+</head>
+<body style="margin: 0;">
+    <div id="chart"></div>
+    <script>
+        fetch("{json_path.name}")
+            .then(function(response) {{ return response.json(); }})
+            .then(function(figure) {{
+                Plotly.newPlot("chart", figure.data, figure.layout, figure.config);
+            }});
+    </script>
+</body>
+</html>""",
+            encoding='utf-8'
+        )
+
+    def _get_animation_pool(self, workers: int) -> ProcessPoolExecutor:
+        """フレーム描画のプロセスプールを取得（必要なプロセス数が増えた場合のみ作り直す）"""
+        if self._animation_pool is None or self._animation_pool_workers < workers:
+            self.close()
+            self._animation_pool = create_frame_pool(self.colors, self.styles, workers)
+            self._animation_pool_workers = workers
+        return self._animation_pool
+
+    def __enter__(self) -> "ChartGenerator":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        """フレーム描画のプロセスプールを終了"""
+        if self._animation_pool is not None:
+            self._animation_pool.shutdown()
+            self._animation_pool = None
+            self._animation_pool_workers = 0
+
+    @staticmethod
+    def _close_figure(fig: plt.Figure) -> None:
+        """描画が終わったFigureをプールに返却（プールのものでなければ閉じる）"""
+        if not get_figure_pool().release(fig):
+            plt.close(fig)
+
     def _save_mpl_figure_to_html(
-        self, fig: plt.Figure, output_path: Path, embed_png: bool = True
+        self, fig: plt.Figure, output_path: Path, embed_png: Optional[bool] = None
     ) -> None:
         """
         MatplotlibのFigureをHTMLファイルとして保存
@@ -79,20 +197,46 @@ class ChartGenerator:
         Args:
             fig: Matplotlib Figureオブジェクト
             output_path: 出力先パス
-            embed_png: PNG画像を埋め込むか
+            embed_png: PNG画像を埋め込むか（Noneの場合はスタイルのimage_modeに従う）
         """
+        if embed_png is None:
+            embed_png = self.styles.get("image_mode", "inline") != "external"
+
         try:
-            # PNGをBase64エンコード
-            buffer = io.BytesIO()
-            fig.savefig(
-                buffer, 
-                format='png', 
-                dpi=self.styles.get("figure_dpi", 150),
-                bbox_inches='tight',
-                transparent=self.styles.get("transparent_bg", False)
-            )
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.read()).decode()
+            savefig_kwargs = {
+                'dpi': self.styles.get("figure_dpi", 150),
+                'bbox_inches': 'tight',
+                'transparent': self.styles.get("transparent_bg", False)
+            }
+            if embed_png:
+                # PNGをBase64エンコード
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format='png', **savefig_kwargs)
+                buffer.seek(0)
+                img_base64 = base64.b64encode(buffer.read()).decode()
+                img_src = f"data:image/png;base64,{img_base64}"
+            else:
+                # 内容ハッシュ付きの画像ファイルとして書き出し、相対パスで参照
+                image_path = save_figure_image(
+                    fig,
+                    output_path.parent,
+                    output_path.stem,
+                    self.styles.get("image_format", "png"),
+                    **savefig_kwargs
+                )
+                self.last_companion_files.append(image_path)
+                img_src = image_path.name
+
+            if self.thumbnails:
+                # 遅延読み込みのiframeに重ねて表示する低コストなプレースホルダー
+                thumbnail_path = output_path.with_name(f"{output_path.stem}.thumb.png")
+                fig.savefig(
+                    thumbnail_path,
+                    format='png',
+                    dpi=self.styles.get("thumbnail_dpi", 40),
+                    bbox_inches='tight'
+                )
+                self.last_companion_files.append(thumbnail_path)
             
             # HTML生成
             html_content = f"""
@@ -123,7 +267,7 @@ class ChartGenerator:
                             </head>
                             <body>
                                 <div class="chart-container">
-                                    <img src="data:image/png;base64,{img_base64}" alt="Chart">
+                                    <img src="{img_src}" alt="Chart">
                                 </div>
                             </body>
                             </html>
@@ -138,8 +282,9 @@ class ChartGenerator:
             logger.error(f"図表の保存中にエラーが発生しました: {e}")
             raise
         finally:
-            plt.close(fig)
+            self._close_figure(fig)
             
+    @cached_chart
     def create_simple_line_chart(
         self,
         data: Dict[str, List[Any]],
@@ -202,19 +347,15 @@ class ChartGenerator:
                 )
                 
                 # HTMLとして保存
-                fig.write_html(
+                self._write_plotly_figure(
+                    fig,
                     output_path,
-                    include_plotlyjs='cdn',
-<<<<<<< HEAD
                     config=self.plotly_config
-=======
-                    config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                 )
                 
             else:
                 # Matplotlibで生成
-                fig, ax = plt.subplots(figsize=self.styles["figsize"])
+                fig, ax = get_figure_pool().subplots(figsize=self.styles["figsize"])
                 ax.plot(
                     data[x_col], 
                     data[y_col],
@@ -228,7 +369,7 @@ class ChartGenerator:
                 ax.set_ylabel(ylabel, fontsize=self.styles["font_size_label"])
                 ax.grid(True, alpha=self.styles["grid_alpha"])
                 
-                plt.tight_layout()
+                fig.tight_layout()
                 self._save_mpl_figure_to_html(fig, output_path)
                 
             return output_path
@@ -237,6 +378,7 @@ class ChartGenerator:
             logger.error(f"折れ線グラフの生成中にエラーが発生しました: {e}")
             raise
             
+    @cached_chart
     def create_bar_chart(
         self,
         data: Dict[str, List[Any]],
@@ -298,19 +440,15 @@ class ChartGenerator:
                 )
                 
                 # HTMLとして保存
-                fig.write_html(
+                self._write_plotly_figure(
+                    fig,
                     output_path,
-                    include_plotlyjs='cdn',
-<<<<<<< HEAD
                     config=self.plotly_config
-=======
-                    config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                 )
                 
             else:
                 # Matplotlibで生成
-                fig, ax = plt.subplots(figsize=self.styles["figsize"])
+                fig, ax = get_figure_pool().subplots(figsize=self.styles["figsize"])
                 ax.bar(
                     data[x_col], 
                     data[y_col],
@@ -322,7 +460,7 @@ class ChartGenerator:
                 ax.set_ylabel(ylabel, fontsize=self.styles["font_size_label"])
                 ax.grid(True, alpha=self.styles["grid_alpha"], axis='y')
                 
-                plt.tight_layout()
+                fig.tight_layout()
                 self._save_mpl_figure_to_html(fig, output_path)
                 
             return output_path
@@ -331,6 +469,7 @@ class ChartGenerator:
             logger.error(f"棒グラフの生成中にエラーが発生しました: {e}")
             raise
             
+    @cached_chart
     def create_custom_figure(
         self, 
         drawing_function: Callable,
@@ -357,12 +496,12 @@ class ChartGenerator:
         else:
             output_path = Path(safe_filename)        
         try:
-            fig, ax = plt.subplots(figsize=self.styles["figsize"])
+            fig, ax = get_figure_pool().subplots(figsize=self.styles["figsize"])
             
             # カスタム描画関数を実行
             drawing_function(ax, self.colors, self.styles, **kwargs)
             
-            plt.tight_layout()
+            fig.tight_layout()
             self._save_mpl_figure_to_html(fig, output_path)
             
             return output_path
@@ -371,6 +510,7 @@ class ChartGenerator:
             logger.error(f"カスタム図の生成中にエラーが発生しました: {e}")
             raise
             
+    @cached_chart
     def create_interactive_plotly_chart(
         self, plotly_figure: go.Figure, output_filename: str,
         output_dir: Path = None,
@@ -401,14 +541,10 @@ class ChartGenerator:
             )
             
             # HTMLとして保存
-            plotly_figure.write_html(
+            self._write_plotly_figure(
+                plotly_figure,
                 output_path,
-                include_plotlyjs='cdn',
-<<<<<<< HEAD
                 config=self.plotly_config
-=======
-                config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             )
             
             logger.info(f"インタラクティブ図表を保存しました: {output_path}")
@@ -418,6 +554,7 @@ class ChartGenerator:
             logger.error(f"Plotly図表の保存中にエラーが発生しました: {e}")
             raise
 
+    @cached_chart(suffix='.gif')
     def create_animation_gif(
         self, frames: List[Any], output_filename: str, fps: int = 10, output_dir: Path = None,
     ) -> Path:
@@ -432,6 +569,9 @@ class ChartGenerator:
             
         Returns:
             生成されたファイルのパス
+
+        Raises:
+            ValueError: 書き出せるフレームがない場合
         """
         safe_filename = slugify(output_filename.replace('.gif', '')) + '.gif'
         
@@ -441,38 +581,31 @@ class ChartGenerator:
             output_path = Path(safe_filename)
         
         try:
-            images = []
-            
-            for frame in frames:
-                if isinstance(frame, plt.Figure):
-                    # MatplotlibのFigureをPIL Imageに変換
-                    buffer = io.BytesIO()
-                    frame.savefig(
-                        buffer, 
-                        format='png',
-                        dpi=self.styles.get("figure_dpi", 150),
-                        bbox_inches='tight'
-                    )
-                    buffer.seek(0)
-                    img = Image.open(buffer)
-                    images.append(img)
-                    plt.close(frame)
-                elif isinstance(frame, Image.Image):
-                    images.append(frame)
-                else:
-                    logger.warning(f"未対応のフレームタイプ: {type(frame)}")
-                    
-            # GIFとして保存
-            if images:
-                imageio.mimsave(str(output_path), images, fps=fps)
-                logger.info(f"アニメーションGIFを保存しました: {output_path}")
-                
+            dpi = self.styles.get("figure_dpi", 150)
+            # フレームはまとめて保持せず、1枚ずつ減色してGIFに追記する
+            with StreamingGifWriter(output_path, fps=fps) as writer:
+                for frame in frames:
+                    if isinstance(frame, plt.Figure):
+                        # PNGを経由せず、Aggのバッファをそのままフレームにする
+                        frame.set_dpi(dpi)
+                        writer.append(figure_to_rgba(frame))
+                        self._close_figure(frame)
+                    elif isinstance(frame, Image.Image):
+                        writer.append(frame)
+                    else:
+                        logger.warning(f"未対応のフレームタイプ: {type(frame)}")
+
+            if not writer.frame_count:
+                # ファイルは最初のフレームを追記したときに作成されるため、存在しないパスは返さない
+                raise ValueError(f"アニメーションGIFに書き出せるフレームがありません: {output_path}")
+            logger.info(f"アニメーションGIFを保存しました: {output_path}")
             return output_path
             
         except Exception as e:
             logger.error(f"アニメーションGIFの生成中にエラーが発生しました: {e}")
             raise# 既存のメソッドに加えて以下を追加
 
+    @cached_chart
     def create_scatter_chart(
         self,
         data: Dict[str, List[Any]],
@@ -516,17 +649,13 @@ class ChartGenerator:
                     margin=dict(l=50, r=50, t=50, b=50)
                 )
                 
-                fig.write_html(
+                self._write_plotly_figure(
+                    fig,
                     output_path,
-                    include_plotlyjs='cdn',
-<<<<<<< HEAD
                     config=self.plotly_config
-=======
-                    config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                 )
             else:
-                fig, ax = plt.subplots(figsize=self.styles["figsize"])
+                fig, ax = get_figure_pool().subplots(figsize=self.styles["figsize"])
                 ax.scatter(
                     data[x_col], 
                     data[y_col],
@@ -540,7 +669,7 @@ class ChartGenerator:
                 ax.set_ylabel(ylabel, fontsize=self.styles["font_size_label"])
                 ax.grid(True, alpha=self.styles["grid_alpha"])
                 
-                plt.tight_layout()
+                fig.tight_layout()
                 self._save_mpl_figure_to_html(fig, output_path)
                 
             return output_path
@@ -549,6 +678,7 @@ class ChartGenerator:
             logger.error(f"散布図の生成中にエラーが発生しました: {e}")
             raise
 
+    @cached_chart
     def create_pie_chart(
         self,
         data: Dict[str, List[Any]],
@@ -582,17 +712,13 @@ class ChartGenerator:
                     margin=dict(l=50, r=50, t=50, b=50)
                 )
                 
-                fig.write_html(
+                self._write_plotly_figure(
+                    fig,
                     output_path,
-                    include_plotlyjs='cdn',
-<<<<<<< HEAD
                     config=self.plotly_config
-=======
-                    config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                 )
             else:
-                fig, ax = plt.subplots(figsize=(6, 6))
+                fig, ax = get_figure_pool().subplots(figsize=(6, 6))
                 ax.pie(
                     data[values_col],
                     labels=data[labels_col],
@@ -602,7 +728,7 @@ class ChartGenerator:
                 
                 ax.set_title(title, fontsize=self.styles["font_size_title"])
                 
-                plt.tight_layout()
+                fig.tight_layout()
                 self._save_mpl_figure_to_html(fig, output_path)
                 
             return output_path
@@ -611,6 +737,7 @@ class ChartGenerator:
             logger.error(f"円グラフの生成中にエラーが発生しました: {e}")
             raise
 
+    @cached_chart
     def create_state_transition_chart(
         self, data: Dict, config: Dict, output_filename: str, output_dir: Path = None
     ) -> Path:
@@ -667,14 +794,10 @@ class ChartGenerator:
                 margin=dict(l=50, r=50, t=80, b=50)
             )
             
-            fig.write_html(
+            self._write_plotly_figure(
+                fig,
                 output_path,
-                include_plotlyjs='cdn',
-<<<<<<< HEAD
                 config=self.plotly_config
-=======
-                config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             )
             
             return output_path
@@ -683,6 +806,7 @@ class ChartGenerator:
             logger.error(f"状態遷移チャートの生成中にエラーが発生しました: {e}")
             raise
 
+    @cached_chart
     def create_dropdown_filter_chart(
         self, data: Dict, config: Dict, output_filename: str, output_dir: Path = None
     ) -> Path:
@@ -742,14 +866,10 @@ class ChartGenerator:
                 margin=dict(l=50, r=50, t=80, b=50)
             )
             
-            fig.write_html(
+            self._write_plotly_figure(
+                fig,
                 output_path,
-                include_plotlyjs='cdn',
-<<<<<<< HEAD
                 config=self.plotly_config
-=======
-                config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             )
             
             return output_path
@@ -758,6 +878,7 @@ class ChartGenerator:
             logger.error(f"ドロップダウンフィルタチャートの生成中にエラーが発生しました: {e}")
             raise
 
+    @cached_chart
     def create_slider_chart(
         self, data: Dict, config: Dict, output_filename: str, output_dir: Path = None
     ) -> Path:
@@ -811,23 +932,16 @@ class ChartGenerator:
                 sliders=sliders,
                 xaxis_title=config.get('xlabel', ''),
                 yaxis_title=config.get('ylabel', ''),
-<<<<<<< HEAD
                 yaxis_range=config.get('yaxis_range'),  # Y軸の範囲を固定
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                 width=None,
                 height=450,
                 margin=dict(l=50, r=50, t=50, b=100)
             )
             
-            fig.write_html(
+            self._write_plotly_figure(
+                fig,
                 output_path,
-                include_plotlyjs='cdn',
-<<<<<<< HEAD
                 config=self.plotly_config
-=======
-                config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             )
             
             return output_path
@@ -836,6 +950,7 @@ class ChartGenerator:
             logger.error(f"スライダーチャートの生成中にエラーが発生しました: {e}")
             raise
 
+    @cached_chart
     def create_hover_details_chart(
         self, data: Dict, config: Dict, output_filename: str, output_dir: Path = None
     ) -> Path:
@@ -879,14 +994,10 @@ class ChartGenerator:
                 margin=dict(l=50, r=50, t=50, b=50)
             )
             
-            fig.write_html(
+            self._write_plotly_figure(
+                fig,
                 output_path,
-                include_plotlyjs='cdn',
-<<<<<<< HEAD
                 config=self.plotly_config
-=======
-                config={'responsive': True}
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             )
             
             return output_path
@@ -895,6 +1006,7 @@ class ChartGenerator:
             logger.error(f"ホバー詳細チャートの生成中にエラーが発生しました: {e}")
             raise
 
+    @cached_chart(suffix='.gif')
     def create_animation_from_data(
         self, frames_data: List[Dict], config: Dict, output_filename: str, output_dir: Path = None
     ) -> Path:
@@ -909,6 +1021,9 @@ class ChartGenerator:
             
         Returns:
             生成されたGIFファイルのパス
+
+        Raises:
+            ValueError: フレームデータが空の場合
         """
         safe_filename = slugify(output_filename.replace('.gif', '')) + '.gif'
         
@@ -917,58 +1032,23 @@ class ChartGenerator:
         else:
             output_path = Path(safe_filename)
         
+        if not frames_data:
+            raise ValueError(f"アニメーションGIFのフレームデータが空です: {output_path}")
+
         try:
-            frames = []
-            
-            for frame_data in frames_data:
-                fig, ax = plt.subplots(figsize=self.styles["figsize"])
-                
-                # フレームデータの取得
-                x_data = frame_data.get('x', [])
-                y_data = frame_data.get('y', [])
-                frame_type = frame_data.get('type', 'line')
-                
-                # グラフタイプに応じて描画
-                if frame_type == 'line':
-                    ax.plot(x_data, y_data, 
-                        linewidth=self.styles["line_width"],
-                        color=self.colors["info"])
-                elif frame_type == 'scatter':
-                    ax.scatter(x_data, y_data, 
-                        s=50, alpha=0.6, color=self.colors["info"])
-                elif frame_type == 'bar':
-                    ax.bar(x_data, y_data, 
-                        color=self.colors["info"], alpha=0.7)
-                
-                # 軸の設定
-                xlim = config.get('xlim', (0, 10))
-                ylim = config.get('ylim', (0, 10))
-                ax.set_xlim(xlim)
-                ax.set_ylim(ylim)
-                ax.set_title(frame_data.get('title', config.get('title', '')))
-                ax.set_xlabel(config.get('xlabel', ''))
-                ax.set_ylabel(config.get('ylabel', ''))
-                ax.grid(True, alpha=self.styles["grid_alpha"])
-                
-                plt.tight_layout()
-                frames.append(fig)
-            
-            # GIFとして保存
-            if frames:
-                return self.create_animation_gif(
-                    frames, 
-                    output_filename, 
-                    fps=config.get('fps', 2),
-                    output_dir=output_dir
-                )
-            else:
-                logger.warning("生成するフレームがありません")
-                return output_path
+            workers = resolve_worker_count(self.animation_workers, len(frames_data))
+            renderer = AnimationFrameRenderer(
+                config, self.colors, self.styles, workers=workers,
+                executor=self._get_animation_pool(workers) if workers > 1 else None
+            )
+
+            # フレームは並列に描画し、描画した順ではなくフレーム順にGIFへ追記する
+            with StreamingGifWriter(output_path, fps=config.get('fps', 2)) as writer:
+                renderer.render(frames_data, writer.append)
+
+            logger.info(f"アニメーションGIFを保存しました: {output_path}")
+            return output_path
                 
         except Exception as e:
             logger.error(f"アニメーションデータからのGIF生成中にエラーが発生しました: {e}")
-<<<<<<< HEAD
-            raise
-=======
             raise
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
@@ -3,10 +3,12 @@
 各種ジェネレータを統合し、章ごとのコンテンツ構築のフレームワークを提供
 """
 
+import inspect
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Set, Tuple
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 
 import yaml
 import pandas as pd
@@ -14,12 +16,65 @@ from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from .document_builder import DocumentBuilder
 from .chart_generator import ChartGenerator
+from .chart_cache import ChartCache
 from .table_generator import TableGenerator
 from .knowledge_manager import KnowledgeManager, Term, FaqItem, TipItem
+from .build_cache import BuildCache, fingerprint_data, fingerprint_file, get_core_code_version
 from .config import GLOBAL_COLORS, BASE_CHART_STYLES, BASE_TABLE_STYLES
 
 logger = logging.getLogger(__name__)
 
+# 並列ビルド時にワーカープロセスごとに1つだけ保持するコンテンツマネージャー
+_worker_manager: Optional["BaseContentManager"] = None
+
+
+def _init_chapter_worker(
+    worker_spec: Tuple[type, tuple, Dict[str, Any]],
+    terms: List[Term],
+    exercises: Dict[str, Any]
+):
+    """
+    並列ビルドのワーカープロセスを初期化
+    matplotlibのpyplot状態はスレッドセーフではないため、プロセスごとに
+    DocumentBuilder/ChartGeneratorを持つマネージャーを構築する
+
+    Args:
+        worker_spec: マネージャーのクラスとコンストラクタ引数
+        terms: 親プロセスで登録済みの専門用語
+        exercises: 親プロセスで読み込み済みの演習問題
+    """
+    global _worker_manager
+    manager_cls, args, kwargs = worker_spec
+    _worker_manager = manager_cls(*args, **kwargs)
+    _worker_manager.knowledge_mgr.register_terms_batch(terms)
+    _worker_manager.exercises = exercises
+
+
+def _render_chapter_in_worker(
+    job: Dict[str, Any]
+) -> Tuple[Path, List[Path], List[Dict[str, str]], Dict[str, int]]:
+    """
+    ワーカープロセスで1章を生成
+
+    Args:
+        job: 章の生成情報 {"chapter_data", "filename", "charts_dir", "tables_dir"}
+
+    Returns:
+        (Markdownファイルのパス, 生成された図表・表のパス, 用語使用箇所, 図表キャッシュの統計情報)
+    """
+    manager = _worker_manager
+    manager.knowledge_mgr.term_usage.clear()
+    render_cache = manager.chart_gen.render_cache
+    if render_cache is not None:
+        render_cache.reset_stats()
+
+    output_path = manager._render_chapter(
+        job['chapter_data'], job['filename'], job['charts_dir'], job['tables_dir']
+    )
+    term_usage = manager.knowledge_mgr.get_term_usage_for_path(str(job['filename']))
+    cache_stats = render_cache.get_stats() if render_cache is not None else {}
+    return output_path, list(manager._chapter_outputs), term_usage, cache_stats
+
 
 class BaseContentManager(ABC):
     """コンテンツ管理の基底クラス"""
@@ -30,7 +85,15 @@ class BaseContentManager(ABC):
         output_base_dir: Path,
         colors: Optional[Dict[str, str]] = None,
         chart_styles: Optional[Dict[str, Any]] = None,
-        table_styles: Optional[Dict[str, Any]] = None
+        table_styles: Optional[Dict[str, Any]] = None,
+        incremental_build: bool = False,
+        max_workers: int = 1,
+        chart_cache_dir: Optional[Path] = None,
+        plotly_js_path: Optional[Path] = None,
+        plotly_output: str = "html",
+        deferred_embeds: bool = False,
+        stream_markdown: bool = False,
+        animation_workers: Optional[int] = 1
     ):
         """
         初期化
@@ -41,9 +104,20 @@ class BaseContentManager(ABC):
             colors: カスタムカラー設定
             chart_styles: カスタム図表スタイル
             table_styles: カスタム表スタイル
+            incremental_build: 入力に変更のない章の再生成をスキップするか
+            max_workers: 章の並列生成に使用するプロセス数（1の場合は逐次生成）
+            chart_cache_dir: 図表レンダリングキャッシュの保存先（Noneの場合は無効）
+            plotly_js_path: 図表から参照する自前のplotly.jsのパス（Noneの場合はCDNを使用）
+            plotly_output: Plotly図表の出力形式（"html": iframe埋め込み / "json": 遅延描画用ペイロード）
+            deferred_embeds: 図表・表のiframeを表示領域に入るまで読み込まないか
+                （Matplotlib図表にはサムネイルのプレースホルダーを生成する）
+            stream_markdown: 章のMarkdownをメモリに保持せずファイルへ直接書き込むか
+            animation_workers: アニメーションのフレーム描画に使うプロセス数
+                （章を並列生成するワーカーでは常に1）
         """
         self.material_name = material_name
         self.output_base_dir = Path(output_base_dir)
+        self.max_workers = max(1, max_workers)
         
         # プロジェクトルートを特定
         self.project_root = Path(__file__).resolve().parents[2]
@@ -56,14 +130,33 @@ class BaseContentManager(ABC):
         self.table_styles = table_styles or BASE_TABLE_STYLES
 
         # 各ジェネレータのインスタンス化
-        self.doc_builder = DocumentBuilder(self.output_base_dir)
-        self.chart_gen = ChartGenerator(self.colors, self.chart_styles)
+        self.doc_builder = DocumentBuilder(self.output_base_dir, stream_markdown=stream_markdown)
+        self.chart_cache_dir = Path(chart_cache_dir) if chart_cache_dir else None
+        render_cache = ChartCache(self.chart_cache_dir) if self.chart_cache_dir else None
+        self.plotly_js_path = Path(plotly_js_path) if plotly_js_path else None
+        self.chart_gen = ChartGenerator(
+            self.colors,
+            self.chart_styles,
+            render_cache=render_cache,
+            plotly_js_path=self.plotly_js_path,
+            plotly_output=plotly_output,
+            thumbnails=deferred_embeds,
+            animation_workers=animation_workers
+        )
+        self.deferred_embeds = deferred_embeds
         self.table_gen = TableGenerator(self.colors, self.table_styles)
         self.knowledge_mgr = KnowledgeManager(self.output_base_dir)
-<<<<<<< HEAD
         self.exercises: Dict[str, Dict[str, Any]] = {}
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
+
+        # インクリメンタルビルド用のマニフェスト
+        self.build_cache: Optional[BuildCache] = None
+        if incremental_build:
+            self.build_cache = BuildCache(
+                self.output_base_dir / material_name / ".build_manifest.json",
+                root_dir=self.output_base_dir
+            )
+        # 現在生成中の章で出力された図表・表のパス
+        self._chapter_outputs: List[Path] = []
 
         # Jinja2環境の初期化
         template_dir = Path(__file__).parent.parent / "materials" / material_name / "templates"
@@ -79,6 +172,16 @@ class BaseContentManager(ABC):
             )
             self.jinja_env = None
 
+    def __enter__(self) -> "BaseContentManager":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """ビルドの終了時に、図表生成で起動したフレーム描画のプロセスプールを終了"""
+        self.chart_gen.close()
+
     def render_template(self, template_name: str, context: Dict[str, Any]) -> str:
         """
         Jinja2テンプレートをレンダリング
@@ -226,16 +329,238 @@ class BaseContentManager(ABC):
 
     def _generate_chapter_from_data(self, chapter_data: Dict[str, Any], filename: str,
                                    charts_dir: Path, tables_dir: Path) -> Path:
+        """
+        章データからMarkdownを生成
+        インクリメンタルビルドが有効で入力に変更がない場合は前回の出力を再利用する
+
+        Args:
+            chapter_data: 章データ
+            filename: 出力するMarkdownファイル名
+            charts_dir: 図表の出力ディレクトリ
+            tables_dir: 表の出力ディレクトリ
+
+        Returns:
+            Markdownファイルのパス
+        """
+        if self.build_cache is None:
+            return self._render_chapter(chapter_data, filename, charts_dir, tables_dir)
+
+        fingerprint = self._compute_chapter_fingerprint(chapter_data)
+        cached_path = self._restore_cached_chapter(filename, fingerprint)
+        if cached_path is not None:
+            return cached_path
+
+        output_path = self._render_chapter(chapter_data, filename, charts_dir, tables_dir)
+        self.build_cache.record(
+            filename,
+            fingerprint,
+            output_path,
+            self._chapter_outputs,
+            self.knowledge_mgr.get_term_usage_for_path(str(filename))
+        )
+        self.build_cache.save()
+        return output_path
+
+    def _restore_cached_chapter(self, filename: str, fingerprint: str) -> Optional[Path]:
+        """
+        ビルドキャッシュにヒットした章の出力を再利用
+
+        Args:
+            filename: 出力するMarkdownファイル名
+            fingerprint: 章の入力フィンガープリント
+
+        Returns:
+            再利用するMarkdownファイルのパス（再生成が必要な場合はNone）
+        """
+        cached = self.build_cache.lookup(filename, fingerprint)
+        if cached is None:
+            return None
+
+        # 用語集の「使用箇所」が欠けないよう、前回記録した使用箇所を復元
+        for usage in cached['term_usage']:
+            self.knowledge_mgr.record_term_usage(
+                usage['term'], usage['title'], usage['path'], usage['anchor']
+            )
+        logger.info(f"入力に変更がないため章の生成をスキップしました: {filename}")
+        return cached['output']
+
+    def generate_chapters(self, chapter_jobs: List[Dict[str, Any]]) -> List[Path]:
+        """
+        複数の章をまとめて生成
+        max_workersが2以上の場合、キャッシュにヒットしなかった章をプロセスプールで並列生成し、
+        各ワーカーで記録された用語使用箇所を親プロセスのKnowledgeManagerに統合する
+
+        Args:
+            chapter_jobs: 章ごとの生成情報のリスト
+                [{"chapter_data", "filename", "charts_dir", "tables_dir"}]
+
+        Returns:
+            生成されたMarkdownファイルのパスリスト（chapter_jobsと同じ順序）
+        """
+        if self.max_workers <= 1 or len(chapter_jobs) <= 1:
+            return [
+                self._generate_chapter_from_data(
+                    job['chapter_data'], job['filename'], job['charts_dir'], job['tables_dir']
+                )
+                for job in chapter_jobs
+            ]
+
+        results: List[Optional[Path]] = [None] * len(chapter_jobs)
+        pending: List[Tuple[int, Optional[str]]] = []
+        for index, job in enumerate(chapter_jobs):
+            fingerprint = None
+            if self.build_cache is not None:
+                fingerprint = self._compute_chapter_fingerprint(job['chapter_data'])
+                results[index] = self._restore_cached_chapter(job['filename'], fingerprint)
+            if results[index] is None:
+                pending.append((index, fingerprint))
+
+        if not pending:
+            return results
+
+        workers = min(self.max_workers, len(pending))
+        logger.info(f"{len(pending)}章を{workers}プロセスで並列生成します")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_chapter_worker,
+            initargs=(
+                self._get_worker_spec(),
+                self.knowledge_mgr.get_all_terms(),
+                getattr(self, 'exercises', {})
+            )
+        ) as executor:
+            futures = [
+                (index, fingerprint, executor.submit(_render_chapter_in_worker, chapter_jobs[index]))
+                for index, fingerprint in pending
+            ]
+
+            # 用語集の出力順が安定するよう、投入順に結果を統合
+            for index, fingerprint, future in futures:
+                output_path, outputs, term_usage, cache_stats = future.result()
+                if self.chart_gen.render_cache is not None:
+                    self.chart_gen.render_cache.merge_stats(cache_stats)
+                for usage in term_usage:
+                    self.knowledge_mgr.record_term_usage(
+                        usage['term'], usage['title'], usage['path'], usage['anchor']
+                    )
+                if self.build_cache is not None:
+                    self.build_cache.record(
+                        chapter_jobs[index]['filename'], fingerprint, output_path, outputs, term_usage
+                    )
+                results[index] = output_path
+
+        if self.build_cache is not None:
+            self.build_cache.save()
+        return results
+
+    def _get_worker_spec(self) -> Tuple[type, tuple, Dict[str, Any]]:
+        """
+        ワーカープロセスで同等のマネージャーを再構築するための情報を取得
+        コンストラクタの引数が異なる継承クラスではオーバーライドする
+
+        Returns:
+            (マネージャーのクラス, 位置引数, キーワード引数)
+        """
+        return type(self), (self.material_name, self.output_base_dir), {
+            'colors': self.colors,
+            'chart_styles': self.chart_styles,
+            'table_styles': self.table_styles,
+            'chart_cache_dir': self.chart_cache_dir,
+            'plotly_js_path': self.plotly_js_path,
+            'plotly_output': self.chart_gen.plotly_output,
+            'deferred_embeds': self.deferred_embeds,
+            'stream_markdown': self.doc_builder.stream_markdown,
+            # 章のプロセスごとにフレーム描画のプロセスを起動すると章数×フレーム描画数のプロセスになる
+            'animation_workers': 1
+        }
+
+    def _compute_chapter_fingerprint(self, chapter_data: Dict[str, Any]) -> str:
+        """
+        章の生成結果に影響する全入力からフィンガープリントを算出
+
+        Args:
+            chapter_data: 章データ
+
+        Returns:
+            フィンガープリント文字列
+        """
+        learning_objects: Set[str] = set()
+        data_sources: Set[str] = set()
+        for section in chapter_data.get('sections', []):
+            self._collect_chapter_dependencies(
+                section.get('contents', []), learning_objects, data_sources
+            )
+
+        learning_objects_dir = self.project_root / "src" / "learning_objects"
+        material_source = inspect.getsourcefile(type(self))
+
+        return fingerprint_data({
+            'chapter': chapter_data,
+            'learning_objects': {
+                object_id: fingerprint_file(learning_objects_dir / f"{object_id}.yml")
+                for object_id in sorted(learning_objects)
+            },
+            'data_sources': {
+                source: fingerprint_file(self.data_dir / source)
+                for source in sorted(data_sources)
+            },
+            'core_version': get_core_code_version(),
+            'material_code': fingerprint_file(Path(material_source)) if material_source else None,
+            'terms': [
+                (t.term, t.definition, t.category, t.first_chapter)
+                for t in self.knowledge_mgr.get_all_terms()
+            ],
+            'exercises': getattr(self, 'exercises', {}),
+            'colors': self.colors,
+            'chart_styles': self.chart_styles,
+            'table_styles': self.table_styles,
+            'plotly_js': self.plotly_js_path.name if self.plotly_js_path else None,
+            'plotly_output': self.chart_gen.plotly_output,
+            'deferred_embeds': self.deferred_embeds
+        })
+
+    def _collect_chapter_dependencies(
+        self, contents: List[Dict[str, Any]], learning_objects: Set[str], data_sources: Set[str]
+    ):
+        """
+        コンテンツリストが参照する学習オブジェクトとCSVデータソースを収集
+        学習オブジェクト内でネストされた参照も再帰的に辿る
+
+        Args:
+            contents: コンテンツ要素のリスト
+            learning_objects: 参照された学習オブジェクトIDの集合（更新される）
+            data_sources: 参照されたCSVファイル名の集合（更新される）
+        """
+        for item in contents:
+            if item.get('data_source'):
+                data_sources.add(item['data_source'])
+
+            object_id = item.get('id') if item.get('type') == 'learning_object' else None
+            if not object_id or object_id in learning_objects:
+                continue
+
+            learning_objects.add(object_id)
+            object_path = self.project_root / "src" / "learning_objects" / f"{object_id}.yml"
+            if not object_path.exists():
+                continue
+            try:
+                with open(object_path, 'r', encoding='utf-8') as f:
+                    object_data = yaml.safe_load(f) or {}
+                self._collect_chapter_dependencies(
+                    object_data.get('contents', []), learning_objects, data_sources
+                )
+            except Exception as e:
+                logger.warning(f"学習オブジェクトの依存関係を解析できませんでした: {object_id} - {e}")
+
+    def _render_chapter(self, chapter_data: Dict[str, Any], filename: str,
+                        charts_dir: Path, tables_dir: Path) -> Path:
         """章データからMarkdownを生成"""
-        self.doc_builder.clear_content()
+        self.doc_builder.begin_document(filename)
+        self._chapter_outputs = []
 
         # タイトル
-<<<<<<< HEAD
         chapter_title = chapter_data.get('title', '')
         self.doc_builder.add_heading(chapter_title, 1)
-=======
-        self.doc_builder.add_heading(chapter_data.get('title', ''), 1)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
 
         # 概要
         if 'overview' in chapter_data:
@@ -249,7 +574,6 @@ class BaseContentManager(ABC):
             self._process_content_list(
                 section.get('contents', []),
                 charts_dir,
-<<<<<<< HEAD
                 tables_dir,
                 chapter_title,
                 filename
@@ -258,11 +582,6 @@ class BaseContentManager(ABC):
         # フィードバックフォームを追加
         self.doc_builder.add_feedback_form("https://docs.google.com/forms/d/e/1FAIpQLSdzs_12345/viewform?usp=sf_link")
 
-=======
-                tables_dir
-            )
-
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         return self.doc_builder.save_markdown(filename)
 
     def _create_chapter_template(
@@ -278,8 +597,9 @@ class BaseContentManager(ABC):
         Returns:
             生成されたファイルのパス
         """
-        # バッファをクリア
-        self.doc_builder.clear_content()
+        # 新しい文書を開始（ストリーミングモードでは出力先へ直接書き込む）
+        filename = chapter_info.get("filename", "chapter.md")
+        self.doc_builder.begin_document(filename)
 
         # 章のタイトルを追加
         self.doc_builder.add_heading(chapter_info.get("title", ""), 1)
@@ -299,7 +619,6 @@ class BaseContentManager(ABC):
             chapter_func()
 
         # ファイル保存
-        filename = chapter_info.get("filename", "chapter.md")
         return self.doc_builder.save_markdown(filename)
 
     def _create_chapter_and_document_paths(
@@ -336,11 +655,7 @@ class BaseContentManager(ABC):
 
             return chapter_path
 
-<<<<<<< HEAD
     def _process_content_list(self, contents: List[Dict[str, Any]], charts_dir: Path, tables_dir: Path, chapter_title: str, chapter_path: str):
-=======
-    def _process_content_list(self, contents: List[Dict[str, Any]], charts_dir: Path, tables_dir: Path):
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         """
         コンテンツリストを処理してMarkdownに変換
 
@@ -348,11 +663,8 @@ class BaseContentManager(ABC):
             contents: コンテンツ要素のリスト
             charts_dir: 図表の出力ディレクトリ
             tables_dir: 表の出力ディレクトリ
-<<<<<<< HEAD
             chapter_title: 現在の章のタイトル
             chapter_path: 現在の章のファイルパス
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         """
         for item in contents:
             content_type = item.get('type')
@@ -362,7 +674,6 @@ class BaseContentManager(ABC):
 
             elif content_type == 'text_with_tooltips':
                 text = item.get('text', '')
-<<<<<<< HEAD
                 terms_key = item.get('terms', chapter_title)
                 terms_info = self._get_chapter_terms(terms_key)
                 self.doc_builder.add_paragraph_with_tooltips(
@@ -372,13 +683,6 @@ class BaseContentManager(ABC):
                     chapter_title,
                     chapter_path
                 )
-=======
-                terms = item.get('terms', {})
-                # termsが文字列（章タイトル）の場合は、その章の用語を取得
-                if isinstance(terms, str):
-                    terms = self._get_chapter_terms(terms)
-                self.doc_builder.add_paragraph_with_tooltips(text, terms)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
 
             elif content_type == 'heading':
                 text = item.get('text', '')
@@ -439,15 +743,11 @@ class BaseContentManager(ABC):
                 quiz_data = item.get('quiz_data', item)  # デフォルトでアイテム自体を使用
                 logger.info(f"複数選択クイズを処理: {quiz_data.get('quiz_id', 'ID不明')}")
                 self.doc_builder.add_multiple_choice_quiz(quiz_data)
-<<<<<<< HEAD
 
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             elif content_type == 'exercises':
                 question_data = item.get('question_data', {})
                 self.doc_builder.add_exercise_question(question_data)
 
-<<<<<<< HEAD
             elif content_type == 'exercise_ref':
                 exercise_id = item.get('id')
                 if exercise_id and exercise_id in self.exercises:
@@ -455,8 +755,6 @@ class BaseContentManager(ABC):
                 else:
                     logger.warning(f"演習問題IDが見つかりません: {exercise_id}")
 
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             elif content_type == 'image':
                 alt_text = item.get('alt_text', '')
                 image_path = Path(item.get('path', ''))
@@ -467,7 +765,13 @@ class BaseContentManager(ABC):
                 component_path = Path(item.get('path', ''))
                 width = item.get('width', '100%')
                 height = item.get('height', '400px')
-                self.doc_builder.add_html_component_reference(component_path, width, height)
+                self.doc_builder.add_html_component_reference(
+                    component_path,
+                    width,
+                    height,
+                    loading=item.get('loading', 'lazy'),
+                    deferred=item.get('deferred', self.deferred_embeds)
+                )
 
             elif content_type == 'horizontal_rule':
                 self.doc_builder.add_horizontal_rule()
@@ -498,19 +802,11 @@ class BaseContentManager(ABC):
                 self.doc_builder.add_mermaid_block(graph_string, title)
 
             elif content_type == 'learning_object':
-<<<<<<< HEAD
                 self._expand_learning_object(item, charts_dir, tables_dir, chapter_title, chapter_path)
 
 
 
     def _expand_learning_object(self, item: Dict[str, Any], charts_dir: Path, tables_dir: Path, chapter_title: str, chapter_path: str):
-=======
-                self._expand_learning_object(item, charts_dir, tables_dir)
-
-
-
-    def _expand_learning_object(self, item: Dict[str, Any], charts_dir: Path, tables_dir: Path):
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         """
         学習オブジェクトIDを解決し、その内容を展開する。
         
@@ -518,11 +814,8 @@ class BaseContentManager(ABC):
             item: 学習オブジェクトの参照情報（例: {'type': 'learning_object', 'id': 'intro_to_pointer'}）
             charts_dir: 図表の出力ディレクトリ
             tables_dir: 表の出力ディレクトリ
-<<<<<<< HEAD
             chapter_title: 現在の章のタイトル
             chapter_path: 現在の章のファイルパス
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         """
         object_id = item.get('id')
         if not object_id:
@@ -544,11 +837,7 @@ class BaseContentManager(ABC):
             # 学習オブジェクトのコンテンツリストを処理（再帰呼び出し）
             # これにより、学習オブジェクト内に別の学習オブジェクトをネストすることも可能になる
             object_contents = learning_object_data.get('contents', [])
-<<<<<<< HEAD
             self._process_content_list(object_contents, charts_dir, tables_dir, chapter_title, chapter_path)
-=======
-            self._process_content_list(object_contents, charts_dir, tables_dir)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
 
         except Exception as e:
             logger.error(f"学習オブジェクトの読み込みまたは展開中にエラーが発生しました: {e}")
@@ -588,7 +877,6 @@ class BaseContentManager(ABC):
 
             if chart_type == 'custom':
                 # カスタム描画関数による図表
-<<<<<<< HEAD
                 plot_function_name = config.get('plot_function')
                 if plot_function_name:
                     # 文字列関数名を実際の関数オブジェクトに解決
@@ -601,13 +889,6 @@ class BaseContentManager(ABC):
                         logger.error(f"カスタム描画関数 '{plot_function_name}' が見つかりません")
                         # デフォルトのサンプル図表を生成
                         chart_path = self._generate_default_sample_chart(filename, output_dir)
-=======
-                plot_function = config.get('plot_function')
-                if plot_function:
-                    chart_path = self.chart_gen.create_custom_figure(
-                        plot_function, filename, output_dir=output_dir
-                    )
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                 else:
                     logger.warning("カスタムチャートに描画関数が指定されていません")
                     return
@@ -687,6 +968,7 @@ class BaseContentManager(ABC):
                             self.doc_builder.add_paragraph(f"**{caption}**")
 
                         # GIFファイルは画像として埋め込み（相対パス修正）
+                        self._chapter_outputs.append(chart_path)
                         relative_path = Path("../../charts") / chart_path.name
                         self.doc_builder.add_image_reference(
                             "アニメーション図表", relative_path
@@ -724,18 +1006,41 @@ class BaseContentManager(ABC):
 
             # 図表が正常に生成された場合の共通処理（アニメーション以外）
             if chart_path is not None:
+                self._chapter_outputs.append(chart_path)
+                companion_files = list(self.chart_gen.last_companion_files)
+                self._chapter_outputs.extend(companion_files)
+
                 # キャプションの追加
                 caption = chart_config.get('caption', '')
                 if caption:
                     self.doc_builder.add_paragraph(f"**{caption}**")
 
-                # iframeタグの生成と埋め込み
-                relative_path = Path("../../charts") / chart_path.name
-                self.doc_builder.add_html_component_reference(
-                    relative_path,
-                    '100%',  # 幅は100%
-                    None     # 高さは自動調整
-                )
+                thumbnails = [path for path in companion_files if path.name.endswith('.thumb.png')]
+                image_files = [
+                    path for path in companion_files
+                    if path.suffix in ('.png', '.webp') and path not in thumbnails
+                ]
+                json_files = [path for path in companion_files if path.suffix == '.json']
+                if json_files:
+                    # Plotly図表はiframeを使わず、ページ共通のローダーで遅延描画
+                    relative_path = Path("../../charts") / json_files[0].name
+                    self.doc_builder.add_plotly_json_reference(relative_path)
+                elif chart_config.get('embed') == 'image' and image_files:
+                    # 外部画像モードの図表はiframeを使わず画像として直接参照
+                    relative_path = Path("../../charts") / image_files[0].name
+                    self.doc_builder.add_image_reference(
+                        config.get('title') or caption or "図表", relative_path
+                    )
+                else:
+                    # iframeタグの生成と埋め込み
+                    relative_path = Path("../../charts") / chart_path.name
+                    self.doc_builder.add_html_component_reference(
+                        relative_path,
+                        '100%',  # 幅は100%
+                        None,    # 高さは自動調整
+                        deferred=self.deferred_embeds,
+                        placeholder=Path("../../charts") / thumbnails[0].name if thumbnails else None
+                    )
 
                 logger.debug(f"図表埋め込み成功: {chart_path.name}")
             else:
@@ -819,6 +1124,8 @@ class BaseContentManager(ABC):
 
             # 表が正常に生成された場合の共通処理
             if table_path is not None:
+                self._chapter_outputs.append(table_path)
+
                 # キャプションの追加
                 caption = table_config.get('caption', '')
                 if caption:
@@ -830,7 +1137,8 @@ class BaseContentManager(ABC):
                 self.doc_builder.add_html_component_reference(
                     relative_path,
                     '100%',  # 幅は100%
-                    None     # 高さは自動調整
+                    None,    # 高さは自動調整
+                    deferred=self.deferred_embeds
                 )
 
                 logger.debug(f"表埋め込み成功: {table_path.name}")
@@ -841,7 +1149,6 @@ class BaseContentManager(ABC):
 
         except Exception as e:
             logger.error(f"表処理中にエラーが発生しました: {e}")
-<<<<<<< HEAD
             logger.error(f"表タイプ: {table_type}, 設定: {table_config}")
     
     def _resolve_custom_function(self, function_name: str) -> Optional[Callable]:
@@ -902,6 +1209,3 @@ class BaseContentManager(ABC):
         except Exception as e:
             logger.error(f"デフォルトサンプル図表の生成中にエラー: {e}")
             raise
-=======
-            logger.error(f"表タイプ: {table_type}, 設定: {table_config}")
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
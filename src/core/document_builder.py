@@ -3,12 +3,13 @@ Markdownコンテンツを構築するためのビルダークラス
 MkDocs Materialテーマの拡張機能をサポート
 """
 
+import os
 import re
+import hashlib
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterable
 from html import escape
-<<<<<<< HEAD
 import json # 追加
 
 from .utils import (
@@ -19,47 +20,157 @@ from .utils import (
 from .config import MATERIAL_ICONS
 from .knowledge_manager import KnowledgeManager
 from .learning_analyzer import LearningAnalyzer
-=======
-
-from .utils import (
-    generate_admonition_markdown,
-    generate_tabbed_markdown
-)
-from .config import MATERIAL_ICONS
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
+from .term_matcher import TermMatcher
 
 logger = logging.getLogger(__name__)
 
+# ストリーミング出力時のファイル書き込みバッファサイズ（バイト）
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class MarkdownFileStream:
+    """
+    content_bufferの代わりに行を一時ファイルへ直接書き込むストリーム
+    リストと同じappend/extendで追加でき、完了時に出力先へアトミックに置き換える
+    """
+
+    def __init__(self, file_path: Path, buffer_size: int = STREAM_BUFFER_SIZE):
+        """
+        初期化（一時ファイルを開く）
+
+        Args:
+            file_path: 最終的な出力先のパス
+            buffer_size: 書き込みバッファサイズ（バイト）
+        """
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.file_path.with_name(f".{self.file_path.name}.tmp{os.getpid()}")
+        self._handle = open(self.tmp_path, 'w', encoding='utf-8', buffering=buffer_size)
+        self._line_count = 0
+
+    def append(self, line: str):
+        """
+        1行（要素）を書き込む
+
+        Args:
+            line: 追加する文字列（'\n'.join と同じく要素間に改行を挟む）
+        """
+        if self._line_count:
+            self._handle.write('\n')
+        self._handle.write(line)
+        self._line_count += 1
+
+    def extend(self, lines: Iterable[str]):
+        """
+        複数の行を書き込む
+
+        Args:
+            lines: 追加する文字列のイテラブル
+        """
+        for line in lines:
+            self.append(line)
+
+    def copy(self) -> "MarkdownFileStream":
+        """
+        バッファを一時的に退避して復元する呼び出し側との互換用
+        書き込み済みの内容は一時ファイルにあるため、自身を返す
+
+        Returns:
+            自身のインスタンス
+        """
+        return self
+
+    def __len__(self) -> int:
+        """書き込んだ要素数"""
+        return self._line_count
+
+    def read_content(self) -> str:
+        """
+        これまでに書き込んだ内容を読み戻す
+
+        Returns:
+            Markdownコンテンツ文字列
+        """
+        self._handle.flush()
+        return self.tmp_path.read_text(encoding='utf-8')
+
+    def commit(self, file_path: Optional[Path] = None) -> Path:
+        """
+        書き込みを完了して出力先にアトミックに置き換える
+
+        Args:
+            file_path: 出力先のパス（省略時は開いた時のパス）
+
+        Returns:
+            保存されたファイルのパス
+        """
+        target = Path(file_path) if file_path else self.file_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        os.replace(self.tmp_path, target)
+        return target
+
+    def abort(self):
+        """書き込みを中止して一時ファイルを削除"""
+        if not self._handle.closed:
+            self._handle.close()
+        self.tmp_path.unlink(missing_ok=True)
+
 
 class DocumentBuilder:
     """Markdownドキュメントを構築するビルダークラス"""
     
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, stream_markdown: bool = False):
         """
         初期化
         
         Args:
             output_dir: Markdownファイル出力先のベースディレクトリ
+            stream_markdown: begin_document()で開始した文書をメモリに保持せず
+                ファイルへ直接書き込むか
         """
         self.output_dir = Path(output_dir)
+        self.stream_markdown = stream_markdown
         self.content_buffer = []
-        
-    def clear_content(self):
-<<<<<<< HEAD
+        self._stream: Optional[MarkdownFileStream] = None
+
+    def begin_document(self, filename: str):
         """
-        現在構築中のMarkdownコンテンツの内部バッファをクリア
+        新しい文書の構築を開始
+        ストリーミングモードでは出力先の一時ファイルへの書き込みを開始する
+
+        Args:
+            filename: 保存するファイル名（相対パス）
         """
+        self._abort_stream()
         self.content_buffer = []
-        
-    def get_content(self) -> str:
+        if self.stream_markdown:
+            self.start_stream(filename)
+
+    def start_stream(self, filename: str):
         """
-        構築された現在のMarkdownコンテンツを文字列として返す
+        以降に追加するコンテンツをファイルへ直接書き込む
+        save_markdown()で出力先へアトミックに置き換えられる
+
+        Args:
+            filename: 保存するファイル名（相対パス）
+        """
+        self._abort_stream()
+        self._stream = MarkdownFileStream(self.output_dir / filename)
+        self.content_buffer = self._stream
+
+    def _abort_stream(self):
+        """書き込み中のストリームがあれば破棄"""
+        if self._stream is not None:
+            self._stream.abort()
+            self._stream = None
         
-        Returns:
-            Markdownコンテンツ文字列
+    def clear_content(self):
+        """
+        現在構築中のMarkdownコンテンツの内部バッファをクリア
         """
-=======
-        """現在構築中のMarkdownコンテンツの内部バッファをクリア"""
         self.content_buffer = []
         
     def get_content(self) -> str:
@@ -69,7 +180,8 @@ class DocumentBuilder:
         Returns:
             Markdownコンテンツ文字列
         """
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
+        if isinstance(self.content_buffer, MarkdownFileStream):
+            return self.content_buffer.read_content()
         return '\n'.join(self.content_buffer)
         
     def save_markdown(self, filename: str) -> Path:
@@ -83,10 +195,15 @@ class DocumentBuilder:
             保存されたファイルのPathオブジェクト
         """
         file_path = self.output_dir / filename
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        content = self.get_content()
-        file_path.write_text(content, encoding='utf-8')
+
+        if self._stream is not None and self.content_buffer is self._stream:
+            self._stream.commit(file_path)
+            self._stream = None
+        else:
+            self._abort_stream()
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            content = self.get_content()
+            file_path.write_text(content, encoding='utf-8')
         
         logger.info(f"Markdownファイルを保存しました: {file_path}")
         
@@ -95,7 +212,6 @@ class DocumentBuilder:
         
         return file_path
         
-<<<<<<< HEAD
     def _escape_js_string(self, s: str) -> str:
         """
         JavaScript文字列リテラル用に文字列をエスケープする
@@ -106,10 +222,6 @@ class DocumentBuilder:
 
     def add_heading(self, text: str, level: int):
         """
-=======
-    def add_heading(self, text: str, level: int):
-        """
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         Markdownの見出しを追加
         
         Args:
@@ -136,8 +248,39 @@ class DocumentBuilder:
         self.content_buffer.append(text)
         self.content_buffer.append("")
         
+    def _wrap_terms_with_tooltips(
+        self, text: str, terms_info: Dict[str, Dict[str, str]], matcher: TermMatcher
+    ) -> Tuple[str, List[str]]:
+        """
+        テキスト中の用語の初出箇所をツールチップ付きのspanで囲む
+        用語の検出はオートマトンで一度だけ走査し、同じ位置では最長の用語を優先する
+        既に置換した用語の出現箇所は、他の用語との重複を判定する前に除外する
+        Markdownリンク内の用語は置換しない
+
+        Args:
+            text: 段落のテキスト
+            terms_info: 用語情報の辞書 {用語: {"tooltip_text": "ツールチップ内容"}}
+            matcher: terms_infoの用語から構築したTermMatcher
+
+        Returns:
+            (置換後のテキスト, ツールチップを付与した用語のリスト（出現順）)
+        """
+        parts = []
+        used_terms: List[str] = []
+        last_end = 0
+        for start, end, term in matcher.find_all(text, first_occurrence_only=True):
+            if term not in terms_info:
+                continue
+            tooltip_text = terms_info[term].get("tooltip_text", "")
+            escaped_tooltip = escape(tooltip_text).replace('\n', '&#10;')
+            parts.append(text[last_end:start])
+            parts.append(f'<span class="custom-tooltip" data-tooltip="{escaped_tooltip}">{term}</span>')
+            last_end = end
+            used_terms.append(term)
+        parts.append(text[last_end:])
+        return "".join(parts), used_terms
+
     def add_paragraph_with_tooltips(
-<<<<<<< HEAD
         self, 
         text: str, 
         terms_info: Dict[str, Dict[str, str]],
@@ -155,63 +298,22 @@ class DocumentBuilder:
             chapter_title: 現在の章のタイトル
             chapter_path: 現在の章のファイルパス (docs/からの相対)
         """
-        # 既存のMarkdownリンクを保護
-        link_pattern = r'\[([^\]]+)\]\([^)]+\)'
-        protected_links = []
-=======
-        self, text: str, terms_info: Dict[str, Dict[str, str]]
-    ):
-        """
-        専門用語にツールチップを付与した段落を追加
-        
-        Args:
-            text: 段落のテキスト
-            terms_info: 用語情報の辞書 {用語: {"tooltip_text": "ツールチップ内容"}}
-        """
-        # 既存のMarkdownリンクを保護するためのパターン
-        link_pattern = r'\[([^\]]+)\]\([^)]+\)'
-        protected_links = []
-        
-        # 既存のリンクを一時的に置換
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
-        def protect_link(match):
-            protected_links.append(match.group(0))
-            return f"__PROTECTED_LINK_{len(protected_links) - 1}__"
-        
-<<<<<<< HEAD
-        processed_text = re.sub(link_pattern, protect_link, text)
-
-        used_terms = set()
-        # 用語をツールチップ付きリンクに置換
-        for term, info in terms_info.items():
-            # テキスト内に実際に用語が存在するか確認
-            if term in processed_text:
-                tooltip_text = info.get("tooltip_text", "")
-                escaped_tooltip = escape(tooltip_text).replace('\n', '&#10;')
-                
-                replacement = f'<span class="custom-tooltip" data-tooltip="{escaped_tooltip}">{term}</span>'
-                # 最初に見つかったものだけを置換
-                processed_text, count = re.subn(re.escape(term), replacement, processed_text, count=1)
-                if count > 0:
-                    used_terms.add(term)
+        matcher = knowledge_mgr.get_term_matcher(terms_info.keys())
+        processed_text, used_terms = self._wrap_terms_with_tooltips(text, terms_info, matcher)
 
         # 用語が一つも使われていなければ、元のテキストをそのまま追加
         if not used_terms:
             self.add_raw_markdown(text)
             return
 
-        # 段落にユニークなIDを付与
-        first_term_slug = slugify(list(used_terms)[0])
-        text_hash = abs(hash(text)) % (10**8)
+        # 段落にユニークなIDを付与（ビルドごとに変わらないよう内容のハッシュを使用）
+        first_term_slug = slugify(used_terms[0])
+        text_hash = int(hashlib.sha1(text.encode('utf-8')).hexdigest(), 16) % (10**8)
         paragraph_id = f"usage-{first_term_slug}-{text_hash}"
 
         # 使用箇所を記録
         for term in used_terms:
             knowledge_mgr.record_term_usage(term, chapter_title, chapter_path, paragraph_id)
-
-        # 保護していたリンクを復元
-        for i, protected_link in enumerate(protected_links):
-            processed_text = processed_text.replace(f"__PROTECTED_LINK_{i}__", protected_link)
         
         # ID付きのdivでラップして追加
         final_html = f"""
@@ -220,31 +322,6 @@ class DocumentBuilder:
 </div>"""
         self.add_raw_markdown(final_html)
         self.add_raw_markdown("") # 末尾に改行を追加
-=======
-        text_with_protected_links = re.sub(link_pattern, protect_link, text)
-        
-        # 用語をツールチップ付きリンクに置換
-        for term, info in terms_info.items():
-            tooltip_text = info.get("tooltip_text", "")
-            # HTMLエスケープ
-            escaped_tooltip = escape(tooltip_text)
-            # 改行を&#10;に置換
-            escaped_tooltip = escaped_tooltip.replace('\n', '&#10;')
-
-            # 正確な用語の文字列をマッチさせ、初回のみ置換
-            pattern = re.escape(term)
-            replacement = f'<span class="custom-tooltip" data-tooltip="{escaped_tooltip}">{term}</span>'
-            text_with_protected_links = re.sub(
-                pattern, replacement, text_with_protected_links, count=1
-            )
-        
-        # 保護していたリンクを復元
-        for i, protected_link in enumerate(protected_links):
-            text_with_protected_links = text_with_protected_links.replace(
-                f"__PROTECTED_LINK_{i}__", protected_link
-            )
-        self.add_raw_markdown(text_with_protected_links)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
     def add_code_block(self, code: str, lang: str = "python"):
         """
@@ -313,7 +390,13 @@ class DocumentBuilder:
         self.content_buffer.append("")
 
     def add_html_component_reference(
-        self, component_path: Path, width: str = "100%", height: Optional[str] = "400px"
+        self,
+        component_path: Path,
+        width: str = "100%",
+        height: Optional[str] = "400px",
+        loading: Optional[str] = "lazy",
+        deferred: bool = False,
+        placeholder: Optional[Path] = None
     ):
         """
         HTML図表や表をiframeで埋め込む
@@ -322,22 +405,56 @@ class DocumentBuilder:
             component_path: HTMLファイルのパス
             width: 幅の指定
             height: 高さの指定 (Noneの場合、height属性は出力されない)
+            loading: iframeのloading属性（"lazy"/"eager"、Noneの場合は出力しない）
+            deferred: srcをdata-srcに置き、表示領域に入ったときにlazy_embed.jsで読み込むか
+            placeholder: deferred時に読み込みまで表示する静的サムネイル画像のパス
         """
         # Unixスタイルパスに変換
         path_str = component_path.as_posix()
         
         # heightがNoneでない場合にのみheight属性を追加
         height_attr = f'height="{height}"' if height is not None else ''
+        loading_attr = f'loading="{loading}" ' if loading else ''
+        src_attr = 'data-src' if deferred else 'src'
+        class_name = "auto-height-iframe deferred-iframe" if deferred else "auto-height-iframe"
         
         iframe_html = (
-            f'<iframe src="{path_str}" '
-            f'width="{width}" {height_attr} '
+            f'<iframe {src_attr}="{path_str}" '
+            f'width="{width}" {height_attr} {loading_attr}'
             f'style="border: 1px solid #ddd; border-radius: 4px;" '
-            f'scrolling="no" class="auto-height-iframe">'
+            f'scrolling="no" class="{class_name}">'
             f'</iframe>'
         )
+
+        if deferred and placeholder is not None:
+            # サムネイルを重ねて表示し、iframeの読み込み完了後にlazy_embed.jsが取り除く
+            iframe_html = (
+                f'<div class="deferred-embed">'
+                f'<img src="{placeholder.as_posix()}" alt="" class="deferred-embed-placeholder" '
+                f'loading="lazy" decoding="async">'
+                f'{iframe_html}'
+                f'</div>'
+            )
         self.content_buffer.append(iframe_html)
         self.content_buffer.append("")
+
+    def add_plotly_json_reference(self, json_path: Path, height: str = "450px"):
+        """
+        PlotlyのJSONペイロードを参照するプレースホルダーを追加
+        iframeを使わず、ページ共通のローダー（plotly_loader.js）が表示領域に入ったときに描画する
+
+        Args:
+            json_path: 図表JSONファイルのパス
+            height: 描画前に確保しておく高さ
+        """
+        # Unixスタイルパスに変換
+        path_str = escape(json_path.as_posix(), quote=True)
+
+        self.content_buffer.append(
+            f'<div class="plotly-lazy" data-plotly-src="{path_str}" '
+            f'style="min-height: {height}; width: 100%;"></div>'
+        )
+        self.content_buffer.append("")
         
     def add_admonition(
         self, type: str, title: str, content: str, collapsible: bool = False
@@ -365,13 +482,9 @@ class DocumentBuilder:
         self.content_buffer.append(tabbed_md)
         
     def add_horizontal_rule(self):
-<<<<<<< HEAD
         """
         水平線を追加
         """
-=======
-        """水平線を追加"""
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         self.content_buffer.append("---")
         self.content_buffer.append("")
         
@@ -435,7 +548,6 @@ class DocumentBuilder:
         html_content += f'<div class="single-choice-result"></div>'
         html_content += f'</div>'
         
-<<<<<<< HEAD
         html_content += '<script>'
         html_content += 'window.quizData = window.quizData || { quizzes: {} };'
         html_content += f'window.quizData.quizzes["{quiz_id}"] = {{'
@@ -450,22 +562,6 @@ class DocumentBuilder:
     def add_categorization_quiz(self, quiz_data: Dict[str, Any]):
         """
         カテゴリ分けクイズを追加
-=======
-        html_content += f'<script>'
-        html_content += f'window.singleChoiceData = window.singleChoiceData || {{}};'
-        html_content += f'window.singleChoiceData["{quiz_id}"] = {{'
-        html_content += f'"correct": {quiz_data.get("correct", 0)},'
-        html_content += f'"explanation": "{quiz_data.get("explanation", "")}"'
-        html_content += f'}};'
-        html_content += f'</script>'
-
-        self.content_buffer.append(html_content)
-        self.content_buffer.append("")
-
-    def add_categorization_quiz(self, quiz_data: Dict[str, Any]):
-        """
-        カテゴリ分けクイズを追加（ドラッグ&ドロップ）
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
         Args:
             quiz_data: クイズデータの辞書
@@ -473,7 +569,6 @@ class DocumentBuilder:
         quiz_id = quiz_data.get('quiz_id', quiz_data.get('id', 'categorization-quiz'))
         
         html_content = f'<div class="quiz-container categorization-quiz" data-quiz-id="{quiz_id}">'
-<<<<<<< HEAD
         html_content += f'<h3 class="quiz-title">クイズ</h3>'
         html_content += f'<p class="quiz-question"><strong>問題:</strong> {quiz_data["question"]}</p>'
         html_content += f'<div class="quiz-items">'
@@ -510,48 +605,6 @@ class DocumentBuilder:
     def add_multiple_choice_quiz(self, quiz_data: Dict[str, Any]):
         """
         複数選択クイズを追加
-=======
-        html_content += f'<h3 class="quiz-title">カテゴリ分けクイズ</h3>'
-        html_content += f'<p class="quiz-question"><strong>問題:</strong> {quiz_data["question"]}</p>'
-        
-        html_content += f'<div class="quiz-categories"><strong>カテゴリ:</strong><ul>'
-        for category in quiz_data['categories']:
-            html_content += f'<li>{category}</li>'
-        html_content += f'</ul></div>'
-        
-        html_content += f'<div class="quiz-items">'
-        html_content += f'<h4>項目をドラッグして適切なカテゴリに分類してください：</h4>'
-        html_content += f'<div class="draggable-items">'
-        
-        for i, item in enumerate(quiz_data['items']):
-            html_content += f'<div class="draggable-item" id="draggable-item-{quiz_id}-{i}" data-item="{i}" draggable="true">{item}</div>'
-        
-        html_content += f'</div></div>'
-        html_content += f'<div class="drop-zones">'
-        
-        for i, category in enumerate(quiz_data['categories']):
-            html_content += f'<div class="drop-zone">'
-            html_content += f'<h4>{category}</h4>'
-            html_content += f'<div class="drop-area" data-category="{i}">ここにドロップしてください</div>'
-            html_content += f'</div>'
-        
-        html_content += f'</div>'
-        html_content += f'<button class="check-categorization" onclick="checkCategorization(\'{quiz_id}\')">答えを確認</button>'
-        html_content += f'<div class="categorization-result"></div>'
-        html_content += f'</div>'
-        
-        html_content += f'<script>'
-        html_content += f'window.categorizationData = window.categorizationData || {{}};'
-        html_content += f'window.categorizationData["{quiz_id}"] = {quiz_data.get("correct_answers", quiz_data.get("correct_mapping", []))};'
-        html_content += f'</script>'
-        
-        self.content_buffer.append(html_content)
-        self.content_buffer.append("")
-
-    def add_multiple_choice_quiz(self, quiz_data: Dict[str, Any]):
-        """
-        複数選択クイズを追加（複数の正解を選択）
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
         Args:
             quiz_data: クイズデータの辞書
@@ -559,21 +612,14 @@ class DocumentBuilder:
         quiz_id = quiz_data.get('quiz_id', quiz_data.get('id', 'multiple-choice-quiz'))
         
         html_content = f'<div class="quiz-container multiple-choice-quiz" data-quiz-id="{quiz_id}">'
-<<<<<<< HEAD
         html_content += f'<h3 class="quiz-title">クイズ</h3>'
         html_content += f'<p class="quiz-question"><strong>問題:</strong> {quiz_data["question"]}</p>'
-=======
-        html_content += f'<h3 class="quiz-title">複数選択クイズ</h3>'
-        html_content += f'<p class="quiz-question"><strong>問題:</strong> {quiz_data["question"]}</p>'
-        html_content += f'<p class="quiz-instruction"><strong>複数の選択肢から正解を全て選んでください</strong></p>'
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         html_content += f'<div class="quiz-options">'
         
         for i, option in enumerate(quiz_data['options']):
             html_content += f'<label class="option-label"><input type="checkbox" name="{quiz_id}" value="{i}"><span class="option-text">{option}</span></label><br>'
         
         html_content += f'</div>'
-<<<<<<< HEAD
         html_content += f'<button class="check-multiple-choice" onclick="checkMultipleChoice(\'{quiz_id}\')">回答をチェック</button>'
         html_content += f'<div class="multiple-choice-result"></div>'
         html_content += f'</div>'
@@ -650,61 +696,6 @@ class DocumentBuilder:
     def add_faq_item(self, question: str, answer: str, collapsible: bool = False):
         """
         FAQ項目をAdmonitionとして追加
-=======
-        html_content += f'<button class="check-multiple-choice" onclick="checkMultipleChoice(\'{quiz_id}\')">答えを確認</button>'
-        html_content += f'<div class="multiple-choice-result"></div>'
-        html_content += f'</div>'
-        
-        html_content += f'<script>'
-        html_content += f'window.multipleChoiceData = window.multipleChoiceData || {{}};'
-        html_content += f'window.multipleChoiceData["{quiz_id}"] = {{'
-        html_content += f'"correct": {quiz_data.get("correct_answers", quiz_data.get("correct_indices", []))},'
-        html_content += f'"explanation": "{quiz_data.get("explanation", "")}"'
-        html_content += f'}};'
-        html_content += f'</script>'
-        
-        self.content_buffer.append(html_content)
-        self.content_buffer.append("")
-        
-    def add_exercise_question(self, exercise_data: Dict[str, Any]):
-        """
-        演習問題を統一フォーマットで追加
-        
-        Args:
-            exercise_data: 演習問題データの辞書
-        """
-        difficulty_map = {
-            'easy': ('tip', '初級'),
-            'medium': ('question', '中級'),
-            'hard': ('warning', '上級')
-        }
-        
-        difficulty = exercise_data.get('difficulty', 'medium')
-        adm_type, difficulty_label = difficulty_map.get(difficulty, ('question', '中級'))
-        
-        lines = []
-        lines.append(f"!!! {adm_type} \"演習問題（{difficulty_label}）\"")
-        lines.append(f"    **問題**: {exercise_data.get('question', '')}")
-        lines.append("")
-        
-        # 解答（折りたたみ式）
-        if 'answer' in exercise_data:
-            lines.append("    ??? success \"解答\"")
-            lines.append(f"        **解答**: {exercise_data.get('answer', '')}")
-            lines.append("")
-        
-        # 解説（折りたたみ式）
-        if 'explanation' in exercise_data:
-            lines.append("    ??? info \"解説\"")
-            lines.append(f"        **解説**: {exercise_data.get('explanation', '')}")
-        
-        self.content_buffer.extend(lines)
-        self.content_buffer.append("")
-        
-    def add_faq_item(self, question: str, answer: str, collapsible: bool = True):
-        """
-        FAQ項目を追加
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
         Args:
             question: 質問
@@ -712,7 +703,6 @@ class DocumentBuilder:
             collapsible: 折りたたみ可能にするか
         """
         self.add_admonition("question", question, answer, collapsible)
-<<<<<<< HEAD
 
     def add_tip_item(self, title: str, content: str, collapsible: bool = False):
         """
@@ -754,28 +744,99 @@ class DocumentBuilder:
                            collapsible=True)
     
     def add_learning_tracker(self, content_id: str, content_type: str = "page", 
-                           user_id: str = "anonymous") -> None:
+                           user_id: str = "anonymous", endpoint: Optional[str] = None) -> None:
         """
         学習行動追跡のJavaScriptコードを追加
+        イベントはメモリ上に溜めてアイドル時・ページ非表示時にまとめて送信し、
+        送信できなかったバッチはlocalStorageのリングバッファに上限付きで保存する
         
         Args:
             content_id: コンテンツID (章IDなど)
             content_type: コンテンツの種類
             user_id: ユーザーID
+            endpoint: イベントの送信先URL（IngestionServerの/events。Noneの場合はlocalStorageにのみ保存）
         """
         tracking_script = f'''
 <script>
 // 学習行動追跡スクリプト
 (function() {{
-    const contentId = '{content_id}';
-    const contentType = '{content_type}';
-    const userId = localStorage.getItem('learning_user_id') || '{user_id}';
+    const contentId = {self._escape_js_string(content_id)};
+    const contentType = {self._escape_js_string(content_type)};
+    const endpoint = {self._escape_js_string(endpoint) if endpoint else 'null'};
+    const userId = localStorage.getItem('learning_user_id') || {self._escape_js_string(user_id)};
     
     // ユーザーIDをlocalStorageに保存
     if (!localStorage.getItem('learning_user_id')) {{
         localStorage.setItem('learning_user_id', userId);
     }}
     
+    // 送信待ちのイベント（メモリ上のバッファ）
+    const BATCH_SIZE = 50;
+    const IDLE_TIMEOUT_MS = 2000;
+    // 未送信バッチを保存するリングバッファ（最大 RING_SLOTS * BATCH_SIZE 件）
+    const RING_SLOTS = 10;
+    const RING_KEY = 'learning_events_ring';
+    let pending = [];
+    let flushScheduled = false;
+    
+    const scheduleIdle = window.requestIdleCallback
+        ? function(callback) {{ window.requestIdleCallback(callback, {{ timeout: IDLE_TIMEOUT_MS }}); }}
+        : function(callback) {{ setTimeout(callback, IDLE_TIMEOUT_MS); }};
+    
+    // バッチをリングバッファの次のスロットに保存（古いバッチから上書き）
+    function storeBatch(batch) {{
+        try {{
+            const head = (parseInt(localStorage.getItem(RING_KEY + ':head') || '0', 10) + 1) % RING_SLOTS;
+            localStorage.setItem(RING_KEY + ':' + head, JSON.stringify(batch));
+            localStorage.setItem(RING_KEY + ':head', String(head));
+        }} catch (e) {{
+            // ストレージが満杯・無効な場合は破棄する
+        }}
+    }}
+    
+    function sendBatch(batch) {{
+        if (!endpoint || !navigator.sendBeacon) {{
+            return false;
+        }}
+        return navigator.sendBeacon(endpoint, JSON.stringify({{ events: batch }}));
+    }}
+    
+    // バッファのイベントをまとめて送信（送信できない場合は保存）
+    function flush() {{
+        flushScheduled = false;
+        while (pending.length > 0) {{
+            const batch = pending.splice(0, BATCH_SIZE);
+            if (!sendBatch(batch)) {{
+                storeBatch(batch);
+            }}
+        }}
+    }}
+    
+    // 前回までに送信できなかったバッチを再送
+    function resendStoredBatches() {{
+        if (!endpoint) {{
+            return;
+        }}
+        for (let slot = 0; slot < RING_SLOTS; slot++) {{
+            const key = RING_KEY + ':' + slot;
+            const stored = localStorage.getItem(key);
+            if (stored && sendBatch(JSON.parse(stored))) {{
+                localStorage.removeItem(key);
+            }}
+        }}
+    }}
+    
+    // 学習イベントをバッファに追加する関数
+    function logLearningEvent(event) {{
+        pending.push(event);
+        if (pending.length >= BATCH_SIZE) {{
+            flush();
+        }} else if (!flushScheduled) {{
+            flushScheduled = true;
+            scheduleIdle(flush);
+        }}
+    }}
+    
     // ページ表示イベントを記録
     window.addEventListener('load', function() {{
         logLearningEvent({{
@@ -792,56 +853,36 @@ class DocumentBuilder:
                 }}
             }}
         }});
+        scheduleIdle(resendStoredBatches);
     }});
     
-    // 滞在時間を追跡
+    // 滞在時間を追跡（ページが表示されている間のみ計測）
     let startTime = Date.now();
-    let isActive = true;
     
-    // ページがアクティブか非アクティブかを追跡
+    function recordTimeSpent() {{
+        const duration = (Date.now() - startTime) / 1000 / 60; // 分単位
+        logLearningEvent({{
+            user_id: userId,
+            event_type: 'time_spent',
+            content_id: contentId,
+            timestamp: new Date().toISOString(),
+            metadata: {{
+                duration_minutes: duration,
+                content_type: contentType
+            }}
+        }});
+    }}
+    
+    // ページが非表示になったら滞在時間を記録して即座に送信（離脱時もsendBeaconで届く）
     document.addEventListener('visibilitychange', function() {{
-        if (document.hidden) {{
-            isActive = false;
+        if (document.visibilityState === 'hidden') {{
+            recordTimeSpent();
+            flush();
         }} else {{
-            isActive = true;
             startTime = Date.now(); // タイマーをリセット
         }}
     }});
     
-    // ページ離脱時に滞在時間を記録
-    window.addEventListener('beforeunload', function() {{
-        if (isActive) {{
-            const duration = (Date.now() - startTime) / 1000 / 60; // 分単位
-            logLearningEvent({{
-                user_id: userId,
-                event_type: 'time_spent',
-                content_id: contentId,
-                timestamp: new Date().toISOString(),
-                metadata: {{
-                    duration_minutes: duration,
-                    content_type: contentType
-                }}
-            }});
-        }}
-    }});
-    
-    // 学習イベントをログに記録する関数
-    function logLearningEvent(event) {{
-        // localStorageにイベントを保存 (簡略実装)
-        const events = JSON.parse(localStorage.getItem('learning_events') || '[]');
-        events.push(event);
-        
-        // 最大500件まで保存
-        if (events.length > 500) {{
-            events.shift(); // 古いイベントを削除
-        }}
-        
-        localStorage.setItem('learning_events', JSON.stringify(events));
-        
-        // コンソールにログ出力 (開発用)
-        console.log('学習イベント:', event);
-    }}
-    
     // グローバル関数として公開 (クイズなどから使用するため)
     window.logLearningEvent = logLearningEvent;
 }})();
@@ -988,91 +1029,3 @@ class DocumentBuilder:
 </details>
             '''
             self.content_buffer.append(help_html)
-=======
-        
-    def add_tip_item(self, title: str, content: str, collapsible: bool = True):
-        """
-        TIPS項目を追加
-        
-        Args:
-            title: タイトル
-            content: 内容
-            collapsible: 折りたたみ可能にするか
-        """
-        self.add_admonition("tip", title, content, collapsible)
-        
-    def add_code_block_with_static_output(
-        self, code: str, output: str, lang: str = "python", output_label: str = "実行結果"
-    ):
-        """
-        コードブロックと静的な実行結果を追加
-        
-        Args:
-            code: コード
-            output: 実行結果
-            lang: 言語
-            output_label: 出力ラベル
-        """
-        self.add_code_block(code, lang)
-        self.add_admonition("success", output_label, f"```\n{output}\n```", False)
-        
-    def add_summary_section(self, title: str, points: List[str]):
-        """
-        学習の要点（サマリー）セクションを追加
-        
-        Args:
-            title: セクションタイトル
-            points: 要点のリスト
-        """
-        content = "\n".join(f"- {point}" for point in points)
-        self.add_admonition("note", title, content, False)
-        
-    def add_recommendation_section(self, title: str, items: List[Dict[str, str]]):
-        """
-        関連資料や次のステップのレコメンデーションを追加
-        
-        Args:
-            title: セクションタイトル
-            items: レコメンデーション項目のリスト [{"text": "表示テキスト", "link": "URL"}]
-        """
-        lines = []
-        for item in items:
-            text = item.get("text", "")
-            link = item.get("link", "")
-            if link:
-                lines.append(f"- [{text}]({link})")
-            else:
-                lines.append(f"- {text}")
-        
-        content = "\n".join(lines)
-        self.add_admonition("info", title, content, False)
-        
-    def add_mermaid_block(self, graph_string: str, title: Optional[str] = None):
-        """
-        Mermaid図表ブロックを追加
-        
-        Args:
-            graph_string: Mermaid構文の図表定義
-            title: 図表のタイトル（オプション）
-        """
-        if title:
-            self.add_paragraph(f"**{title}**")
-        
-        # Mermaidブロックを追加
-        self.content_buffer.append("```mermaid")
-        self.content_buffer.append(graph_string)
-        self.content_buffer.append("```")
-        self.content_buffer.append("")
-
-    def add_feedback_form(self, form_url: str, title: str = "フィードバックのお願い", description: str = "この学習資料をより良くするために、皆様のご意見をお聞かせください。"):
-        """
-        外部のフィードバックフォームへのリンクを含むセクションを追加する。
-
-        Args:
-            form_url: 埋め込むフォームのURL（Google Formsなど）。
-            title: セクションのタイトル。
-            description: フォームの説明文。
-        """
-        content = f'{description}\n\n<a href="{form_url}" target="_blank" rel="noopener noreferrer" class="md-button md-button--primary">フィードバックを送信する</a>'
-        self.add_admonition("question", title, content, False)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
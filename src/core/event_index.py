@@ -0,0 +1,191 @@
+"""
+学習イベントのユーザー別索引
+ユーザーIDからイベントのセグメント内位置を引けるようにSQLiteに記録し、
+1ユーザー分のイベントだけを読み込めるようにする
+"""
+
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Iterable, List, Tuple, Dict, Any
+
+from .event_store import EventStore, SEGMENT_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# 索引ファイル名
+INDEX_FILENAME = "user_event_index.sqlite3"
+
+
+class UserEventIndex:
+    """ユーザーID -> (セグメント, オフセット, 長さ) の索引"""
+
+    def __init__(self, db_path: Path):
+        """
+        初期化（索引のテーブルがなければ作成）
+
+        Args:
+            db_path: SQLiteデータベースのパス
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 受信サーバーなど別スレッドからの記録にも対応し、操作はロックで直列化する
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS event_positions (
+                    user_id TEXT NOT NULL,
+                    event_date TEXT NOT NULL,
+                    segment TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_event_positions_user "
+                "ON event_positions (user_id, event_date, segment, offset)"
+            )
+            # セグメントごとに索引済みのバイト数（索引と追記のずれを検出する）
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS indexed_segments (
+                    segment TEXT PRIMARY KEY,
+                    indexed_bytes INTEGER NOT NULL
+                )
+                """
+            )
+
+    def add(self, positions: Iterable[Tuple[Dict[str, Any], str, int, int]]):
+        """
+        EventStore.append()が返した位置情報を索引に追加
+
+        Args:
+            positions: (イベント, セグメント名, オフセット, 長さ) のイテラブル
+        """
+        rows = []
+        segment_ends: Dict[str, int] = {}
+        for record, segment_name, offset, length in positions:
+            rows.append((record['user_id'], str(record['timestamp'])[:10], segment_name, offset, length))
+            segment_ends[segment_name] = max(segment_ends.get(segment_name, 0), offset + length)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO event_positions (user_id, event_date, segment, offset, length) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.executemany(
+                "INSERT INTO indexed_segments (segment, indexed_bytes) VALUES (?, ?) "
+                "ON CONFLICT(segment) DO UPDATE SET "
+                "indexed_bytes = MAX(indexed_bytes, excluded.indexed_bytes)",
+                segment_ends.items()
+            )
+
+    def lookup(self, user_id: str, start_date: str, end_date: str) -> List[Tuple[str, int, int]]:
+        """
+        ユーザーのイベントの位置を取得
+
+        Args:
+            user_id: ユーザーID
+            start_date: 対象期間の開始日（YYYY-MM-DD、この日を含む）
+            end_date: 対象期間の終了日（YYYY-MM-DD、この日を含む）
+
+        Returns:
+            (セグメント名, オフセット, 長さ) のリスト（書き込み順）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT segment, offset, length FROM event_positions "
+                "WHERE user_id = ? AND event_date BETWEEN ? AND ? "
+                "ORDER BY event_date, segment, offset",
+                (user_id, start_date, end_date)
+            )
+            return cursor.fetchall()
+
+    def list_users(self, start_date: str, end_date: str) -> List[str]:
+        """
+        期間内にイベントのあるユーザーの一覧を取得
+
+        Args:
+            start_date: 対象期間の開始日（YYYY-MM-DD、この日を含む）
+            end_date: 対象期間の終了日（YYYY-MM-DD、この日を含む）
+
+        Returns:
+            ユーザーIDの昇順リスト
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT DISTINCT user_id FROM event_positions "
+                "WHERE event_date BETWEEN ? AND ? ORDER BY user_id",
+                (start_date, end_date)
+            )
+            return [user_id for (user_id,) in cursor]
+
+    def sync(self, event_store: EventStore) -> int:
+        """
+        索引に未登録の記録（索引の更新前にプロセスが終了した場合など）をセグメントから補う
+
+        Args:
+            event_store: 索引対象のイベントストア
+
+        Returns:
+            追加した記録数
+        """
+        with self._lock:
+            indexed = dict(self._conn.execute("SELECT segment, indexed_bytes FROM indexed_segments"))
+        added = 0
+        for segment_path in event_store.list_segments():
+            indexed_bytes = indexed.get(segment_path.name, 0)
+            if segment_path.stat().st_size <= indexed_bytes:
+                continue
+            positions = [
+                (record, segment_path.name, offset, length)
+                for offset, length, record in event_store.scan_segment(segment_path, indexed_bytes)
+            ]
+            self.add(positions)
+            added += len(positions)
+
+        if added:
+            logger.info(f"ユーザー別イベント索引に{added}件の未登録の記録を追加しました")
+        return added
+
+    def prune(self, existing_segments: Iterable[str]) -> int:
+        """
+        削除されたセグメントの記録を索引から除く
+
+        Args:
+            existing_segments: 現存するセグメント名
+
+        Returns:
+            除いたセグメント数
+        """
+        existing = set(existing_segments)
+        with self._lock:
+            removed = [
+                segment for (segment,) in self._conn.execute("SELECT segment FROM indexed_segments")
+                if segment not in existing and SEGMENT_PATTERN.match(segment)
+            ]
+        self.forget(removed)
+        return len(removed)
+
+    def forget(self, segments: Iterable[str]):
+        """
+        セグメントの記録を索引から除く（書き直したセグメントはsync()で索引し直す）
+
+        Args:
+            segments: セグメント名
+        """
+        rows = [(segment,) for segment in segments]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM event_positions WHERE segment = ?", rows)
+            self._conn.executemany("DELETE FROM indexed_segments WHERE segment = ?", rows)
+
+    def close(self):
+        """データベース接続を閉じる"""
+        self._conn.close()
@@ -0,0 +1,408 @@
+"""
+学習イベントの追記専用ストア
+日付ごとのJSON Linesセグメントにイベントを追記し、サイズ超過時に次のセグメントへ切り替える
+書き込み途中でプロセスが終了した場合は、次回の書き込み時に末尾の不完全な行を切り詰めて復旧する
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from pathlib import Path
+from collections import defaultdict
+from typing import Callable, Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# セグメントファイル名のパターン（events_YYYY-MM-DD.NNNN.jsonl）
+SEGMENT_PATTERN = re.compile(r'^events_(\d{4}-\d{2}-\d{2})\.(\d{4})\.jsonl$')
+
+# 追記ストア導入前の日次ファイル（JSON配列）のファイル名
+LEGACY_FILENAME = "events_{date}.json"
+
+# fsyncポリシー
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# 末尾の不完全な行を探す際の読み込み単位（バイト）
+RECOVERY_BLOCK_SIZE = 64 * 1024
+
+
+class EventStore:
+    """日付別・サイズ別のセグメントに分割されたJSON Linesのイベントストア"""
+
+    def __init__(
+        self,
+        store_dir: Path,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        fsync_policy: str = "always",
+        fsync_interval: float = 1.0
+    ):
+        """
+        初期化
+
+        Args:
+            store_dir: セグメントの保存ディレクトリ
+            segment_max_bytes: 1セグメントの上限サイズ（バイト）。超える場合は次のセグメントに切り替える
+            fsync_policy: 追記後にfsyncするタイミング
+                （"always": 毎回 / "interval": fsync_interval秒ごと / "never": OSに任せる）
+            fsync_interval: fsync_policyが"interval"の場合のfsync間隔（秒）
+
+        Raises:
+            ValueError: 未対応のfsyncポリシーが指定された場合
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(
+                f"未対応のfsyncポリシーです: {fsync_policy}（{', '.join(FSYNC_POLICIES)}のいずれかを指定してください）"
+            )
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+
+        # 日付 -> (追記中のセグメント番号, そのサイズ)
+        self._active_segments: Dict[str, Tuple[int, int]] = {}
+        self._last_fsync = 0.0
+
+    @staticmethod
+    def segment_name(date_str: str, sequence: int) -> str:
+        """
+        セグメントのファイル名を生成
+
+        Args:
+            date_str: 日付（YYYY-MM-DD）
+            sequence: 日付内のセグメント番号
+
+        Returns:
+            ファイル名
+        """
+        return f"events_{date_str}.{sequence:04d}.jsonl"
+
+    def list_segments(self, date_str: Optional[str] = None) -> List[Path]:
+        """
+        セグメントファイルの一覧を書き込み順に取得
+
+        Args:
+            date_str: 対象の日付（Noneの場合は全日付）
+
+        Returns:
+            セグメントのパスのリスト
+        """
+        pattern = f"events_{date_str}.*.jsonl" if date_str else "events_*.jsonl"
+        segments = [
+            path for path in self.store_dir.glob(pattern)
+            if SEGMENT_PATTERN.match(path.name)
+        ]
+        return sorted(segments, key=lambda path: path.name)
+
+    def list_dates(self) -> List[str]:
+        """
+        イベントが保存されている日付の一覧を取得（従来の日次ファイルを含む）
+
+        Returns:
+            日付（YYYY-MM-DD）の昇順リスト
+        """
+        dates = {SEGMENT_PATTERN.match(path.name).group(1) for path in self.list_segments()}
+        dates.update(self.list_legacy_dates())
+        return sorted(dates)
+
+    def list_legacy_dates(self) -> List[str]:
+        """
+        追記ストア導入前の日次ファイルがある日付の一覧を取得
+
+        Returns:
+            日付（YYYY-MM-DD）の昇順リスト
+        """
+        dates = []
+        for legacy_path in self.store_dir.glob("events_*.json"):
+            date_str = legacy_path.stem[len("events_"):]
+            if re.fullmatch(r'\d{4}-\d{2}-\d{2}', date_str):
+                dates.append(date_str)
+        return sorted(dates)
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str, int, int]]:
+        """
+        イベントを追記（タイムスタンプの日付ごとのセグメントに振り分ける）
+
+        Args:
+            records: イベントの辞書（ISO形式の'timestamp'を含む）
+
+        Returns:
+            (イベント, セグメント名, オフセット, 長さ) のリスト（入力順）
+        """
+        records_by_date: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            records_by_date[str(record['timestamp'])[:10]].append(record)
+
+        positions = []
+        for date_str, date_records in records_by_date.items():
+            positions.extend(self._append_to_date(date_str, date_records))
+        return positions
+
+    def _append_to_date(
+        self, date_str: str, records: List[Dict[str, Any]]
+    ) -> List[Tuple[Dict[str, Any], str, int, int]]:
+        """指定された日付のセグメントにイベントを追記"""
+        sequence, size = self._get_active_segment(date_str)
+        positions = []
+        pending: List[bytes] = []
+
+        try:
+            for record in records:
+                line = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                # 上限を超える場合は書き込み待ちを確定して次のセグメントへ
+                if size + len(line) > self.segment_max_bytes and size > 0:
+                    self._write_segment(date_str, sequence, pending)
+                    sequence, size, pending = sequence + 1, 0, []
+                    logger.debug(f"イベントセグメントを切り替えました: {self.segment_name(date_str, sequence)}")
+                positions.append((record, self.segment_name(date_str, sequence), size, len(line)))
+                pending.append(line)
+                size += len(line)
+
+            self._write_segment(date_str, sequence, pending)
+        except OSError:
+            # 書き込み位置が不確かになるため、次回の追記時に復旧処理からやり直す
+            self._active_segments.pop(date_str, None)
+            raise
+
+        self._active_segments[date_str] = (sequence, size)
+        return positions
+
+    def _write_segment(self, date_str: str, sequence: int, chunks: List[bytes]):
+        """セグメントにまとめて追記し、ポリシーに従ってfsyncする"""
+        if not chunks:
+            return
+        segment_path = self.store_dir / self.segment_name(date_str, sequence)
+        with open(segment_path, 'ab') as f:
+            f.write(b''.join(chunks))
+            f.flush()
+            if self._should_fsync():
+                os.fsync(f.fileno())
+                self._last_fsync = time.monotonic()
+
+    def _should_fsync(self) -> bool:
+        """fsyncするかをポリシーから判定"""
+        if self.fsync_policy == "always":
+            return True
+        if self.fsync_policy == "interval":
+            return time.monotonic() - self._last_fsync >= self.fsync_interval
+        return False
+
+    def _get_active_segment(self, date_str: str) -> Tuple[int, int]:
+        """追記先のセグメント番号とサイズを取得（初回は既存セグメントを復旧する）"""
+        active = self._active_segments.get(date_str)
+        if active is not None:
+            return active
+
+        segments = self.list_segments(date_str)
+        if not segments:
+            active = (0, 0)
+        else:
+            last_segment = segments[-1]
+            sequence = int(SEGMENT_PATTERN.match(last_segment.name).group(2))
+            active = (sequence, self._recover_segment(last_segment))
+        self._active_segments[date_str] = active
+        return active
+
+    def _recover_segment(self, segment_path: Path) -> int:
+        """
+        セグメント末尾の不完全な行（書き込み中断の痕跡）を切り詰める
+
+        Args:
+            segment_path: セグメントのパス
+
+        Returns:
+            復旧後のファイルサイズ
+        """
+        size = segment_path.stat().st_size
+        with open(segment_path, 'rb+') as f:
+            end = size
+            while end > 0:
+                start = max(0, end - RECOVERY_BLOCK_SIZE)
+                f.seek(start)
+                block = f.read(end - start)
+                newline = block.rfind(b'\n')
+                if newline >= 0:
+                    valid_size = start + newline + 1
+                    break
+                end = start
+            else:
+                valid_size = 0
+
+            if valid_size < size:
+                f.truncate(valid_size)
+                logger.warning(
+                    f"イベントセグメント末尾の不完全な記録を切り詰めました: {segment_path.name} "
+                    f"({size - valid_size}バイト)"
+                )
+        return valid_size
+
+    def read_date(self, date_str: str) -> Iterator[Dict[str, Any]]:
+        """
+        指定された日付のイベントを書き込み順に読み込む
+        追記ストア導入前の日次ファイル（JSON配列）があればその内容を先に返す
+
+        Args:
+            date_str: 日付（YYYY-MM-DD）
+
+        Yields:
+            イベントの辞書
+        """
+        yield from self.read_legacy_date(date_str)
+        for segment_path in self.list_segments(date_str):
+            yield from self.read_segment(segment_path)
+
+    def read_legacy_date(self, date_str: str) -> Iterator[Dict[str, Any]]:
+        """
+        追記ストア導入前の日次ファイル（JSON配列）のイベントを読み込む
+
+        Args:
+            date_str: 日付（YYYY-MM-DD）
+
+        Yields:
+            イベントの辞書
+        """
+        legacy_path = self.store_dir / LEGACY_FILENAME.format(date=date_str)
+        if legacy_path.exists():
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    yield from json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"イベントファイル {legacy_path} の読み込みに失敗: {e}")
+
+    def read_segment(self, segment_path: Path) -> Iterator[Dict[str, Any]]:
+        """
+        セグメントのイベントを読み込む（破損した行は読み飛ばす）
+
+        Args:
+            segment_path: セグメントのパス
+
+        Yields:
+            イベントの辞書
+        """
+        for _, _, record in self.scan_segment(segment_path):
+            yield record
+
+    def scan_segment(
+        self, segment_path: Path, start_offset: int = 0
+    ) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+        """
+        セグメントのイベントを位置情報付きで読み込む（破損した行は読み飛ばす）
+
+        Args:
+            segment_path: セグメントのパス
+            start_offset: 読み込みを開始する位置（行の先頭であること）
+
+        Yields:
+            (オフセット, 長さ, イベントの辞書)
+        """
+        with open(segment_path, 'rb') as f:
+            f.seek(start_offset)
+            offset = start_offset
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # 書き込み中の行は確定していないため読まない
+                    break
+                try:
+                    yield offset, len(line), json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"破損したイベントを読み飛ばしました: {segment_path.name} (位置 {offset})")
+                offset += len(line)
+
+    def read_at(self, segment_name: str, offset: int, length: int) -> Dict[str, Any]:
+        """
+        セグメント内の位置を指定してイベントを1件読み込む
+
+        Args:
+            segment_name: セグメントのファイル名
+            offset: 記録の開始位置（バイト）
+            length: 記録の長さ（改行を含むバイト数）
+
+        Returns:
+            イベントの辞書
+        """
+        with open(self.store_dir / segment_name, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def read_many(self, positions: Iterable[Tuple[str, int, int]]) -> Iterator[Dict[str, Any]]:
+        """
+        位置を指定して複数のイベントを読み込む（セグメントごとに一度だけ開く）
+
+        Args:
+            positions: (セグメント名, オフセット, 長さ) のイテラブル（セグメント内はオフセット順）
+
+        Yields:
+            イベントの辞書（指定順）
+        """
+        current_name = None
+        f = None
+        try:
+            for segment_name, offset, length in positions:
+                if segment_name != current_name:
+                    if f is not None:
+                        f.close()
+                    f = open(self.store_dir / segment_name, 'rb')
+                    current_name = segment_name
+                f.seek(offset)
+                yield json.loads(f.read(length))
+        finally:
+            if f is not None:
+                f.close()
+
+    def rewrite_segment(self, segment_name: str, keep: Callable[[Dict[str, Any]], bool]) -> Tuple[int, int]:
+        """
+        条件を満たすイベントだけを残してセグメントを書き直す（一時ファイルに書いてから置き換える）
+        呼び出し側は同じセグメントへの追記と同時に実行しないこと
+
+        Args:
+            segment_name: セグメントのファイル名
+            keep: 残すイベントならTrueを返す関数
+
+        Returns:
+            (書き直し後のサイズ, 除いたイベント数)
+        """
+        segment_path = self.store_dir / segment_name
+        tmp_path = segment_path.with_name(f".{segment_name}.tmp{os.getpid()}")
+        new_size, removed = 0, 0
+        try:
+            with open(segment_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for line in src:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        kept = keep(json.loads(line))
+                    except json.JSONDecodeError:
+                        kept = False
+                    if kept:
+                        dst.write(line)
+                        new_size += len(line)
+                    else:
+                        removed += 1
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, segment_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        # 追記位置はファイルから取り直す
+        self._active_segments.pop(SEGMENT_PATTERN.match(segment_name).group(1), None)
+        return new_size, removed
+
+    def delete_segment(self, segment_name: str) -> int:
+        """
+        セグメントを削除
+
+        Args:
+            segment_name: セグメントのファイル名
+
+        Returns:
+            削除したバイト数
+        """
+        segment_path = self.store_dir / segment_name
+        size = segment_path.stat().st_size
+        segment_path.unlink()
+        self._active_segments.pop(SEGMENT_PATTERN.match(segment_name).group(1), None)
+        return size
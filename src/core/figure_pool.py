@@ -0,0 +1,196 @@
+"""
+Matplotlib Figureの再利用プール
+pyplotを介さずにFigureとFigureCanvasAggを生成し、描画後はクリアしてサイズ・解像度ごとに再利用する
+"""
+
+import threading
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+logger = logging.getLogger(__name__)
+
+# サイズ・解像度ごとに保持する未使用のFigureの上限
+DEFAULT_MAX_IDLE_PER_KEY = 4
+
+FigureKey = Tuple[Tuple[float, float], float]
+
+
+class FigurePool:
+    """(figsize, dpi) をキーにFigureを貸し出し・回収するプール"""
+
+    def __init__(self, max_idle_per_key: int = DEFAULT_MAX_IDLE_PER_KEY):
+        """
+        初期化
+
+        Args:
+            max_idle_per_key: サイズ・解像度ごとに保持する未使用のFigureの上限
+
+        Raises:
+            ValueError: 上限が0未満の場合
+        """
+        if max_idle_per_key < 0:
+            raise ValueError(f"未使用のFigureの上限は0以上を指定してください: {max_idle_per_key}")
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: Dict[FigureKey, List[Figure]] = defaultdict(list)
+        # 貸し出し中のFigure（id -> (キー, Figure)）
+        self._in_use: Dict[int, Tuple[FigureKey, Figure]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    @staticmethod
+    def _make_key(figsize: Tuple[float, float], dpi: Optional[float]) -> FigureKey:
+        """プールのキーを生成（dpi省略時はrcParamsの既定値）"""
+        dpi = dpi if dpi is not None else matplotlib.rcParams['figure.dpi']
+        return (float(figsize[0]), float(figsize[1])), float(dpi)
+
+    def acquire(self, figsize: Tuple[float, float], dpi: Optional[float] = None) -> Figure:
+        """
+        Figureを借りる（未使用のものがあれば再利用し、なければ生成する）
+
+        Args:
+            figsize: 図のサイズ（インチ）
+            dpi: 解像度（Noneの場合はrcParamsの既定値）
+
+        Returns:
+            Aggキャンバスを持つ空のFigure
+        """
+        key = self._make_key(figsize, dpi)
+        with self._lock:
+            idle = self._idle.get(key)
+            fig = idle.pop() if idle else None
+            self._stats["reused" if fig is not None else "created"] += 1
+
+        if fig is None:
+            fig = Figure(figsize=key[0], dpi=key[1])
+            FigureCanvasAgg(fig)
+        with self._lock:
+            self._in_use[id(fig)] = (key, fig)
+        return fig
+
+    def subplots(
+        self, figsize: Tuple[float, float], dpi: Optional[float] = None, **subplot_kwargs: Any
+    ) -> Tuple[Figure, Any]:
+        """
+        plt.subplots()と同様にFigureとAxesを用意（Figureはプールから借りる）
+
+        Args:
+            figsize: 図のサイズ（インチ）
+            dpi: 解像度（Noneの場合はrcParamsの既定値）
+            **subplot_kwargs: Figure.subplots()に渡す引数
+
+        Returns:
+            (Figure, Axesまたはその配列)
+        """
+        fig = self.acquire(figsize, dpi)
+        return fig, fig.subplots(**subplot_kwargs)
+
+    def owns(self, fig: Figure) -> bool:
+        """このプールから貸し出し中のFigureか"""
+        with self._lock:
+            return id(fig) in self._in_use
+
+    def release(self, fig: Figure) -> bool:
+        """
+        Figureを返却（内容をクリアし、サイズ・色を借りた時の状態に戻してから保持する）
+
+        Args:
+            fig: acquire()で借りたFigure
+
+        Returns:
+            返却を受け付けた場合True（このプールのFigureでない場合False）
+        """
+        with self._lock:
+            entry = self._in_use.pop(id(fig), None)
+        if entry is None:
+            return False
+        key = entry[0]
+
+        try:
+            # Figure.clear()はAxesごとにAxes.clear()を呼び、Axesの新規作成と同程度のコストがかかるため、
+            # 先にAxesを外してから空のFigureをクリアする（Axesは次の描画で作り直す）
+            for ax in list(fig.axes):
+                fig.delaxes(ax)
+            fig.clear()
+            fig.set_size_inches(*key[0], forward=False)
+            fig.set_dpi(key[1])
+            fig.set_facecolor(matplotlib.rcParams['figure.facecolor'])
+            fig.set_edgecolor(matplotlib.rcParams['figure.edgecolor'])
+            fig.subplots_adjust(**{
+                name: matplotlib.rcParams[f'figure.subplot.{name}']
+                for name in ("left", "right", "bottom", "top", "wspace", "hspace")
+            })
+        except Exception as e:
+            logger.debug(f"Figureを再利用できないため破棄します: {e}")
+            with self._lock:
+                self._stats["discarded"] += 1
+            return True
+
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_key:
+                idle.append(fig)
+            else:
+                self._stats["discarded"] += 1
+        return True
+
+    @contextmanager
+    def figure(self, figsize: Tuple[float, float], dpi: Optional[float] = None) -> Iterator[Figure]:
+        """
+        Figureを借りて、ブロックを抜けると返却するコンテキストマネージャ
+
+        Args:
+            figsize: 図のサイズ（インチ）
+            dpi: 解像度（Noneの場合はrcParamsの既定値）
+
+        Yields:
+            Aggキャンバスを持つ空のFigure
+        """
+        fig = self.acquire(figsize, dpi)
+        try:
+            yield fig
+        finally:
+            self.release(fig)
+
+    def clear(self):
+        """未使用のFigureを全て破棄"""
+        with self._lock:
+            self._idle.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        プールの統計情報を取得
+
+        Returns:
+            {"created", "reused", "discarded", "idle", "in_use"}
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "idle": sum(len(figures) for figures in self._idle.values()),
+                "in_use": len(self._in_use)
+            }
+
+
+_default_pool: Optional[FigurePool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_figure_pool() -> FigurePool:
+    """
+    プロセス共通のFigureプールを取得
+
+    Returns:
+        FigurePool
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = FigurePool()
+    return _default_pool
@@ -0,0 +1,283 @@
+"""
+アニメーションのフレーム描画
+各フレームは独立しているため、プロセスプールで並列に描画し、描画結果のRGBA配列は
+共有メモリを介してフレーム順にエンコーダーへ渡す（配列のpickleによるコピーを避ける）
+"""
+
+import os
+import math
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Any, Callable, Deque, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .figure_pool import get_figure_pool
+from .gif_writer import figure_to_rgba
+from .plotting_env import init_plotting_environment
+
+logger = logging.getLogger(__name__)
+
+# ワーカーごとに同時に処理待ちにできるフレーム数（共有メモリのスロット数 = ワーカー数 × この値）
+FRAMES_IN_FLIGHT_PER_WORKER = 2
+
+
+def draw_animation_frame(
+    ax: Any, frame_data: Dict, config: Dict, colors: Dict[str, str], styles: Dict[str, Any]
+) -> None:
+    """
+    アニメーションの1フレームを描画
+
+    Args:
+        ax: 描画先のAxes
+        frame_data: フレームデータ（x, y, type, title）
+        config: 設定辞書
+        colors: カラーパレット
+        styles: スタイル設定
+    """
+    x_data = frame_data.get('x', [])
+    y_data = frame_data.get('y', [])
+    frame_type = frame_data.get('type', 'line')
+
+    # グラフタイプに応じて描画
+    if frame_type == 'line':
+        ax.plot(x_data, y_data,
+            linewidth=styles["line_width"],
+            color=colors["info"])
+    elif frame_type == 'scatter':
+        ax.scatter(x_data, y_data,
+            s=50, alpha=0.6, color=colors["info"])
+    elif frame_type == 'bar':
+        ax.bar(x_data, y_data,
+            color=colors["info"], alpha=0.7)
+
+    # 軸の設定
+    xlim = config.get('xlim', (0, 10))
+    ylim = config.get('ylim', (0, 10))
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.set_title(frame_data.get('title', config.get('title', '')))
+    ax.set_xlabel(config.get('xlabel', ''))
+    ax.set_ylabel(config.get('ylabel', ''))
+    ax.grid(True, alpha=styles["grid_alpha"])
+
+
+def resolve_worker_count(workers: Optional[int], frame_count: int) -> int:
+    """
+    フレーム描画に使うプロセス数を決定
+
+    Args:
+        workers: 指定されたプロセス数（Noneの場合はメインプロセスではCPU数、ワーカープロセスでは1）
+        frame_count: フレーム数
+
+    Returns:
+        プロセス数（1の場合はプロセスプールを使わない）
+    """
+    if workers is None:
+        # 章を並列生成するワーカーがそれぞれCPU数のプロセスを起動しないよう、自動検出はメインプロセスに限る
+        workers = (os.cpu_count() or 1) if multiprocessing.parent_process() is None else 1
+    return max(1, min(workers, frame_count))
+
+
+def create_frame_pool(colors: Dict[str, str], styles: Dict[str, Any], workers: int) -> ProcessPoolExecutor:
+    """
+    フレーム描画用のプロセスプールを作成（描画設定の異なるアニメーションでも使い回せる）
+
+    Args:
+        colors: カラーパレット
+        styles: スタイル設定
+        workers: プロセス数
+
+    Returns:
+        プロセスプール
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(colors, styles, styles.get("figure_dpi", 150))
+    )
+
+
+# ワーカープロセスの状態（初期化時に設定する）
+_worker_settings: Dict[str, Any] = {}
+_worker_segments: Dict[str, SharedMemory] = {}
+# 接続中の共有メモリを作成した描画（プールを使い回すため、描画が変わったら前の接続を閉じる）
+_worker_render_id: List[Optional[str]] = [None]
+
+
+def _init_worker(colors: Dict[str, str], styles: Dict[str, Any], dpi: float):
+    """ワーカープロセスの初期化（描画環境の準備と描画設定の保持）"""
+    init_plotting_environment(styles.get("font_family"))
+    _worker_settings.update(colors=colors, styles=styles, dpi=dpi)
+
+
+def _attach_segment(name: str, render_id: str) -> SharedMemory:
+    """親プロセスが作成した共有メモリに接続（解放は親プロセスが行う）"""
+    if render_id != _worker_render_id[0]:
+        # 前の描画のスロットは親プロセスで削除済みのため、マップを解放する
+        for segment in _worker_segments.values():
+            segment.close()
+        _worker_segments.clear()
+        _worker_render_id[0] = render_id
+    segment = _worker_segments.get(name)
+    if segment is None:
+        try:
+            segment = SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python 3.12以前は接続時にも解放対象に登録されるが、ワーカーは親プロセスと同じ
+            # resource_trackerを共有しており登録は重複しないため、取り消さない（取り消すと親の登録が消える）
+            segment = SharedMemory(name=name)
+        _worker_segments[name] = segment
+    return segment
+
+
+def _render_frame_to_segment(
+    frame_data: Dict, config: Dict, segment_name: str, render_id: str
+) -> Tuple[Tuple[int, ...], Optional[bytes]]:
+    """
+    ワーカープロセスで1フレームを描画し、RGBA配列を共有メモリに書き込む
+
+    Args:
+        frame_data: フレームデータ
+        config: 設定辞書
+        segment_name: 書き込み先の共有メモリ名
+        render_id: 描画の識別子（同じ描画のスロットへの接続は使い回す）
+
+    Returns:
+        (配列の形状, 共有メモリに収まらなかった場合の配列のバイト列)
+    """
+    settings = _worker_settings
+    with get_figure_pool().figure(settings["styles"]["figsize"], settings["dpi"]) as fig:
+        ax = fig.subplots()
+        draw_animation_frame(ax, frame_data, config, settings["colors"], settings["styles"])
+        fig.tight_layout()
+        rgba = figure_to_rgba(fig)
+
+        segment = _attach_segment(segment_name, render_id)
+        if rgba.nbytes > segment.size:
+            return rgba.shape, rgba.tobytes()
+        np.ndarray(rgba.shape, dtype=np.uint8, buffer=segment.buf)[...] = rgba
+        return rgba.shape, None
+
+
+class AnimationFrameRenderer:
+    """フレームデータからRGBA配列をフレーム順に生成する描画器"""
+
+    def __init__(
+        self,
+        config: Dict,
+        colors: Dict[str, str],
+        styles: Dict[str, Any],
+        workers: Optional[int] = 1,
+        executor: Optional[ProcessPoolExecutor] = None
+    ):
+        """
+        初期化
+
+        Args:
+            config: 設定辞書
+            colors: カラーパレット
+            styles: スタイル設定
+            workers: 描画に使うプロセス数（1の場合は現在のプロセスで描画、Noneの場合はresolve_worker_count()で決定）
+            executor: 使い回すプロセスプール（create_frame_pool()で作成。Noneの場合は描画のたびに作成する）
+
+        Raises:
+            ValueError: プロセス数が1未満の場合
+        """
+        if workers is not None and workers < 1:
+            raise ValueError(f"プロセス数は1以上を指定してください: {workers}")
+        self.config = config
+        self.colors = colors
+        self.styles = styles
+        self.workers = workers
+        self.executor = executor
+        self.dpi = styles.get("figure_dpi", 150)
+
+    def render(self, frames_data: Sequence[Dict], on_frame: Callable[[np.ndarray], None]) -> None:
+        """
+        フレームを描画し、フレーム順にon_frameへ渡す
+        渡す配列は描画器が再利用するバッファを参照するため、on_frameの中で使い終えること
+
+        Args:
+            frames_data: フレームデータのリスト
+            on_frame: (高さ, 幅, 4) のuint8配列を受け取る関数（frames_dataと同じ順序で呼ばれる）
+        """
+        workers = resolve_worker_count(self.workers, len(frames_data))
+        if workers == 1:
+            self._render_sequential(frames_data, on_frame)
+        else:
+            self._render_parallel(frames_data, on_frame, workers)
+
+    def _render_sequential(self, frames_data: Sequence[Dict], on_frame: Callable[[np.ndarray], None]) -> None:
+        """現在のプロセスで1フレームずつ描画"""
+        pool = get_figure_pool()
+        for frame_data in frames_data:
+            with pool.figure(self.styles["figsize"], self.dpi) as fig:
+                ax = fig.subplots()
+                draw_animation_frame(ax, frame_data, self.config, self.colors, self.styles)
+                fig.tight_layout()
+                on_frame(figure_to_rgba(fig))
+
+    def _frame_nbytes(self) -> int:
+        """1フレームのRGBA配列の大きさの上限（端数の切り上げ分の余裕を含む）"""
+        width, height = self.styles["figsize"]
+        return (math.ceil(width * self.dpi) + 1) * (math.ceil(height * self.dpi) + 1) * 4
+
+    def _render_parallel(
+        self, frames_data: Sequence[Dict], on_frame: Callable[[np.ndarray], None], workers: int
+    ) -> None:
+        """
+        プロセスプールで描画し、共有メモリのスロットを順に使い回してフレーム順に渡す
+        スロットはon_frameが使い終わってから次のフレームに割り当てる
+        """
+        slot_count = min(len(frames_data), workers * FRAMES_IN_FLIGHT_PER_WORKER)
+        slots: List[SharedMemory] = []
+        try:
+            for _ in range(slot_count):
+                slots.append(SharedMemory(create=True, size=self._frame_nbytes()))
+
+            if self.executor is not None:
+                self._submit_in_order(self.executor, frames_data, on_frame, slots)
+            else:
+                with create_frame_pool(self.colors, self.styles, workers) as executor:
+                    self._submit_in_order(executor, frames_data, on_frame, slots)
+            logger.debug(f"{len(frames_data)}フレームを{workers}プロセスで描画しました")
+        finally:
+            for slot in slots:
+                slot.close()
+                slot.unlink()
+
+    def _submit_in_order(
+        self,
+        executor: ProcessPoolExecutor,
+        frames_data: Sequence[Dict],
+        on_frame: Callable[[np.ndarray], None],
+        slots: List[SharedMemory]
+    ) -> None:
+        """空いているスロットの分だけ先のフレームを投入し、フレーム順に受け取る"""
+        slot_count = len(slots)
+        pending: Deque = deque()
+        next_index = 0
+        for index in range(len(frames_data)):
+            # 空いているスロットの分だけ先のフレームを投入する
+            while next_index < len(frames_data) and next_index - index < slot_count:
+                slot = slots[next_index % slot_count]
+                pending.append((slot, executor.submit(
+                    _render_frame_to_segment, frames_data[next_index], self.config, slot.name, slots[0].name
+                )))
+                next_index += 1
+
+            slot, future = pending.popleft()
+            shape, overflow = future.result()
+            if overflow is not None:
+                on_frame(np.frombuffer(overflow, dtype=np.uint8).reshape(shape))
+            else:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=slot.buf)
+                try:
+                    on_frame(frame)
+                finally:
+                    # スロットを閉じられるよう、共有メモリへの参照を残さない
+                    del frame
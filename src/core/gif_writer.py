@@ -0,0 +1,178 @@
+"""
+アニメーションGIFの逐次書き出し
+フレームを受け取るたびに共通パレットで減色してファイルに追記し、全フレームをメモリに保持しない
+前のフレームから変化した矩形だけを書き出してファイルサイズを抑える
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, BinaryIO, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+logger = logging.getLogger(__name__)
+
+# 透過部分を合成する背景色
+BACKGROUND_COLOR = (255, 255, 255)
+
+# GIFの表示時間の単位（ミリ秒）
+GIF_DELAY_UNIT_MS = 10
+
+
+def figure_to_rgba(fig: Any) -> np.ndarray:
+    """
+    Matplotlib FigureをAggのバッファから直接RGBA配列として取得（PNGへのエンコードを経由しない）
+    返す配列はキャンバスのバッファを参照するため、次に描画する前に使い終えること
+
+    Args:
+        fig: Matplotlib Figure
+
+    Returns:
+        (高さ, 幅, 4) のuint8配列
+    """
+    canvas = fig.canvas
+    if not hasattr(canvas, "buffer_rgba"):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())
+
+
+class StreamingGifWriter:
+    """フレームを1枚ずつ追記するアニメーションGIFの書き出し"""
+
+    def __init__(
+        self,
+        output_path: Union[str, Path],
+        fps: float = 10,
+        loop: int = 0,
+        colors: int = 256,
+        crop_unchanged: bool = True
+    ):
+        """
+        初期化（ファイルは最初のフレームを追記したときに作成する）
+
+        Args:
+            output_path: 出力先のパス
+            fps: フレームレート
+            loop: 繰り返し回数（0は無限）
+            colors: 共通パレットの色数（最初のフレームから作成する）
+            crop_unchanged: 前のフレームから変化した矩形だけを書き出すか
+
+        Raises:
+            ValueError: フレームレートまたは色数が不正な場合
+        """
+        if fps <= 0:
+            raise ValueError(f"フレームレートは正の値を指定してください: {fps}")
+        if not 2 <= colors <= 256:
+            raise ValueError(f"パレットの色数は2〜256を指定してください: {colors}")
+        self.output_path = Path(output_path)
+        self.frame_duration_ms = max(GIF_DELAY_UNIT_MS, round(1000 / fps / GIF_DELAY_UNIT_MS) * GIF_DELAY_UNIT_MS)
+        self.loop = loop
+        self.colors = colors
+        self.crop_unchanged = crop_unchanged
+
+        self.size: Optional[Tuple[int, int]] = None
+        self.frame_count = 0
+        self._fp: Optional[BinaryIO] = None
+        self._palette_image: Optional[Image.Image] = None
+        self._previous: Optional[np.ndarray] = None
+        # 書き出し待ちのフレーム（変化のないフレームは表示時間を延ばしてまとめる）
+        self._pending: Optional[Tuple[Image.Image, Tuple[int, int], int]] = None
+
+    def __enter__(self) -> "StreamingGifWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _to_rgb(self, frame: Union[np.ndarray, Image.Image]) -> Image.Image:
+        """フレームをGIFの画面サイズのRGB画像に変換（透過部分は白で合成）"""
+        if isinstance(frame, np.ndarray):
+            height, width = frame.shape[:2]
+            mode = {2: "L", 3: "RGB", 4: "RGBA"}[frame.shape[2] if frame.ndim == 3 else 2]
+            image = Image.frombuffer(mode, (width, height), np.ascontiguousarray(frame, dtype=np.uint8), "raw", mode, 0, 1)
+        else:
+            image = frame
+
+        if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+            image = image.convert("RGBA")
+            background = Image.new("RGBA", image.size, BACKGROUND_COLOR + (255,))
+            image = Image.alpha_composite(background, image)
+        image = image.convert("RGB")
+
+        if self.size is not None and image.size != self.size:
+            # 画面サイズと異なるフレームは左上に合わせて配置する
+            canvas = Image.new("RGB", self.size, BACKGROUND_COLOR)
+            canvas.paste(image, (0, 0))
+            image = canvas
+        return image
+
+    def append(self, frame: Union[np.ndarray, Image.Image]):
+        """
+        フレームを追記
+
+        Args:
+            frame: (高さ, 幅, 3または4) のuint8配列、またはPIL Image
+        """
+        rgb = self._to_rgb(frame)
+        if self._palette_image is None:
+            self._start(rgb)
+        # 最初のフレームも共通パレットで減色し直す（メディアンカットの割り当ては最近傍色と一致しないことがあり、
+        # 同じ画素が以降のフレームと異なる色番号になるため）
+        quantized = rgb.quantize(palette=self._palette_image, dither=Image.Dither.NONE)
+
+        indices = np.asarray(quantized)
+        bbox = (0, 0) + self.size
+        if self.crop_unchanged and self._previous is not None:
+            changed = indices != self._previous
+            rows, cols = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+            if rows.size == 0:
+                # 変化のないフレームは直前のフレームの表示時間に加える
+                image, offset, duration = self._pending
+                self._pending = (image, offset, duration + self.frame_duration_ms)
+                self.frame_count += 1
+                return
+            bbox = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+        self._flush_pending()
+        region = quantized if bbox == (0, 0) + self.size else quantized.crop(bbox)
+        self._pending = (region, bbox[:2], self.frame_duration_ms)
+        self._previous = indices
+        self.frame_count += 1
+
+    def _start(self, first_frame: Image.Image):
+        """最初のフレームから共通パレットを作成し、GIFのヘッダーを書き出す"""
+        self.size = first_frame.size
+        self._palette_image = first_frame.quantize(colors=self.colors, dither=Image.Dither.NONE)
+        # パレットの並べ替え（optimize）をすると以降のフレームの色番号とずれるため無効にする
+        header, _ = GifImagePlugin.getheader(
+            self._palette_image, info={"optimize": False, "loop": self.loop, "duration": self.frame_duration_ms}
+        )
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = open(self.output_path, "wb")
+        for block in header:
+            self._fp.write(block)
+
+    def _flush_pending(self):
+        """書き出し待ちのフレームをファイルに書き出す"""
+        if self._pending is None:
+            return
+        image, offset, duration = self._pending
+        # disposal=1: 次のフレームは前のフレームの上に重ねて描く（変化した矩形だけで済む）
+        for block in GifImagePlugin.getdata(image, offset=offset, duration=duration, disposal=1):
+            self._fp.write(block)
+        self._pending = None
+
+    def close(self):
+        """残りのフレームと終端を書き出してファイルを閉じる"""
+        if self._fp is None:
+            return
+        try:
+            self._flush_pending()
+            self._fp.write(b";")
+        finally:
+            self._fp.close()
+            self._fp = None
+        logger.debug(f"アニメーションGIFを書き出しました: {self.output_path}（{self.frame_count}フレーム）")
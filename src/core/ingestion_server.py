@@ -0,0 +1,386 @@
+"""
+学習イベントの受信サーバー
+ブラウザの学習行動追跡スクリプトがnavigator.sendBeaconで送信するイベントのバッチを受け取り、
+検証した上で上限付きのキューを介してLearningAnalyzerに記録する
+キューが満杯の場合は503を返して送信側に再送を促す（バックプレッシャー）
+"""
+
+import json
+import math
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from .learning_analyzer import LearningAnalyzer, LearningEvent
+
+logger = logging.getLogger(__name__)
+
+# イベントを受け付けるパス
+EVENTS_PATH = "/events"
+
+# 状態確認用のパス
+HEALTH_PATH = "/health"
+
+# 文字列フィールドの最大長
+MAX_FIELD_LENGTH = 256
+
+# ヘッダー部の最大サイズ（バイト）
+MAX_HEADER_BYTES = 16 * 1024
+
+HTTP_REASONS = {
+    200: "OK", 202: "Accepted", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large",
+    503: "Service Unavailable"
+}
+
+
+def _validate_metadata(metadata: Dict[str, Any]):
+    """
+    集計に使うmetadataの値の型を検証
+    （不正な値を記録すると、以降そのユーザーの進捗集計や日次集計が例外で失敗するため受信時に拒否する）
+
+    Args:
+        metadata: イベントのmetadata
+
+    Raises:
+        ValueError: correctが真偽値でない、またはduration_minutesが0以上の有限の数値でない場合
+    """
+    if "correct" in metadata and not isinstance(metadata["correct"], bool):
+        raise ValueError("metadata.correctは真偽値である必要があります")
+    if "duration_minutes" in metadata:
+        duration = metadata["duration_minutes"]
+        if (
+            isinstance(duration, bool) or not isinstance(duration, (int, float))
+            or not math.isfinite(duration) or duration < 0
+        ):
+            raise ValueError("metadata.duration_minutesは0以上の有限の数値である必要があります")
+
+
+def validate_event(data: Any) -> LearningEvent:
+    """
+    受信したイベントを検証してLearningEventに変換
+
+    Args:
+        data: JSONから読み込んだイベント
+
+    Returns:
+        LearningEvent
+
+    Raises:
+        ValueError: 必須項目の欠落や型・形式が不正な場合
+    """
+    if not isinstance(data, dict):
+        raise ValueError("イベントはオブジェクトである必要があります")
+
+    for field_name in ("user_id", "event_type", "content_id"):
+        value = data.get(field_name)
+        if not isinstance(value, str) or not value or len(value) > MAX_FIELD_LENGTH:
+            raise ValueError(f"{field_name}は1〜{MAX_FIELD_LENGTH}文字の文字列である必要があります")
+
+    timestamp = data.get("timestamp")
+    if not isinstance(timestamp, str):
+        raise ValueError("timestampはISO 8601形式の文字列である必要があります")
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"timestampの形式が不正です: {timestamp[:40]}")
+    if parsed.tzinfo is not None:
+        # 既存のイベントと比較できるようローカル時刻のnaiveなdatetimeに揃える
+        parsed = parsed.astimezone().replace(tzinfo=None)
+
+    metadata = data.get("metadata")
+    if metadata is not None and not isinstance(metadata, dict):
+        raise ValueError("metadataはオブジェクトである必要があります")
+    if metadata:
+        _validate_metadata(metadata)
+
+    return LearningEvent(
+        user_id=data["user_id"],
+        event_type=data["event_type"],
+        content_id=data["content_id"],
+        timestamp=parsed,
+        metadata=metadata or {}
+    )
+
+
+class IngestionServer:
+    """asyncioで動作する学習イベント受信サーバー"""
+
+    def __init__(
+        self,
+        analyzer: LearningAnalyzer,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        queue_size: int = 10000,
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+        max_body_bytes: int = 1024 * 1024,
+        allowed_origin: str = "*"
+    ):
+        """
+        初期化
+
+        Args:
+            analyzer: イベントを記録するLearningAnalyzer
+            host: 待ち受けるアドレス
+            port: 待ち受けるポート（0の場合は空いているポートを使用）
+            queue_size: 記録待ちイベントのキューの上限
+            batch_size: LearningAnalyzerに一度に渡すイベント数の上限
+            flush_interval: キューのイベントをディスクに保存する間隔（秒）
+            max_body_bytes: 1リクエストの本文の上限サイズ（バイト）
+            allowed_origin: Access-Control-Allow-Originに返すオリジン
+        """
+        self.analyzer = analyzer
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_body_bytes = max_body_bytes
+        self.allowed_origin = allowed_origin
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._connections = set()
+        self.stats = {"requests": 0, "accepted": 0, "invalid": 0, "rejected": 0, "ingested": 0}
+
+    async def start(self):
+        """サーバーとバックグラウンドの記録タスクを開始"""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # ポート0を指定した場合に実際のポートを反映
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"学習イベント受信サーバーを開始しました: http://{self.host}:{self.port}{EVENTS_PATH}")
+
+    async def stop(self):
+        """新規接続の受け付けを止め、キューに残ったイベントを記録してから終了"""
+        if self._server is not None:
+            self._server.close()
+            # 待機中のkeep-alive接続を閉じる
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+
+        remaining = self._drain_queue(self._queue.qsize()) if self._queue else []
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._ingest, remaining, True)
+        # 予約中の適応的コンテンツ設定の再計算は終了前に済ませる
+        await loop.run_in_executor(None, self.analyzer.refresh_adaptive_decisions)
+        logger.info(f"学習イベント受信サーバーを停止しました: {self.get_stats()}")
+
+    async def serve_forever(self):
+        """サーバーを開始して停止されるまで待機"""
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        統計情報を取得
+
+        Returns:
+            {"requests", "accepted", "invalid", "rejected", "ingested", "queued"}
+        """
+        return {**self.stats, "queued": self._queue.qsize() if self._queue else 0}
+
+    def enqueue(self, events: List[LearningEvent]) -> bool:
+        """
+        イベントのバッチをキューに追加（バッチ全体が入らない場合は追加しない）
+
+        Args:
+            events: 検証済みのイベント
+
+        Returns:
+            追加できた場合True、キューに空きがない場合False
+        """
+        if self._queue.maxsize - self._queue.qsize() < len(events):
+            self.stats["rejected"] += len(events)
+            return False
+        for event in events:
+            self._queue.put_nowait(event)
+        self.stats["accepted"] += len(events)
+        return True
+
+    def _drain_queue(self, limit: int) -> List[LearningEvent]:
+        """キューから最大limit件のイベントを取り出す"""
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    def _ingest(self, events: List[LearningEvent], flush: bool = False):
+        """LearningAnalyzerにイベントを記録（ワーカースレッドで実行）"""
+        if events:
+            self.analyzer.log_events(events)
+            self.stats["ingested"] += len(events)
+        if flush:
+            self.analyzer.flush_events()
+
+    async def _flush_loop(self):
+        """キューのイベントをまとめてLearningAnalyzerに渡し、一定間隔でディスクに保存する"""
+        loop = asyncio.get_running_loop()
+        last_flush = loop.time()
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+                batch = [first] + self._drain_queue(self.batch_size - 1)
+            except asyncio.TimeoutError:
+                batch = []
+
+            flush = loop.time() - last_flush >= self.flush_interval
+            if batch or flush:
+                # ディスクI/Oでイベントループを止めないよう別スレッドで記録する
+                ingest = loop.run_in_executor(None, self._ingest, batch, flush)
+                try:
+                    await asyncio.shield(ingest)
+                except asyncio.CancelledError:
+                    # 停止時も記録中のバッチは完了させてから終了する
+                    await ingest
+                    raise
+            if flush:
+                last_flush = loop.time()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """1接続内のリクエストを順に処理（keep-alive対応）"""
+        self._connections.add(writer)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body, error_status = request
+                self.stats["requests"] += 1
+                if error_status:
+                    status, payload = error_status, {"error": HTTP_REASONS[error_status]}
+                else:
+                    status, payload = self._route(method, path, headers, body)
+
+                keep_alive = headers.get("connection", "").lower() != "close" and not error_status
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes, int]]:
+        """HTTPリクエストを1件読み込む（接続が閉じられた場合はNone）"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            return "", "", {}, b"", 413
+
+        if len(head) > MAX_HEADER_BYTES:
+            return "", "", {}, b"", 413
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            return "", "", {}, b"", 400
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            return method, target, headers, b"", 400
+        if length > self.max_body_bytes:
+            return method, target, headers, b"", 413
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body, 0
+
+    def _route(
+        self, method: str, path: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """リクエストを処理してステータスコードと応答本文を返す"""
+        if path == HEALTH_PATH:
+            if method != "GET":
+                return 405, {"error": HTTP_REASONS[405]}
+            return 200, self.get_stats()
+
+        if path != EVENTS_PATH:
+            return 404, {"error": HTTP_REASONS[404]}
+        if method == "OPTIONS":
+            return 204, None
+        if method != "POST":
+            return 405, {"error": HTTP_REASONS[405]}
+
+        # sendBeaconはtext/plainで送信するため、Content-Typeによらず本文をJSONとして扱う
+        try:
+            payload = json.loads(body)
+            raw_events = payload.get("events") if isinstance(payload, dict) else payload
+            if not isinstance(raw_events, list):
+                raise ValueError("イベントの配列が必要です")
+            events = [validate_event(item) for item in raw_events]
+        except (ValueError, UnicodeDecodeError) as e:
+            self.stats["invalid"] += 1
+            return 400, {"error": str(e)}
+
+        if not self.enqueue(events):
+            return 503, {"error": "キューが満杯です。時間をおいて再送してください"}
+        return 202, {"accepted": len(events)}
+
+    def _write_response(
+        self, writer: asyncio.StreamWriter, status: int, payload: Optional[Dict[str, Any]], keep_alive: bool
+    ):
+        """HTTPレスポンスを書き込む"""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        headers = [
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}",
+            f"Content-Length: {len(body)}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Access-Control-Allow-Origin: {self.allowed_origin}",
+            "Access-Control-Allow-Methods: POST, OPTIONS",
+            "Access-Control-Allow-Headers: Content-Type",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append(f"Retry-After: {max(1, int(self.flush_interval))}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+
+
+def main():
+    """コマンドラインから受信サーバーを起動"""
+    parser = argparse.ArgumentParser(description="学習イベントの受信サーバー")
+    parser.add_argument("--data-dir", type=Path, default=Path("data/learning_analytics"),
+                        help="学習イベントの保存ディレクトリ")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=8765, help="待ち受けるポート")
+    parser.add_argument("--queue-size", type=int, default=10000, help="記録待ちイベントのキューの上限")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    analyzer = LearningAnalyzer(args.data_dir, fsync_policy="interval")
+    server = IngestionServer(analyzer, host=args.host, port=args.port, queue_size=args.queue_size)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,18 @@
 
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, FrozenSet
 from dataclasses import dataclass, field
 
 from .utils import slugify
-<<<<<<< HEAD
-=======
-from .document_builder import DocumentBuilder
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
+from .term_matcher import TermMatcher
 from .config import FILE_NAMING_PATTERNS
 
 logger = logging.getLogger(__name__)
 
+# ツールチップに表示する定義の最大文字数
+TOOLTIP_MAX_LENGTH = 100
+
 
 @dataclass
 class Term:
@@ -66,7 +66,15 @@ class KnowledgeManager:
         self.terms: Dict[str, Term] = {}
         self.faq_items: List[FaqItem] = []
         self.tip_items: List[TipItem] = []
-<<<<<<< HEAD
+        # 用語集合ごとに構築済みの用語オートマトン
+        self._term_matchers: Dict[FrozenSet[str], TermMatcher] = {}
+        # 用語の登録時に更新する索引
+        self._terms_by_chapter: Dict[str, Dict[str, None]] = {}
+        self._terms_by_category: Dict[str, Dict[str, None]] = {}
+        self._terms_by_slug: Dict[str, Term] = {}
+        self._tooltip_texts: Dict[str, str] = {}
+        # 章タイトルごとの get_terms_for_chapter の結果（用語名のリスト）
+        self._chapter_terms_cache: Dict[str, List[str]] = {}
         self.term_usage: Dict[str, List[Dict[str, str]]] = {}
         self.doc_builder = None
         
@@ -76,9 +84,6 @@ class KnowledgeManager:
             from .document_builder import DocumentBuilder
             self.doc_builder = DocumentBuilder(self.output_dir)
         return self.doc_builder
-=======
-        self.doc_builder = DocumentBuilder(output_dir)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
     def register_term(self, term_obj: Term):
         """
@@ -87,10 +92,43 @@ class KnowledgeManager:
         Args:
             term_obj: Termオブジェクト
         """
-        if term_obj.term in self.terms:
+        previous = self.terms.get(term_obj.term)
+        if previous is not None:
             logger.warning(f"用語 '{term_obj.term}' は既に登録されています")
+            self._unindex_term(previous)
         self.terms[term_obj.term] = term_obj
+        self._index_term(term_obj)
+        self._term_matchers.clear()
+        self._chapter_terms_cache.clear()
         logger.debug(f"用語を登録しました: {term_obj.term}")
+
+    def _index_term(self, term_obj: Term):
+        """用語を各索引に追加"""
+        if term_obj.first_chapter:
+            self._terms_by_chapter.setdefault(term_obj.first_chapter, {})[term_obj.term] = None
+        self._terms_by_category.setdefault(term_obj.category, {})[term_obj.term] = None
+        self._terms_by_slug[term_obj.slug] = term_obj
+
+        # ツールチップ用の短い説明を生成
+        tooltip_text = term_obj.definition
+        if len(tooltip_text) > TOOLTIP_MAX_LENGTH:
+            tooltip_text = tooltip_text[:TOOLTIP_MAX_LENGTH - 3] + "..."
+        self._tooltip_texts[term_obj.term] = tooltip_text
+
+    def _unindex_term(self, term_obj: Term):
+        """上書きされる用語を各索引から削除"""
+        if term_obj.first_chapter:
+            chapter_terms = self._terms_by_chapter.get(term_obj.first_chapter, {})
+            chapter_terms.pop(term_obj.term, None)
+            if not chapter_terms:
+                self._terms_by_chapter.pop(term_obj.first_chapter, None)
+        category_terms = self._terms_by_category.get(term_obj.category, {})
+        category_terms.pop(term_obj.term, None)
+        if not category_terms:
+            self._terms_by_category.pop(term_obj.category, None)
+        if self._terms_by_slug.get(term_obj.slug) is term_obj:
+            del self._terms_by_slug[term_obj.slug]
+        self._tooltip_texts.pop(term_obj.term, None)
         
     def register_terms_batch(self, term_list: List[Term]):
         """
@@ -141,7 +179,6 @@ class KnowledgeManager:
         """
         self.tip_items.append(tip_item)
         logger.debug(f"TIPS項目を登録しました: {tip_item.title}")
-<<<<<<< HEAD
 
     def record_term_usage(self, term_name: str, chapter_title: str, chapter_path: str, anchor_id: str):
         """
@@ -162,9 +199,42 @@ class KnowledgeManager:
             "anchor": anchor_id
         })
         logger.debug(f"用語の使用箇所を記録: {term_name} in {chapter_path}#{anchor_id}")
-=======
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
-        
+
+    def get_term_usage_for_path(self, chapter_path: str) -> List[Dict[str, str]]:
+        """
+        指定された章で記録された用語の使用箇所を取得
+
+        Args:
+            chapter_path: 章のMarkdownファイルへのパス
+
+        Returns:
+            使用箇所のリスト [{"term", "title", "path", "anchor"}]
+        """
+        return [
+            {"term": term_name, **usage}
+            for term_name, usages in self.term_usage.items()
+            for usage in usages
+            if usage["path"] == chapter_path
+        ]
+        
+    def get_term_matcher(self, term_names: Iterable[str]) -> TermMatcher:
+        """
+        指定された用語集合を検索する用語オートマトンを取得
+        同じ用語集合に対しては構築済みのものを再利用し、用語の登録時に破棄する
+
+        Args:
+            term_names: 検索対象の用語名
+
+        Returns:
+            TermMatcherのインスタンス
+        """
+        key = frozenset(term_names)
+        matcher = self._term_matchers.get(key)
+        if matcher is None:
+            matcher = TermMatcher(key)
+            self._term_matchers[key] = matcher
+        return matcher
+
     def get_term_definition(self, term_name: str) -> Optional[str]:
         """
         指定された専門用語の定義を取得
@@ -186,6 +256,42 @@ class KnowledgeManager:
             Termオブジェクトのリスト
         """
         return list(self.terms.values())
+
+    def get_term_by_slug(self, slug: str) -> Optional[Term]:
+        """
+        スラッグ（用語集のアンカーID）から用語を取得
+
+        Args:
+            slug: 用語のスラッグ
+
+        Returns:
+            Termオブジェクト、見つからない場合はNone
+        """
+        return self._terms_by_slug.get(slug)
+
+    def get_terms_by_category(self, category: str) -> List[Term]:
+        """
+        指定されたカテゴリの用語を登録順に取得
+
+        Args:
+            category: カテゴリ名
+
+        Returns:
+            Termオブジェクトのリスト
+        """
+        return [self.terms[name] for name in self._terms_by_category.get(category, {})]
+
+    def get_tooltip_text(self, term_name: str) -> Optional[str]:
+        """
+        ツールチップ用に短縮した用語の定義を取得
+
+        Args:
+            term_name: 用語名
+
+        Returns:
+            ツールチップの内容、見つからない場合はNone
+        """
+        return self._tooltip_texts.get(term_name)
         
     def get_terms_for_chapter(self, chapter_title: str) -> Dict[str, Dict[str, str]]:
         """
@@ -197,22 +303,21 @@ class KnowledgeManager:
         Returns:
             用語情報の辞書 {用語: {"tooltip_text": "ツールチップ内容"}}
         """
-        terms_info = {}
-        
-        for term_name, term_obj in self.terms.items():
-            # 章に関連する用語かチェック
-            if (term_obj.first_chapter == chapter_title or 
-                chapter_title.lower() in term_obj.term.lower()):
-                # ツールチップ用の短い説明を生成
-                tooltip_text = term_obj.definition
-                if len(tooltip_text) > 100:
-                    tooltip_text = tooltip_text[:97] + "..."
-                
-                terms_info[term_name] = {
-                    "tooltip_text": tooltip_text
-                }
-                
-        return terms_info
+        term_names = self._chapter_terms_cache.get(chapter_title)
+        if term_names is None:
+            # 初出章が一致する用語は索引から、章タイトルを含む用語名は一度だけ走査して求める
+            chapter_terms = self._terms_by_chapter.get(chapter_title, {})
+            title_lower = chapter_title.lower()
+            term_names = [
+                term_name for term_name in self.terms
+                if term_name in chapter_terms or title_lower in term_name.lower()
+            ]
+            self._chapter_terms_cache[chapter_title] = term_names
+
+        return {
+            term_name: {"tooltip_text": self._tooltip_texts[term_name]}
+            for term_name in term_names
+        }
         
     def generate_glossary_markdown(self) -> Path:
         """
@@ -221,41 +326,22 @@ class KnowledgeManager:
         Returns:
             生成されたファイルのパス
         """
-<<<<<<< HEAD
         self._get_doc_builder().clear_content()
         
         # タイトル
         self._get_doc_builder().add_heading("用語集", 1)
         self._get_doc_builder().add_paragraph(
-=======
-        self.doc_builder.clear_content()
-        
-        # タイトル
-        self.doc_builder.add_heading("用語集", 1)
-        self.doc_builder.add_paragraph(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             "本資料で使用される専門用語の定義と説明をまとめています。"
         )
         
-        # カテゴリごとに用語を整理
-        categories = {}
-        for term in self.terms.values():
-            if term.category not in categories:
-                categories[term.category] = []
-            categories[term.category].append(term)
-        
         # カテゴリごとに表示
-        for category, terms in sorted(categories.items()):
-<<<<<<< HEAD
+        for category in sorted(self._terms_by_category):
+            terms = self.get_terms_by_category(category)
             self._get_doc_builder().add_heading(category, 2)
-=======
-            self.doc_builder.add_heading(category, 2)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             
             # 用語をアルファベット順にソート
             for term in sorted(terms, key=lambda t: t.term):
                 # アンカーリンク
-<<<<<<< HEAD
                 self._get_doc_builder().add_raw_markdown(f'<a id="{term.slug}"></a>')
                 
                 # 用語名
@@ -267,19 +353,6 @@ class KnowledgeManager:
                 # 初出章
                 if term.first_chapter:
                     self._get_doc_builder().add_paragraph(
-=======
-                self.doc_builder.add_raw_markdown(f'<a id="{term.slug}"></a>')
-                
-                # 用語名
-                self.doc_builder.add_heading(term.term, 3)
-                
-                # 定義
-                self.doc_builder.add_paragraph(f"**定義:** {term.definition}")
-                
-                # 初出章
-                if term.first_chapter:
-                    self.doc_builder.add_paragraph(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                         f"**初出章:** {term.first_chapter}"
                     )
                 
@@ -293,7 +366,6 @@ class KnowledgeManager:
                         else:
                             related_links.append(related)
                     
-<<<<<<< HEAD
                     self._get_doc_builder().add_paragraph(
                         f"**関連用語:** {', '.join(related_links)}"
                     )
@@ -324,24 +396,6 @@ class KnowledgeManager:
         # ファイル保存
         filename = FILE_NAMING_PATTERNS["md_glossary"]
         return self._get_doc_builder().save_markdown(filename)
-=======
-                    self.doc_builder.add_paragraph(
-                        f"**関連用語:** {', '.join(related_links)}"
-                    )
-                
-                # 文脈表示
-                if term.context_snippets:
-                    self.doc_builder.add_paragraph("**使用例:**")
-                    for snippet in term.context_snippets[:3]:  # 最大3つまで
-                        self.doc_builder.add_quote(snippet)
-                
-                # 区切り線
-                self.doc_builder.add_horizontal_rule()
-        
-        # ファイル保存
-        filename = FILE_NAMING_PATTERNS["md_glossary"]
-        return self.doc_builder.save_markdown(filename)
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
     def generate_faq_markdown(self) -> Path:
         """
@@ -350,19 +404,11 @@ class KnowledgeManager:
         Returns:
             生成されたファイルのパス
         """
-<<<<<<< HEAD
         self._get_doc_builder().clear_content()
         
         # タイトル
         self._get_doc_builder().add_heading("よくある質問（FAQ）", 1)
         self._get_doc_builder().add_paragraph(
-=======
-        self.doc_builder.clear_content()
-        
-        # タイトル
-        self.doc_builder.add_heading("よくある質問（FAQ）", 1)
-        self.doc_builder.add_paragraph(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             "学習者からよく寄せられる質問とその回答をまとめています。"
         )
         
@@ -380,17 +426,10 @@ class KnowledgeManager:
         
         # カテゴリごとに表示
         for category, faqs in sorted(categories.items()):
-<<<<<<< HEAD
             self._get_doc_builder().add_heading(category, 2)
             
             for faq in faqs:
                 self._get_doc_builder().add_faq_item(
-=======
-            self.doc_builder.add_heading(category, 2)
-            
-            for faq in faqs:
-                self.doc_builder.add_faq_item(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                     faq.question, 
                     faq.answer, 
                     collapsible=True
@@ -399,28 +438,17 @@ class KnowledgeManager:
         # カテゴリなしの項目
         if uncategorized:
             if categories:  # 他にカテゴリがある場合
-<<<<<<< HEAD
                 self._get_doc_builder().add_heading("その他", 2)
             
             for faq in uncategorized:
                 self._get_doc_builder().add_faq_item(
-=======
-                self.doc_builder.add_heading("その他", 2)
-            
-            for faq in uncategorized:
-                self.doc_builder.add_faq_item(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                     faq.question, 
                     faq.answer, 
                     collapsible=True
                 )
         
         # ファイル保存
-<<<<<<< HEAD
         return self._get_doc_builder().save_markdown("faq.md")
-=======
-        return self.doc_builder.save_markdown("faq.md")
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
         
     def generate_tips_markdown(self) -> Path:
         """
@@ -429,19 +457,11 @@ class KnowledgeManager:
         Returns:
             生成されたファイルのパス
         """
-<<<<<<< HEAD
         self._get_doc_builder().clear_content()
         
         # タイトル
         self._get_doc_builder().add_heading("学習のヒント（TIPS）", 1)
         self._get_doc_builder().add_paragraph(
-=======
-        self.doc_builder.clear_content()
-        
-        # タイトル
-        self.doc_builder.add_heading("学習のヒント（TIPS）", 1)
-        self.doc_builder.add_paragraph(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
             "効率的な学習のためのヒントやコツをまとめています。"
         )
         
@@ -459,17 +479,10 @@ class KnowledgeManager:
         
         # カテゴリごとに表示
         for category, tips in sorted(categories.items()):
-<<<<<<< HEAD
             self._get_doc_builder().add_heading(category, 2)
             
             for tip in tips:
                 self._get_doc_builder().add_tip_item(
-=======
-            self.doc_builder.add_heading(category, 2)
-            
-            for tip in tips:
-                self.doc_builder.add_tip_item(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                     tip.title,
                     tip.content,
                     collapsible=True
@@ -478,25 +491,14 @@ class KnowledgeManager:
         # カテゴリなしの項目
         if uncategorized:
             if categories:  # 他にカテゴリがある場合
-<<<<<<< HEAD
                 self._get_doc_builder().add_heading("その他", 2)
             
             for tip in uncategorized:
                 self._get_doc_builder().add_tip_item(
-=======
-                self.doc_builder.add_heading("その他", 2)
-            
-            for tip in uncategorized:
-                self.doc_builder.add_tip_item(
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
                     tip.title,
                     tip.content,
                     collapsible=True
                 )
         
         # ファイル保存
-<<<<<<< HEAD
         return self._get_doc_builder().save_markdown("tips.md")
-=======
-        return self.doc_builder.save_markdown("tips.md")
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
@@ -0,0 +1,262 @@
+"""
+学習イベントのコホート集計
+イベントの記録時に日別・コンテンツ別の集計値（イベント数、クイズ正答数、滞在時間の分布）を
+逐次更新し、イベントログと一緒に保存する。ダッシュボードの問い合わせはイベント量によらず
+集計値だけから応答する
+"""
+
+import os
+import json
+import bisect
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from .event_store import EventStore
+
+logger = logging.getLogger(__name__)
+
+# 集計値のスナップショットのファイル名
+AGGREGATES_FILENAME = "aggregates.json"
+
+# 滞在時間ヒストグラムの区間の境界（分）。最後の区間は上限なし
+TIME_HISTOGRAM_BOUNDS = [1, 2, 5, 10, 20, 30, 60]
+
+
+def _new_bucket() -> Dict[str, Any]:
+    """日別・コンテンツ別の集計値の初期値"""
+    return {
+        "events": {},
+        "quiz_attempts": 0,
+        "quiz_correct": 0,
+        "time_total": 0.0,
+        "time_histogram": [0] * (len(TIME_HISTOGRAM_BOUNDS) + 1)
+    }
+
+
+class CohortAggregates:
+    """日別・コンテンツ別の集計値を逐次更新するコホート集計"""
+
+    def __init__(self, path: Path):
+        """
+        初期化（スナップショットがあれば読み込む）
+
+        Args:
+            path: スナップショットの保存先
+        """
+        self.path = Path(path)
+        # 日付 -> コンテンツID -> 集計値
+        self.buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # セグメント名 -> 集計に反映済みのバイト数
+        self.watermarks: Dict[str, int] = {}
+        self.loaded = self._load()
+
+    def _load(self) -> bool:
+        """スナップショットを読み込む"""
+        if not self.path.exists():
+            return False
+        try:
+            snapshot = json.loads(self.path.read_text(encoding="utf-8"))
+            self.buckets = snapshot["buckets"]
+            self.watermarks = snapshot["watermarks"]
+            return True
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            logger.warning(f"集計値のスナップショットを読み込めないため再集計します: {e}")
+            self.buckets, self.watermarks = {}, {}
+            return False
+
+    def update(self, record: Dict[str, Any]):
+        """
+        イベント1件を集計値に反映
+
+        Args:
+            record: LearningEvent.to_dict()形式のイベント
+        """
+        day = str(record["timestamp"])[:10]
+        content_id = record["content_id"]
+        event_type = record["event_type"]
+        metadata = record.get("metadata") or {}
+
+        bucket = self.buckets.setdefault(day, {}).get(content_id)
+        if bucket is None:
+            bucket = self.buckets[day][content_id] = _new_bucket()
+        bucket["events"][event_type] = bucket["events"].get(event_type, 0) + 1
+
+        if event_type == "quiz_attempt" and metadata:
+            bucket["quiz_attempts"] += 1
+            if metadata.get("correct", False):
+                bucket["quiz_correct"] += 1
+        elif event_type == "time_spent" and "duration_minutes" in metadata:
+            duration = metadata["duration_minutes"]
+            bucket["time_total"] += duration
+            bucket["time_histogram"][bisect.bisect_right(TIME_HISTOGRAM_BOUNDS, duration)] += 1
+
+    def update_many(self, records: Iterable[Dict[str, Any]]):
+        """
+        複数のイベントを集計値に反映
+
+        Args:
+            records: LearningEvent.to_dict()形式のイベント
+        """
+        for record in records:
+            self.update(record)
+
+    def advance_watermarks(self, positions: Iterable[Tuple[Dict[str, Any], str, int, int]]):
+        """
+        ディスクに追記済みで集計に反映済みの位置を進める
+
+        Args:
+            positions: EventStore.append()が返した (イベント, セグメント名, オフセット, 長さ)
+        """
+        for _, segment_name, offset, length in positions:
+            if offset + length > self.watermarks.get(segment_name, 0):
+                self.watermarks[segment_name] = offset + length
+
+    def catch_up(self, event_store: EventStore) -> int:
+        """
+        スナップショットの保存後に追記されたイベント（保存前に終了した場合など）を反映
+        スナップショットがない場合は従来の日次ファイルを含めて全イベントから集計する
+
+        Args:
+            event_store: 集計対象のイベントストア
+
+        Returns:
+            反映したイベント数
+        """
+        applied = 0
+        if not self.loaded:
+            for date_str in event_store.list_dates():
+                for record in event_store.read_legacy_date(date_str):
+                    self.update(record)
+                    applied += 1
+
+        for segment_path in event_store.list_segments():
+            watermark = self.watermarks.get(segment_path.name, 0)
+            if segment_path.stat().st_size <= watermark:
+                continue
+            for offset, length, record in event_store.scan_segment(segment_path, watermark):
+                self.update(record)
+                self.watermarks[segment_path.name] = offset + length
+                applied += 1
+
+        if applied:
+            logger.info(f"コホート集計に{applied}件のイベントを反映しました")
+        return applied
+
+    def save(self):
+        """スナップショットをアトミックに保存"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp{os.getpid()}")
+        tmp_path.write_text(
+            json.dumps({"buckets": self.buckets, "watermarks": self.watermarks}, ensure_ascii=False),
+            encoding="utf-8"
+        )
+        os.replace(tmp_path, self.path)
+
+    def prune(self, before_date: str, existing_segments: Iterable[str]):
+        """
+        保持期間を過ぎた日付の集計値と、削除されたセグメントの位置を除く
+
+        Args:
+            before_date: この日付より前（この日を含まない）の集計値を除く
+            existing_segments: 現存するセグメント名
+        """
+        for day in [day for day in self.buckets if day < before_date]:
+            del self.buckets[day]
+        existing = set(existing_segments)
+        self.watermarks = {name: size for name, size in self.watermarks.items() if name in existing}
+
+    def _iter_buckets(
+        self, start_date: Optional[str], end_date: Optional[str], content_id: Optional[str] = None
+    ) -> Iterable[Tuple[str, str, Dict[str, Any]]]:
+        """期間内の (日付, コンテンツID, 集計値) を列挙"""
+        for day in sorted(self.buckets):
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            contents = self.buckets[day]
+            if content_id is not None:
+                if content_id in contents:
+                    yield day, content_id, contents[content_id]
+                continue
+            for bucket_content_id, bucket in contents.items():
+                yield day, bucket_content_id, bucket
+
+    def get_content_summary(
+        self, content_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        コンテンツの期間内の集計値を取得
+
+        Args:
+            content_id: コンテンツID（章IDやクイズID）
+            start_date: 対象期間の開始日（YYYY-MM-DD、この日を含む。Noneの場合は制限なし）
+            end_date: 対象期間の終了日（YYYY-MM-DD、この日を含む。Noneの場合は制限なし）
+
+        Returns:
+            {"events", "quiz_attempts", "quiz_correct", "correct_ratio",
+             "time_total", "time_histogram", "time_histogram_bounds"}
+        """
+        summary = _new_bucket()
+        for _, _, bucket in self._iter_buckets(start_date, end_date, content_id):
+            for event_type, count in bucket["events"].items():
+                summary["events"][event_type] = summary["events"].get(event_type, 0) + count
+            summary["quiz_attempts"] += bucket["quiz_attempts"]
+            summary["quiz_correct"] += bucket["quiz_correct"]
+            summary["time_total"] += bucket["time_total"]
+            summary["time_histogram"] = [a + b for a, b in zip(summary["time_histogram"], bucket["time_histogram"])]
+
+        attempts = summary["quiz_attempts"]
+        return {
+            "events": summary["events"],
+            "quiz_attempts": attempts,
+            "quiz_correct": summary["quiz_correct"],
+            "correct_ratio": summary["quiz_correct"] / attempts if attempts else None,
+            "time_total": summary["time_total"],
+            "time_histogram": summary["time_histogram"],
+            "time_histogram_bounds": list(TIME_HISTOGRAM_BOUNDS)
+        }
+
+    def get_quiz_scores(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> Dict[str, float]:
+        """
+        期間内のクイズごとの平均正答率を取得
+
+        Args:
+            start_date: 対象期間の開始日（YYYY-MM-DD、この日を含む）
+            end_date: 対象期間の終了日（YYYY-MM-DD、この日を含む）
+
+        Returns:
+            {クイズID: 正答率}
+        """
+        totals: Dict[str, List[int]] = {}
+        for _, quiz_id, bucket in self._iter_buckets(start_date, end_date):
+            if bucket["quiz_attempts"]:
+                total = totals.setdefault(quiz_id, [0, 0])
+                total[0] += bucket["quiz_correct"]
+                total[1] += bucket["quiz_attempts"]
+        return {quiz_id: correct / attempts for quiz_id, (correct, attempts) in totals.items()}
+
+    def get_daily_counts(
+        self,
+        event_type: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        日別のイベント数を取得
+
+        Args:
+            event_type: 対象のイベント種別（Noneの場合は全種別）
+            start_date: 対象期間の開始日（YYYY-MM-DD、この日を含む）
+            end_date: 対象期間の終了日（YYYY-MM-DD、この日を含む）
+
+        Returns:
+            {日付: イベント数}
+        """
+        counts: Dict[str, int] = {}
+        for day, _, bucket in self._iter_buckets(start_date, end_date):
+            events = bucket["events"]
+            count = events.get(event_type, 0) if event_type else sum(events.values())
+            counts[day] = counts.get(day, 0) + count
+        return counts
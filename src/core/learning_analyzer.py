@@ -3,13 +3,27 @@
 学習者の行動データを収集・分析し、適応的な学習体験を提供する
 """
 
+import os
 import json
+import time
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Deque, Iterable, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from .event_store import EventStore
+from .event_index import UserEventIndex, INDEX_FILENAME
+from .progress_cache import ProgressCache
+from .learning_aggregates import CohortAggregates, AGGREGATES_FILENAME
+from .retention import RetentionManager, RetentionPolicy, RetentionReport, SegmentManifest, MANIFEST_FILENAME
+from .adaptive_decisions import AdaptiveDecisionTable, build_content_config, decide_difficulty_level, decide_user_levels
+from .analytics_store import AnalyticsStore, events_to_frame, compute_progress, _require_parquet_engine
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +43,17 @@ class LearningEvent:
         data['timestamp'] = self.timestamp.isoformat()
         return data
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LearningEvent":
+        """辞書形式から復元"""
+        return cls(
+            user_id=data['user_id'],
+            event_type=data['event_type'],
+            content_id=data['content_id'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            metadata=data.get('metadata', {})
+        )
+
 
 @dataclass
 class LearningProgress:
@@ -42,25 +67,215 @@ class LearningProgress:
     last_updated: datetime
 
 
+def calculate_progress(
+    user_id: str, events: List[LearningEvent], difficulty_threshold: float = 0.6
+) -> LearningProgress:
+    """
+    1ユーザーのイベントから学習進捗を計算
+
+    Args:
+        user_id: ユーザーID
+        events: ユーザーの学習イベント（時系列順）
+        difficulty_threshold: 苦手分野と判定する正答率の閾値
+
+    Returns:
+        学習進捗分析結果
+    """
+    content_completion = {}
+    quiz_performance = {}
+    time_spent = defaultdict(float)
+    quiz_attempts = defaultdict(list)
+    
+    # イベントデータを分析
+    for event in events:
+        content_id = event.content_id
+        
+        if event.event_type == 'page_view':
+            content_completion[content_id] = content_completion.get(content_id, 0) + 0.1
+        
+        elif event.event_type == 'time_spent':
+            if event.metadata and 'duration_minutes' in event.metadata:
+                time_spent[content_id] += event.metadata['duration_minutes']
+        
+        elif event.event_type == 'quiz_attempt':
+            if event.metadata:
+                quiz_attempts[content_id].append({
+                    'correct': event.metadata.get('correct', False),
+                    'timestamp': event.timestamp
+                })
+    
+    # コンテンツ完了率を正規化 (最大1.0)
+    for content_id in content_completion:
+        content_completion[content_id] = min(1.0, content_completion[content_id])
+    
+    # クイズ性能を計算
+    for quiz_id, attempts in quiz_attempts.items():
+        if attempts:
+            correct_count = sum(1 for attempt in attempts if attempt['correct'])
+            quiz_performance[quiz_id] = correct_count / len(attempts)
+    
+    # 苦手分野を特定
+    difficulty_areas = [
+        quiz_id for quiz_id, performance in quiz_performance.items()
+        if performance < difficulty_threshold
+    ]
+    
+    # 推奨コンテンツを生成
+    recommended_content = generate_recommendations(
+        content_completion, quiz_performance, difficulty_areas
+    )
+    
+    return LearningProgress(
+        user_id=user_id,
+        content_completion=content_completion,
+        quiz_performance=quiz_performance,
+        time_spent=dict(time_spent),
+        difficulty_areas=difficulty_areas,
+        recommended_content=recommended_content,
+        last_updated=datetime.now()
+    )
+
+
+def generate_recommendations(content_completion: Dict[str, float],
+                             quiz_performance: Dict[str, float],
+                             difficulty_areas: List[str]) -> List[str]:
+    """推奨コンテンツを生成"""
+    recommendations = []
+    
+    # 苦手分野の復習を優先的に推奨
+    for area in difficulty_areas:
+        recommendations.append(f"復習推奨: {area}")
+    
+    # 未完了コンテンツで、完了率が高いものを推奨
+    incomplete_content = [
+        (content_id, completion) 
+        for content_id, completion in content_completion.items()
+        if completion < 0.8
+    ]
+    
+    # 完了率順でソート
+    incomplete_content.sort(key=lambda x: x[1], reverse=True)
+    
+    for content_id, _ in incomplete_content[:3]:  # 上位3つを推奨
+        recommendations.append(f"継続学習推奨: {content_id}")
+    
+    return recommendations
+
+
+def build_learning_report(progress: LearningProgress) -> Dict[str, Any]:
+    """
+    学習進捗から学習レポートを構築
+
+    Args:
+        progress: 学習進捗分析結果
+
+    Returns:
+        学習レポート (HTMLレンダリング用のデータ)
+    """
+    return {
+        'user_id': progress.user_id,
+        'generated_at': datetime.now().isoformat(),
+        'overall_completion': sum(progress.content_completion.values()) / len(progress.content_completion) if progress.content_completion else 0,
+        'average_quiz_score': sum(progress.quiz_performance.values()) / len(progress.quiz_performance) if progress.quiz_performance else 0,
+        'total_study_time': sum(progress.time_spent.values()),
+        'strengths': [
+            quiz_id for quiz_id, score in progress.quiz_performance.items()
+            if score >= 0.8
+        ],
+        'areas_for_improvement': progress.difficulty_areas,
+        'recommendations': progress.recommended_content,
+        'progress_by_content': progress.content_completion,
+        'quiz_scores': progress.quiz_performance
+    }
+
+
+def _build_reports_for_users(
+    user_batch: List[Tuple[str, List[Dict[str, Any]]]], difficulty_threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    ワーカープロセスでユーザーごとの学習レポートを構築
+
+    Args:
+        user_batch: (ユーザーID, イベントの辞書リスト) のリスト
+        difficulty_threshold: 苦手分野と判定する正答率の閾値
+
+    Returns:
+        学習レポートのリスト（入力順）
+    """
+    return [
+        build_learning_report(calculate_progress(
+            user_id, [LearningEvent.from_dict(record) for record in records], difficulty_threshold
+        ))
+        for user_id, records in user_batch
+    ]
+
+
 class LearningAnalyzer:
     """
     学習分析・フィードバック機能の中核クラス
     学習者の行動データを収集・分析し、パーソナライズされた学習体験を提供
     """
     
-    def __init__(self, data_dir: Path = None):
+    def __init__(
+        self,
+        data_dir: Path = None,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        fsync_policy: str = "always",
+        progress_cache_size: int = 10000,
+        progress_cache_ttl: float = 3600.0,
+        decision_refresh_delay: float = 1.0
+    ):
         """
         初期化
         
         Args:
             data_dir: データ保存ディレクトリ
+            segment_max_bytes: イベントセグメント1つあたりの上限サイズ（バイト）
+            fsync_policy: イベント追記後のfsyncポリシー（"always" / "interval" / "never"）
+            progress_cache_size: 分析結果をキャッシュするユーザー数の上限
+            progress_cache_ttl: 分析結果のキャッシュの有効期限（秒）
+            decision_refresh_delay: ディスク保存後に適応的コンテンツ設定を再計算するまでの待ち時間（秒）
         """
         self.data_dir = data_dir or Path("data/learning_analytics")
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.event_store = EventStore(
+            self.data_dir,
+            segment_max_bytes=segment_max_bytes,
+            fsync_policy=fsync_policy
+        )
+        # ユーザーID -> イベント位置の索引（索引更新前に中断された追記分を補う）
+        self.event_index = UserEventIndex(self.data_dir / INDEX_FILENAME)
+        self.event_index.sync(self.event_store)
+        # 日付・イベント種別で分割した列指向ストア（compact_events()で作成）
+        self.analytics_store = AnalyticsStore(self.data_dir / "columnar")
+        # 日別・コンテンツ別の集計値（記録時に更新し、ディスク保存時にスナップショットを保存）
+        self.aggregates = CohortAggregates(self.data_dir / AGGREGATES_FILENAME)
+        if self.aggregates.catch_up(self.event_store):
+            self.aggregates.save()
+        # セグメントごとのイベント種別・期間（保持期間の判定に使う）
+        self.segment_manifest = SegmentManifest(self.data_dir / MANIFEST_FILENAME)
+        if self.segment_manifest.sync(self.event_store):
+            self.segment_manifest.save()
+        # 追記と保持期間による書き直しを直列化する
+        self._store_lock = threading.RLock()
+        self.retention = RetentionManager(
+            self.event_store, self.segment_manifest, self._store_lock, analytics_store=self.analytics_store
+        )
+        self._retention_executor: Optional[ThreadPoolExecutor] = None
+        # ユーザー×コンテンツの適応的設定（圧縮時に全体を、ディスク保存後にバックグラウンドで該当ユーザー分を事前計算する）
+        self.adaptive_decisions = AdaptiveDecisionTable(self.data_dir / "adaptive_decisions")
+        # 設定の再計算を待っているユーザー -> 変更番号（再計算中に保存されたユーザーを取りこぼさないため）
+        self.decision_refresh_delay = decision_refresh_delay
+        self._dirty_decisions: Dict[str, int] = {}
+        self._dirty_seq = 0
+        self._decision_lock = threading.Lock()
+        self._decision_timer: Optional[threading.Timer] = None
         
         # 学習イベントのメモリ内キャッシュ
         self._event_cache: List[LearningEvent] = []
-        self._progress_cache: Dict[str, LearningProgress] = {}
+        # メモリキャッシュにイベントがあるユーザー（事前計算した設定が古い）
+        self._pending_users: set = set()
+        self._progress_cache = ProgressCache(progress_cache_size, progress_cache_ttl)
         
         # 設定
         self.cache_size_limit = 1000
@@ -75,8 +290,13 @@ class LearningAnalyzer:
             event: 学習イベント
         """
         try:
-            # メモリキャッシュに追加
-            self._event_cache.append(event)
+            # メモリキャッシュに追加（ディスク保存中のキャッシュの入れ替えと直列化する）
+            with self._store_lock:
+                self._event_cache.append(event)
+                self._pending_users.add(event.user_id)
+                self.aggregates.update(event.to_dict())
+            # このユーザーの分析結果は古くなるため破棄
+            self._progress_cache.invalidate(event.user_id)
             
             # キャッシュサイズ制限をチェック
             if len(self._event_cache) > self.cache_size_limit:
@@ -87,44 +307,63 @@ class LearningAnalyzer:
         except Exception as e:
             logger.error(f"学習イベントのログ記録中にエラー: {e}")
     
-    def _flush_events_to_disk(self) -> None:
-        """メモリキャッシュのイベントをディスクに保存"""
-        if not self._event_cache:
-            return
-            
+    def log_events(self, events: List[LearningEvent]) -> None:
+        """
+        複数の学習イベントをまとめてログに記録
+        
+        Args:
+            events: 学習イベントのリスト
+        """
         try:
-            # 日付別にファイルを分ける
-            events_by_date = defaultdict(list)
-            for event in self._event_cache:
-                date_str = event.timestamp.strftime('%Y-%m-%d')
-                events_by_date[date_str].append(event.to_dict())
+            with self._store_lock:
+                self._event_cache.extend(events)
+                self._pending_users.update(event.user_id for event in events)
+                self.aggregates.update_many(event.to_dict() for event in events)
+            for user_id in {event.user_id for event in events}:
+                self._progress_cache.invalidate(user_id)
             
-            # ファイルに保存
-            for date_str, events in events_by_date.items():
-                file_path = self.data_dir / f"events_{date_str}.json"
-                
-                # 既存ファイルがあれば読み込んで結合
-                existing_events = []
-                if file_path.exists():
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            existing_events = json.load(f)
-                    except (json.JSONDecodeError, IOError) as e:
-                        logger.warning(f"既存イベントファイルの読み込みに失敗: {e}")
-                
-                # 新しいイベントを追加
-                all_events = existing_events + events
-                
-                # ファイルに書き込み
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(all_events, f, ensure_ascii=False, indent=2)
+            if len(self._event_cache) > self.cache_size_limit:
+                self._flush_events_to_disk()
             
-            # キャッシュをクリア
-            self._event_cache.clear()
-            logger.info(f"{len(events_by_date)}日分の学習イベントをディスクに保存しました")
+            logger.debug(f"{len(events)}件の学習イベントを記録")
             
         except Exception as e:
-            logger.error(f"学習イベントのディスク保存中にエラー: {e}")
+            logger.error(f"学習イベントのログ記録中にエラー: {e}")
+    
+    def flush_events(self) -> None:
+        """メモリキャッシュのイベントを直ちにディスクに保存"""
+        self._flush_events_to_disk()
+    
+    def _flush_events_to_disk(self) -> None:
+        """メモリキャッシュのイベントをディスクに保存"""
+        # 索引に追加したイベントとメモリキャッシュのイベントが同時に見えないよう、
+        # キャッシュの入れ替えから索引の更新までをロックの中で行う
+        with self._store_lock:
+            if not self._event_cache:
+                return
+            events, self._event_cache = self._event_cache, []
+            flushed_users, self._pending_users = self._pending_users, set()
+
+            try:
+                # 日付別のセグメントに新しいイベントだけを追記
+                positions = self.event_store.append(event.to_dict() for event in events)
+                self.event_index.add(positions)
+                self.segment_manifest.add(positions)
+                self.segment_manifest.save()
+                self.aggregates.advance_watermarks(positions)
+                self.aggregates.save()
+            except Exception as e:
+                # 保存できなかったイベントは次のディスク保存で再試行する
+                self._event_cache[:0] = events
+                self._pending_users.update(flushed_users)
+                logger.error(f"学習イベントのディスク保存中にエラー: {e}")
+                return
+
+            # 未保存のユーザーから再計算待ちのユーザーへ、事前計算したテーブルを使わない状態のまま移す
+            self._mark_decisions_dirty(flushed_users)
+
+        days = len({event.timestamp.date() for event in events})
+        logger.info(f"{days}日分の学習イベントをディスクに保存しました")
     
     def analyze_user_progress(self, user_id: str) -> Optional[LearningProgress]:
         """
@@ -137,12 +376,12 @@ class LearningAnalyzer:
             学習進捗分析結果
         """
         try:
-            # キャッシュされた分析結果をチェック
-            if user_id in self._progress_cache:
-                cached_progress = self._progress_cache[user_id]
-                # 最新データから1時間以内ならキャッシュを使用
-                if datetime.now() - cached_progress.last_updated < timedelta(hours=1):
-                    return cached_progress
+            # キャッシュされた分析結果をチェック（有効期限内かつ新しいイベントがない場合のみ）
+            cached_progress = self._progress_cache.get(user_id)
+            if cached_progress is not None:
+                return cached_progress
+            # 分析中に新しいイベントが記録された場合は、古い結果をキャッシュしない
+            version = self._progress_cache.version(user_id)
             
             # イベントデータを読み込み
             events = self._load_user_events(user_id)
@@ -154,7 +393,7 @@ class LearningAnalyzer:
             progress = self._calculate_progress(user_id, events)
             
             # キャッシュに保存
-            self._progress_cache[user_id] = progress
+            self._progress_cache.put(user_id, progress, version)
             
             return progress
             
@@ -162,8 +401,36 @@ class LearningAnalyzer:
             logger.error(f"学習進捗分析中にエラー: {e}")
             return None
     
+    def get_progress_cache_stats(self) -> Dict[str, int]:
+        """
+        学習進捗キャッシュの統計情報を取得
+
+        Returns:
+            {"hits", "misses", "evictions", "expirations", "invalidations", "size"}
+        """
+        return self._progress_cache.get_stats()
+
+    def get_quiz_scores(self, start_date: datetime, end_date: datetime) -> Dict[str, float]:
+        """
+        期間内のクイズごとの平均正答率を集計値から取得（生のイベントは読み込まない）
+
+        Args:
+            start_date: 対象期間の開始日（この日を含む）
+            end_date: 対象期間の終了日（この日を含む）
+
+        Returns:
+            {クイズID: 正答率}
+        """
+        return self.aggregates.get_quiz_scores(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+    
     def _load_user_events(self, user_id: str) -> List[LearningEvent]:
         """ユーザーのイベントデータを読み込み"""
+        # メモリキャッシュと索引を同じ時点で読む（ディスク保存の途中では同じイベントが両方に見える）
+        with self._store_lock:
+            return self._load_user_events_locked(user_id)
+
+    def _load_user_events_locked(self, user_id: str) -> List[LearningEvent]:
+        """_load_user_events()の本体（_store_lockを保持して呼ぶ）"""
         events = []
         
         # メモリキャッシュからユーザーのイベントを取得
@@ -175,114 +442,186 @@ class LearningAnalyzer:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=self.time_window_days)
         
-        for i in range(self.time_window_days + 1):
-            date = start_date + timedelta(days=i)
-            date_str = date.strftime('%Y-%m-%d')
-            file_path = self.data_dir / f"events_{date_str}.json"
+        start_str, end_str = start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+        for date_str in self.event_store.list_legacy_dates():
+            if not (start_str <= date_str <= end_str):
+                continue
             
-            if file_path.exists():
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        day_events = json.load(f)
-                    
-                    # ユーザーのイベントのみを抽出
-                    for event_data in day_events:
-                        if event_data.get('user_id') == user_id:
-                            event = LearningEvent(
-                                user_id=event_data['user_id'],
-                                event_type=event_data['event_type'],
-                                content_id=event_data['content_id'],
-                                timestamp=datetime.fromisoformat(event_data['timestamp']),
-                                metadata=event_data.get('metadata', {})
-                            )
-                            events.append(event)
-                            
-                except Exception as e:
-                    logger.warning(f"イベントファイル {file_path} の読み込みに失敗: {e}")
+            try:
+                # 索引のない従来の日次ファイルからユーザーのイベントのみを抽出
+                for event_data in self.event_store.read_legacy_date(date_str):
+                    if event_data.get('user_id') == user_id:
+                        events.append(LearningEvent.from_dict(event_data))
+                        
+            except Exception as e:
+                logger.warning(f"{date_str}のイベントの読み込みに失敗: {e}")
+        
+        # 索引からユーザーの記録の位置だけを読み込む
+        try:
+            positions = self.event_index.lookup(
+                user_id, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+            )
+            for event_data in self.event_store.read_many(positions):
+                events.append(LearningEvent.from_dict(event_data))
+        except Exception as e:
+            logger.warning(f"ユーザー {user_id} のイベントの読み込みに失敗: {e}")
         
         return events
     
     def _calculate_progress(self, user_id: str, events: List[LearningEvent]) -> LearningProgress:
         """学習進捗を計算"""
-        content_completion = {}
-        quiz_performance = {}
-        time_spent = defaultdict(float)
-        quiz_attempts = defaultdict(list)
-        
-        # イベントデータを分析
-        for event in events:
-            content_id = event.content_id
-            
-            if event.event_type == 'page_view':
-                content_completion[content_id] = content_completion.get(content_id, 0) + 0.1
-            
-            elif event.event_type == 'time_spent':
-                if event.metadata and 'duration_minutes' in event.metadata:
-                    time_spent[content_id] += event.metadata['duration_minutes']
-            
-            elif event.event_type == 'quiz_attempt':
-                if event.metadata:
-                    quiz_attempts[content_id].append({
-                        'correct': event.metadata.get('correct', False),
-                        'timestamp': event.timestamp
-                    })
-        
-        # コンテンツ完了率を正規化 (最大1.0)
-        for content_id in content_completion:
-            content_completion[content_id] = min(1.0, content_completion[content_id])
-        
-        # クイズ性能を計算
-        for quiz_id, attempts in quiz_attempts.items():
-            if attempts:
-                correct_count = sum(1 for attempt in attempts if attempt['correct'])
-                quiz_performance[quiz_id] = correct_count / len(attempts)
-        
-        # 苦手分野を特定
-        difficulty_areas = [
-            quiz_id for quiz_id, performance in quiz_performance.items()
-            if performance < self.difficulty_threshold
-        ]
-        
-        # 推奨コンテンツを生成
-        recommended_content = self._generate_recommendations(
-            content_completion, quiz_performance, difficulty_areas
-        )
-        
-        return LearningProgress(
-            user_id=user_id,
-            content_completion=content_completion,
-            quiz_performance=quiz_performance,
-            time_spent=dict(time_spent),
-            difficulty_areas=difficulty_areas,
-            recommended_content=recommended_content,
-            last_updated=datetime.now()
-        )
+        return calculate_progress(user_id, events, self.difficulty_threshold)
+    
+    def compact_events(self, until_date: Optional[str] = None) -> List[str]:
+        """
+        確定した日付のイベントログをParquetのパーティションに圧縮
+
+        Args:
+            until_date: この日付より前（この日を含まない）を圧縮する。省略時は本日
+
+        Returns:
+            圧縮した日付のリスト
+        """
+        self._flush_events_to_disk()
+        compacted = self.analytics_store.compact(self.event_store, until_date)
+        self.materialize_adaptive_decisions()
+        return compacted
+
+    def materialize_adaptive_decisions(self) -> None:
+        """全ユーザーの適応的コンテンツ設定を事前計算してテーブルを作り直す"""
+        with self._decision_lock:
+            dirty = dict(self._dirty_decisions)
+        try:
+            self.adaptive_decisions.materialize({
+                user_id: decide_user_levels(progress.content_completion, progress.quiz_performance)
+                for user_id, progress in self.analyze_all_users().items()
+            })
+        except Exception as e:
+            logger.error(f"適応的コンテンツ設定の事前計算中にエラー: {e}")
+            return
+        # 作り直す前に保存されていたユーザーは反映済み
+        self._clear_dirty_decisions(dirty)
+
+    def _mark_decisions_dirty(self, user_ids: Iterable[str]) -> None:
+        """
+        ユーザーの適応的コンテンツ設定を再計算待ちにし、まだ予約されていなければ再計算を予約する
+        待ち時間の間に保存されたユーザーはまとめて1回で再計算する
+        """
+        with self._decision_lock:
+            for user_id in user_ids:
+                self._dirty_seq += 1
+                self._dirty_decisions[user_id] = self._dirty_seq
+            if not self._dirty_decisions or self._decision_timer is not None:
+                return
+            self._decision_timer = threading.Timer(self.decision_refresh_delay, self._refresh_dirty_decisions)
+            self._decision_timer.daemon = True
+            self._decision_timer.start()
+
+    def refresh_adaptive_decisions(self) -> None:
+        """予約中の適応的コンテンツ設定の再計算を待たずに実行"""
+        with self._decision_lock:
+            if self._decision_timer is not None:
+                self._decision_timer.cancel()
+        self._refresh_dirty_decisions()
+
+    def _refresh_dirty_decisions(self) -> None:
+        """再計算待ちのユーザーの適応的コンテンツ設定を再計算してテーブルに反映"""
+        with self._decision_lock:
+            self._decision_timer = None
+            dirty = dict(self._dirty_decisions)
+        if not dirty:
+            return
+
+        levels_by_user = {}
+        try:
+            for user_id in dirty:
+                # 再計算中に記録されたイベントで無効化された結果を書き戻さないよう、キャッシュは使わない
+                events = self._load_user_events(user_id)
+                if events:
+                    progress = self._calculate_progress(user_id, events)
+                    levels_by_user[user_id] = decide_user_levels(
+                        progress.content_completion, progress.quiz_performance
+                    )
+            if levels_by_user:
+                self.adaptive_decisions.update(levels_by_user)
+        except Exception as e:
+            logger.error(f"適応的コンテンツ設定の事前計算中にエラー: {e}")
+            return
+        self._clear_dirty_decisions(dirty)
+
+    def _clear_dirty_decisions(self, snapshot: Dict[str, int]) -> None:
+        """再計算を反映したユーザーを再計算待ちから外す（その後に保存されたユーザーは残す）"""
+        with self._decision_lock:
+            for user_id, seq in snapshot.items():
+                if self._dirty_decisions.get(user_id) == seq:
+                    del self._dirty_decisions[user_id]
+
+    def load_events_frame(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        期間内の全ユーザーのイベントをDataFrameとして読み込む
+        圧縮済みの日付はParquetと圧縮後に追記された分のイベントログから、
+        それ以外はイベントログとメモリキャッシュから読み込む
+
+        Args:
+            start_date: 対象期間の開始日時
+            end_date: 対象期間の終了日時
+
+        Returns:
+            events_to_frame()形式のDataFrame
+        """
+        start_str, end_str = start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+        frames = [self.analytics_store.load(start_str, end_str)]
+
+        raw_records = []
+        # イベントログとメモリキャッシュを同じ時点で読む
+        with self._store_lock:
+            for date_str in self.event_store.list_dates():
+                if not start_str <= date_str <= end_str:
+                    continue
+                if self.analytics_store.is_compacted(date_str):
+                    # 圧縮後に遅れて届いたイベント（再送・圧縮後のディスク保存）
+                    raw_records.extend(self.analytics_store.read_tail(self.event_store, date_str))
+                else:
+                    raw_records.extend(self.event_store.read_date(date_str))
+            raw_records.extend(event.to_dict() for event in self._event_cache)
+        frames.append(events_to_frame(raw_records))
+
+        return pd.concat(frames, ignore_index=True)
+
+    def analyze_all_users(self) -> Dict[str, LearningProgress]:
+        """
+        分析対象期間の全ユーザーの学習進捗をベクトル化した集計で一括分析
+
+        Returns:
+            {ユーザーID: 学習進捗分析結果}
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=self.time_window_days)
+        events = self.load_events_frame(start_date, end_date)
+
+        progress_by_user = {}
+        now = datetime.now()
+        for user_id, result in compute_progress(events, self.difficulty_threshold).items():
+            progress_by_user[user_id] = LearningProgress(
+                user_id=user_id,
+                content_completion=result['content_completion'],
+                quiz_performance=result['quiz_performance'],
+                time_spent=result['time_spent'],
+                difficulty_areas=result['difficulty_areas'],
+                recommended_content=self._generate_recommendations(
+                    result['content_completion'], result['quiz_performance'], result['difficulty_areas']
+                ),
+                last_updated=now
+            )
+        logger.info(f"{len(progress_by_user)}人の学習進捗を一括分析しました（{len(events)}件のイベント）")
+        return progress_by_user
     
     def _generate_recommendations(self, 
                                   content_completion: Dict[str, float],
                                   quiz_performance: Dict[str, float],
                                   difficulty_areas: List[str]) -> List[str]:
         """推奨コンテンツを生成"""
-        recommendations = []
-        
-        # 苦手分野の復習を優先的に推奨
-        for area in difficulty_areas:
-            recommendations.append(f"復習推奨: {area}")
-        
-        # 未完了コンテンツで、完了率が高いものを推奨
-        incomplete_content = [
-            (content_id, completion) 
-            for content_id, completion in content_completion.items()
-            if completion < 0.8
-        ]
-        
-        # 完了率順でソート
-        incomplete_content.sort(key=lambda x: x[1], reverse=True)
-        
-        for content_id, _ in incomplete_content[:3]:  # 上位3つを推奨
-            recommendations.append(f"継続学習推奨: {content_id}")
-        
-        return recommendations
+        return generate_recommendations(content_completion, quiz_performance, difficulty_areas)
     
     def generate_learning_report(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -298,29 +637,152 @@ class LearningAnalyzer:
         if not progress:
             return None
         
-        # レポートデータを構築
-        report = {
-            'user_id': user_id,
-            'generated_at': datetime.now().isoformat(),
-            'overall_completion': sum(progress.content_completion.values()) / len(progress.content_completion) if progress.content_completion else 0,
-            'average_quiz_score': sum(progress.quiz_performance.values()) / len(progress.quiz_performance) if progress.quiz_performance else 0,
-            'total_study_time': sum(progress.time_spent.values()),
-            'strengths': [
-                quiz_id for quiz_id, score in progress.quiz_performance.items()
-                if score >= 0.8
-            ],
-            'areas_for_improvement': progress.difficulty_areas,
-            'recommendations': progress.recommended_content,
-            'progress_by_content': progress.content_completion,
-            'quiz_scores': progress.quiz_performance
+        return build_learning_report(progress)
+
+    def generate_reports_bulk(
+        self,
+        output_path: Path,
+        max_workers: int = 1,
+        batch_size: int = 500
+    ) -> Dict[str, Any]:
+        """
+        分析対象期間の全ユーザーの学習レポートを一括生成して1つのファイルに出力
+        ユーザーの索引からbatch_size人ずつイベントを読み込み、ワーカープロセスで並列に集計して
+        集計の終わったバッチから順に書き出す（全ユーザーのイベントをまとめて保持しない）
+
+        Args:
+            output_path: 出力先（拡張子が.parquetの場合はParquet、それ以外はJSON Lines）
+            max_workers: 集計に使用するプロセス数（1の場合は逐次処理）
+            batch_size: ワーカーに一度に渡すユーザー数
+
+        Returns:
+            処理件数と処理速度の指標
+        """
+        started = time.perf_counter()
+        self._flush_events_to_disk()
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=self.time_window_days)
+        start_str, end_str = start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+        dates = [d for d in self.event_store.list_dates() if start_str <= d <= end_str]
+        # 索引のない従来の日次ファイルは日付ごとに一度だけ読み込んでユーザーごとに振り分ける
+        legacy_by_user: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for date_str in self.event_store.list_legacy_dates():
+            if start_str <= date_str <= end_str:
+                for record in self.event_store.read_legacy_date(date_str):
+                    legacy_by_user[record['user_id']].append(record)
+        with self._store_lock:
+            user_ids = sorted(set(self.event_index.list_users(start_str, end_str)) | set(legacy_by_user))
+
+        totals = {'events': 0, 'users': 0, 'load_seconds': 0.0}
+
+        def load_batches():
+            """batch_size人ずつ、索引を使って期間内のイベントを読み込む"""
+            for i in range(0, len(user_ids), batch_size):
+                load_started = time.perf_counter()
+                batch = []
+                with self._store_lock:
+                    for user_id in user_ids[i:i + batch_size]:
+                        records = legacy_by_user.pop(user_id, [])
+                        positions = self.event_index.lookup(user_id, start_str, end_str)
+                        records.extend(self.event_store.read_many(positions))
+                        if not records:
+                            continue
+                        # 従来の日次ファイルのイベントも日付順に並べる（同じ日付では従来のファイルが先）
+                        records.sort(key=lambda record: str(record['timestamp'])[:10])
+                        batch.append((user_id, records))
+                        totals['events'] += len(records)
+                totals['load_seconds'] += time.perf_counter() - load_started
+                if batch:
+                    yield batch
+
+        def build_batches(workers: int):
+            """バッチを集計し、投入順に学習レポートのリストを返す"""
+            if workers <= 1:
+                for batch in load_batches():
+                    yield _build_reports_for_users(batch, self.difficulty_threshold)
+                return
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # 読み込み済みのバッチはワーカーあたり2つまで（未処理のイベントを溜め込まない）
+                pending: Deque[Future] = deque()
+                for batch in load_batches():
+                    pending.append(executor.submit(_build_reports_for_users, batch, self.difficulty_threshold))
+                    if len(pending) >= workers * 2:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+
+        def counted(report_batches):
+            """書き出したレポート数を数える"""
+            for reports in report_batches:
+                totals['users'] += len(reports)
+                yield reports
+
+        workers = min(max(1, max_workers), max(1, -(-len(user_ids) // batch_size)))
+        self._write_reports(Path(output_path), counted(build_batches(workers)))
+
+        elapsed = time.perf_counter() - started
+        event_count, user_count = totals['events'], totals['users']
+        metrics = {
+            'users': user_count,
+            'events': event_count,
+            'days': len(dates),
+            'workers': workers,
+            'load_seconds': totals['load_seconds'],
+            'elapsed_seconds': elapsed,
+            'events_per_second': event_count / elapsed if elapsed else 0.0,
+            'reports_per_second': user_count / elapsed if elapsed else 0.0,
+            'output_path': str(output_path)
         }
-        
-        return report
-    
+        logger.info(
+            f"{user_count}人分の学習レポートを生成しました: {event_count}件のイベント, "
+            f"{elapsed:.2f}秒 ({metrics['events_per_second']:.0f}件/秒, ワーカー{workers})"
+        )
+        return metrics
+
+    def _write_reports(self, output_path: Path, report_batches: Iterable[List[Dict[str, Any]]]):
+        """学習レポートをバッチごとに一時ファイルへ追記し、書き終えてから出力先に置き換える"""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp{os.getpid()}")
+        try:
+            if output_path.suffix == '.parquet':
+                _require_parquet_engine()
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                # バッチごとに型が推論されて食い違わないよう、列の型を固定する
+                # 集計結果の辞書・リストはキーがユーザーごとに異なるためJSON文字列で保存する
+                schema = pa.schema([
+                    ('user_id', pa.string()), ('generated_at', pa.string()),
+                    ('overall_completion', pa.float64()), ('average_quiz_score', pa.float64()),
+                    ('total_study_time', pa.float64()), ('strengths', pa.string()),
+                    ('areas_for_improvement', pa.string()), ('recommendations', pa.string()),
+                    ('progress_by_content', pa.string()), ('quiz_scores', pa.string())
+                ])
+                with pq.ParquetWriter(tmp_path, schema) as writer:
+                    for reports in report_batches:
+                        frame = pd.DataFrame([
+                            {key: json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                             for key, value in report.items()}
+                            for report in reports
+                        ], columns=schema.names)
+                        writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            else:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for reports in report_batches:
+                        for report in reports:
+                            f.write(json.dumps(report, ensure_ascii=False))
+                            f.write('\n')
+            os.replace(tmp_path, output_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
     def get_adaptive_content_config(self, user_id: str, content_id: str) -> Dict[str, Any]:
         """
         適応的コンテンツの設定を生成
         学習者の理解度に基づいてコンテンツの表示方法を調整
+        事前計算したテーブルにあればそれを返し、未保存のイベントがあるユーザー、再計算待ちのユーザー、
+        テーブルにないユーザーはその場で分析する
         
         Args:
             user_id: ユーザーID
@@ -329,6 +791,11 @@ class LearningAnalyzer:
         Returns:
             適応的設定 (難易度調整、追加説明の表示など)
         """
+        if user_id not in self._pending_users and user_id not in self._dirty_decisions:
+            config = self.adaptive_decisions.lookup(user_id, content_id)
+            if config is not None:
+                return config
+        
         progress = self.analyze_user_progress(user_id)
         if not progress:
             return {'difficulty_level': 'standard'}
@@ -337,50 +804,67 @@ class LearningAnalyzer:
         quiz_performance = progress.quiz_performance.get(content_id, 0.5)
         completion_rate = progress.content_completion.get(content_id, 0.0)
         
-        config = {
-            'difficulty_level': 'standard',
-            'show_additional_examples': False,
-            'show_prerequisite_review': False,
-            'show_advanced_topics': False
-        }
-        
-        # 低い性能の場合：追加サポート
-        if quiz_performance < 0.4 or completion_rate < 0.3:
-            config.update({
-                'difficulty_level': 'beginner',
-                'show_additional_examples': True,
-                'show_prerequisite_review': True
-            })
-        
-        # 高い性能の場合：発展的内容
-        elif quiz_performance > 0.8 and completion_rate > 0.8:
-            config.update({
-                'difficulty_level': 'advanced',
-                'show_advanced_topics': True
-            })
-        
-        return config
+        return build_content_config(decide_difficulty_level(quiz_performance, completion_rate))
     
-    def cleanup_old_data(self, days_to_keep: int = 90) -> None:
-        """古い分析データを削除"""
+    def cleanup_old_data(
+        self,
+        days_to_keep: int = 90,
+        event_type_days: Optional[Dict[str, int]] = None,
+        background: bool = False
+    ) -> Union[Optional[RetentionReport], Future]:
+        """
+        保持期間を過ぎたイベントを削除
+        全イベントが期限切れのセグメントは削除し、一部が期限切れのセグメントは残りのイベントで書き直す
+
+        Args:
+            days_to_keep: イベントの保持日数
+            event_type_days: イベント種別ごとの保持日数（指定のない種別はdays_to_keep）
+            background: Trueの場合はバックグラウンドのスレッドで実行してFutureを返す
+
+        Returns:
+            適用結果（backgroundがTrueの場合はそのFuture、エラー時はNone）
+        """
+        policy = RetentionPolicy(days_to_keep, dict(event_type_days or {}))
+        if background:
+            if self._retention_executor is None:
+                self._retention_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retention")
+            return self._retention_executor.submit(self._apply_retention, policy)
+        return self._apply_retention(policy)
+
+    def _apply_retention(self, policy: RetentionPolicy) -> Optional[RetentionReport]:
+        """保持期間を適用し、索引と集計値を追従させる"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-            deleted_count = 0
-            
-            for file_path in self.data_dir.glob("events_*.json"):
-                # ファイル名から日付を抽出
-                try:
-                    date_str = file_path.stem.replace('events_', '')
-                    file_date = datetime.strptime(date_str, '%Y-%m-%d')
-                    
-                    if file_date < cutoff_date:
-                        file_path.unlink()
-                        deleted_count += 1
-                        
-                except ValueError:
-                    logger.warning(f"不正なファイル名をスキップ: {file_path}")
-            
-            logger.info(f"{deleted_count}個の古いデータファイルを削除しました")
-            
+            now = datetime.now()
+            report = self.retention.apply(policy, now, self._on_segment_changed)
+            with self._store_lock:
+                self.event_index.sync(self.event_store)
+                existing_segments = [path.name for path in self.event_store.list_segments()]
+                self.aggregates.prune(
+                    (now - timedelta(days=policy.longest_days)).strftime('%Y-%m-%d'), existing_segments
+                )
+                self.aggregates.save()
+            # 削除されたイベントを含む分析結果は使わない
+            self._progress_cache.clear()
+            if report.removed_events or report.deleted_legacy_files or report.deleted_partitions:
+                # 削除されたイベントで判定した適応的設定を作り直す
+                self.materialize_adaptive_decisions()
+
+            logger.info(
+                f"{len(report.deleted_segments) + len(report.deleted_legacy_files)}個の古いデータファイルを削除し、"
+                f"{len(report.compacted_segments) + len(report.rewritten_partitions)}個を書き直しました"
+                f"（{report.reclaimed_bytes}バイト削減）"
+            )
+            return report
+
         except Exception as e:
-            logger.error(f"古いデータの削除中にエラー: {e}")
\ No newline at end of file
+            logger.error(f"古いデータの削除中にエラー: {e}")
+            return None
+
+    def _on_segment_changed(self, segment_name: str, new_size: Optional[int]):
+        """削除・書き直したセグメントの索引を除き、集計値の反映位置を合わせる"""
+        self.event_index.forget([segment_name])
+        if new_size is None:
+            self.aggregates.watermarks.pop(segment_name, None)
+        else:
+            # 残ったイベントは集計済みのため、書き直し後の末尾まで反映済みとする
+            self.aggregates.watermarks[segment_name] = new_size
@@ -19,6 +19,10 @@ from matplotlib.patches import FancyBboxPatch, Circle, Rectangle, Polygon
 
 from .component_renderer import ComponentRenderer, BaseComponent
 from .chart_generator import ChartGenerator  # 既存のChartGeneratorをインポート
+from .config import GLOBAL_COLORS, BASE_CHART_STYLES
+from .plotting_env import init_plotting_environment
+from .figure_pool import get_figure_pool
+from .utils import save_figure_image
 
 logger = logging.getLogger(__name__)
 
@@ -43,11 +47,12 @@ class MatplotlibRenderer(ComponentRenderer):
         """
         super().__init__(output_dir, config)
         
-        # 既存のChartGeneratorとの互換性を保持
-        self.chart_generator = ChartGenerator(
-            colors=config.get('colors'),
-            styles=config.get('styles')
-        )
+        colors = self.config.get('colors') or GLOBAL_COLORS
+        styles = self.config.get('styles') or BASE_CHART_STYLES
+        # 描画環境はChartGeneratorと共有する（プロセスで一度だけ初期化）
+        self.plotting_env = init_plotting_environment(styles.get("font_family"))
+        # 既存のChartGeneratorとの互換性を保持（初回参照時に生成）
+        self._chart_generator: Optional[ChartGenerator] = None
         
         # matplotlib固有の設定
         self.fig = None
@@ -61,11 +66,21 @@ class MatplotlibRenderer(ComponentRenderer):
         
         # 描画コンテキスト
         self.drawing_context = {
-            'colors': self.chart_generator.colors,
-            'styles': self.chart_generator.styles,
+            'colors': colors,
+            'styles': styles,
             'component_counter': 0
         }
     
+    @property
+    def chart_generator(self) -> ChartGenerator:
+        """既存のChartGenerator（初回参照時に生成）"""
+        if self._chart_generator is None:
+            self._chart_generator = ChartGenerator(
+                colors=self.drawing_context['colors'],
+                styles=self.drawing_context['styles']
+            )
+        return self._chart_generator
+    
     def _register_default_components(self):
         """デフォルトコンポーネントを登録"""
         self.component_registry.update({
@@ -79,6 +94,21 @@ class MatplotlibRenderer(ComponentRenderer):
             'Annotation': AnnotationComponent,
         })
     
+    def render_spec(self, spec: Dict[str, Any]) -> Path:
+        """
+        YAML仕様を受け取ってレンダリング
+        描画環境のrcParamsから描画を始め、仕様のstyle・seaborn_styleはこの描画の間だけ適用する
+
+        Args:
+            spec: レンダリング仕様
+
+        Returns:
+            生成されたファイルのパス
+        """
+        self.plotting_env.restore_rcparams()
+        with plt.rc_context():
+            return super().render_spec(spec)
+
     def _apply_global_config(self, config: Dict[str, Any]):
         """グローバル設定を適用してfigとaxを初期化"""
         # Figure設定を更新
@@ -90,7 +120,7 @@ class MatplotlibRenderer(ComponentRenderer):
         })
         
         # Figureとaxesを作成
-        self.fig, self.ax = plt.subplots(
+        self.fig, self.ax = get_figure_pool().subplots(
             figsize=self.figure_config['figsize']
         )
         
@@ -131,22 +161,33 @@ class MatplotlibRenderer(ComponentRenderer):
             # レイアウト調整
             self.fig.tight_layout()
             
-            # PNGをBase64エンコード
-            buffer = io.BytesIO()
-            self.fig.savefig(
-                buffer, 
-                format='png',
-                dpi=self.figure_config['dpi'],
-                bbox_inches='tight',
-                facecolor=self.figure_config['facecolor'],
-                edgecolor=self.figure_config['edgecolor']
-            )
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.read()).decode()
+            savefig_kwargs = {
+                'dpi': self.figure_config['dpi'],
+                'bbox_inches': 'tight',
+                'facecolor': self.figure_config['facecolor'],
+                'edgecolor': self.figure_config['edgecolor']
+            }
+            if config.get('image_mode', self.config.get('image_mode', 'inline')) == 'external':
+                # 内容ハッシュ付きの画像ファイルとして書き出し、相対パスで参照
+                image_path = save_figure_image(
+                    self.fig,
+                    output_path.parent,
+                    output_path.stem,
+                    config.get('image_format', self.config.get('image_format', 'png')),
+                    **savefig_kwargs
+                )
+                img_src = image_path.name
+            else:
+                # PNGをBase64エンコード
+                buffer = io.BytesIO()
+                self.fig.savefig(buffer, format='png', **savefig_kwargs)
+                buffer.seek(0)
+                img_base64 = base64.b64encode(buffer.read()).decode()
+                img_src = f"data:image/png;base64,{img_base64}"
             
             # HTML生成
             title = config.get('title', 'Matplotlib Chart')
-            html_content = self._generate_html_template(img_base64, title, config)
+            html_content = self._generate_html_template(img_src, title, config)
             
             # ファイル保存
             output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -160,12 +201,13 @@ class MatplotlibRenderer(ComponentRenderer):
         finally:
             # リソース解放
             if self.fig:
-                plt.close(self.fig)
+                if not get_figure_pool().release(self.fig):
+                    plt.close(self.fig)
                 self.fig = None
                 self.ax = None
     
-    def _generate_html_template(self, img_base64: str, title: str, config: Dict[str, Any]) -> str:
-        """HTMLテンプレートを生成"""
+    def _generate_html_template(self, img_src: str, title: str, config: Dict[str, Any]) -> str:
+        """HTMLテンプレートを生成（img_srcはdata URIまたは画像ファイルの相対パス）"""
         return f"""
 <!DOCTYPE html>
 <html>
@@ -209,7 +251,7 @@ class MatplotlibRenderer(ComponentRenderer):
 </head>
 <body>
     <div class="chart-container">
-        <img src="data:image/png;base64,{img_base64}" 
+        <img src="{img_src}" 
              alt="{title}" 
              class="chart-image">
         <div class="chart-metadata">
@@ -17,6 +17,7 @@ from plotly.subplots import make_subplots
 from plotly.offline import plot
 
 from .component_renderer import ComponentRenderer, BaseComponent
+from .utils import resolve_plotlyjs_src
 
 logger = logging.getLogger(__name__)
 
@@ -164,7 +165,10 @@ class PlotlyRenderer(ComponentRenderer):
                 filename=str(output_path),
                 config=self.plotly_config,
                 auto_open=False,
-                include_plotlyjs='cdn'  # CDNから読み込み
+                # plotly_js_pathが指定されていれば自前のplotly.jsを相対パスで参照
+                include_plotlyjs=resolve_plotlyjs_src(
+                    self.config.get('plotly_js_path'), output_path.parent
+                )
             )
             
             logger.info(f"Plotly図をHTMLとして保存: {output_path}")
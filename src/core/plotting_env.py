@@ -0,0 +1,168 @@
+"""
+Matplotlib描画環境の初期化
+非対話的なAggバックエンドへの切り替え、Seabornのスタイル、日本語フォントの選択を
+プロセスごとに一度だけ行い、全てのChartGenerator・レンダラーで共有する
+初期化後のrcParamsを保持し、ChartGenerator・レンダラーを作成するたびにその状態に戻す
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import matplotlib
+
+logger = logging.getLogger(__name__)
+
+# 図表はファイルに書き出すだけなので、GUIを持たないバックエンドに固定する
+PLOTTING_BACKEND = "Agg"
+
+# フォント選択結果のディスクキャッシュのファイル名（Matplotlibのキャッシュディレクトリに置く）
+FONT_CACHE_FILENAME = "japanese_font_resolution.json"
+
+@dataclass(frozen=True)
+class PlottingEnvironment:
+    """初期化済みの描画環境"""
+    backend: str
+    font_family: Tuple[str, ...]
+    selected_font: Optional[str]
+    # 初期化直後のrcParams（別のフォント設定の環境やスタイルの変更から戻すために使う）
+    rc_snapshot: Dict[str, Any]
+
+    def restore_rcparams(self):
+        """rcParamsを初期化直後の状態に戻す"""
+        matplotlib.rcParams.update(self.rc_snapshot)
+
+
+_environments: Dict[Tuple[str, ...], PlottingEnvironment] = {}
+_backend_ready = False
+_lock = threading.Lock()
+
+
+def _default_font_family() -> List[str]:
+    """設定ファイルの既定のフォントファミリー"""
+    from .base_config import BASE_CHART_STYLES
+    return BASE_CHART_STYLES["font_family"]
+
+
+def _installed_fonts_fingerprint() -> str:
+    """
+    Matplotlibが認識しているフォント一覧の識別子
+    フォント一覧のキャッシュファイル（fontlist-v*.json）の更新日時とサイズから求め、
+    見つからない場合はフォントファイルのパスから求める
+    """
+    cache_files = sorted(Path(matplotlib.get_cachedir()).glob("fontlist-v*.json"))
+    if cache_files:
+        parts = [f"{path.name}:{path.stat().st_mtime_ns}:{path.stat().st_size}" for path in cache_files]
+    else:
+        from matplotlib import font_manager
+        parts = sorted(font.fname for font in font_manager.fontManager.ttflist)
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def resolve_japanese_font(font_family: Sequence[str]) -> Optional[str]:
+    """
+    指定されたフォントファミリーのうち、最初に利用可能なフォントを選択
+    選択結果はフォントファミリーとインストール済みフォントをキーにディスクへキャッシュする
+
+    Args:
+        font_family: 優先順のフォントファミリー
+
+    Returns:
+        選択したフォント名（利用可能なフォントがない場合はNone）
+    """
+    cache_path = Path(matplotlib.get_cachedir()) / FONT_CACHE_FILENAME
+    cache_key = hashlib.sha1(json.dumps(
+        [list(font_family), matplotlib.__version__, _installed_fonts_fingerprint()], ensure_ascii=False
+    ).encode("utf-8")).hexdigest()
+
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        cached = {}
+    if cache_key in cached:
+        return cached[cache_key]
+
+    from matplotlib import font_manager
+    available_fonts = {font.name for font in font_manager.fontManager.ttflist}
+    selected_font = next((font for font in font_family if font in available_fonts), None)
+
+    cached[cache_key] = selected_font
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f".{cache_path.name}.tmp{os.getpid()}")
+        tmp_path.write_text(json.dumps(cached, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"フォント選択結果のキャッシュを保存できません: {e}")
+    return selected_font
+
+
+def _apply_font_rcparams(font_family: Sequence[str], selected_font: Optional[str]):
+    """選択したフォントをrcParamsに設定"""
+    if selected_font:
+        matplotlib.rcParams['font.family'] = selected_font
+        logger.info(f"フォント '{selected_font}' を使用します")
+    else:
+        # フォールバック
+        matplotlib.rcParams['font.family'] = 'sans-serif'
+        logger.warning(
+            f"指定されたフォント {list(font_family)} が見つかりません。"
+            f"sans-serifにフォールバックします。"
+        )
+
+    # 日本語の文字化けを防ぐ追加設定
+    matplotlib.rcParams['font.sans-serif'] = list(font_family)
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
+
+def init_plotting_environment(font_family: Optional[Sequence[str]] = None) -> PlottingEnvironment:
+    """
+    描画環境を初期化（フォントファミリーごとにプロセスで一度だけ行い、以降は結果を再利用する）
+    再利用する場合も、別のフォント設定の環境や描画中のスタイル変更で変わったrcParamsを
+    初期化直後の状態に戻す（以前の描画のスタイルが後の図表やキャッシュした図表と食い違わないように）
+
+    Args:
+        font_family: 優先順のフォントファミリー（Noneの場合は設定ファイルの既定値）
+
+    Returns:
+        初期化済みの描画環境
+    """
+    global _backend_ready
+    key = tuple(font_family if font_family is not None else _default_font_family())
+
+    environment = _environments.get(key)
+    if environment is not None:
+        environment.restore_rcparams()
+        return environment
+
+    with _lock:
+        environment = _environments.get(key)
+        if environment is None:
+            if not _backend_ready:
+                matplotlib.use(PLOTTING_BACKEND, force=True)
+                _backend_ready = True
+
+            import seaborn as sns
+
+            # Seabornのスタイルはフォント設定を上書きするため先に適用する
+            sns.set_style("whitegrid")
+            sns.set_palette("husl")
+            selected_font = resolve_japanese_font(key)
+            _apply_font_rcparams(key, selected_font)
+
+            environment = PlottingEnvironment(
+                backend=matplotlib.get_backend(),
+                font_family=key,
+                selected_font=selected_font,
+                rc_snapshot=dict(matplotlib.rcParams)
+            )
+            _environments[key] = environment
+        else:
+            environment.restore_rcparams()
+
+    return environment
@@ -0,0 +1,153 @@
+"""
+学習進捗の分析結果を保持するメモリキャッシュ
+件数の上限（LRU）と有効期限（TTL）を持ち、イベントの記録時にユーザー単位で無効化する
+受信サーバーのスレッドからの無効化と読み手の参照が並行するため、操作はロックで直列化する
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressCache:
+    """件数上限と有効期限を持つユーザー単位のLRUキャッシュ"""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持するユーザー数の上限（超えた場合は最も古く使われたものから削除）
+            ttl_seconds: 分析結果の有効期限（秒）
+            clock: 現在時刻（秒）を返す関数
+
+        Raises:
+            ValueError: 上限件数が1未満の場合
+        """
+        if max_entries < 1:
+            raise ValueError(f"キャッシュの上限件数は1以上を指定してください: {max_entries}")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # ユーザーID -> (格納時刻, 分析結果)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # ユーザーID -> 無効化の回数（分析中に無効化された古い結果を格納しないため）
+        self._versions: Dict[str, int] = {}
+        # clear()の回数
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """統計情報をリセット"""
+        with self._lock:
+            self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        統計情報を取得
+
+        Returns:
+            {"hits", "misses", "evictions", "expirations", "invalidations", "size"}
+        """
+        with self._lock:
+            return {**self.stats, "size": len(self._entries)}
+
+    def get(self, user_id: str) -> Optional[Any]:
+        """
+        有効期限内の分析結果を取得
+
+        Args:
+            user_id: ユーザーID
+
+        Returns:
+            分析結果、ない場合や期限切れの場合はNone
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            stored_at, value = entry
+            if self._clock() - stored_at >= self.ttl_seconds:
+                del self._entries[user_id]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return value
+
+    def version(self, user_id: str) -> Tuple[int, int]:
+        """
+        ユーザーの分析結果の版を取得（分析を始める前に取得し、put()に渡す）
+
+        Args:
+            user_id: ユーザーID
+
+        Returns:
+            無効化・全削除のたびに変わる版
+        """
+        with self._lock:
+            return self._epoch, self._versions.get(user_id, 0)
+
+    def put(self, user_id: str, value: Any, version: Optional[Tuple[int, int]] = None):
+        """
+        分析結果を格納（上限を超えた分は最も古く使われたものから削除）
+
+        Args:
+            user_id: ユーザーID
+            value: 分析結果
+            version: 分析を始める前にversion()で取得した版（その後に無効化されていれば格納しない）
+        """
+        with self._lock:
+            if version is not None and version != (self._epoch, self._versions.get(user_id, 0)):
+                logger.debug(f"分析中に無効化されたため学習進捗をキャッシュしません: {user_id}")
+                return
+            self._entries[user_id] = (self._clock(), value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                evicted_user, _ = self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+                logger.debug(f"学習進捗キャッシュから削除しました: {evicted_user}")
+
+    def invalidate(self, user_id: str):
+        """
+        ユーザーの分析結果を無効化
+
+        Args:
+            user_id: ユーザーID
+        """
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            if self._entries.pop(user_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        """全ての分析結果を削除"""
+        with self._lock:
+            self._entries.clear()
+            # 全ユーザーの版が変わるため、ユーザーごとの回数は数え直す
+            self._versions.clear()
+            self._epoch += 1
+
+    def __len__(self) -> int:
+        """保持しているユーザー数"""
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, user_id: str) -> bool:
+        """ユーザーの分析結果を保持しているか（有効期限は判定しない）"""
+        with self._lock:
+            return user_id in self._entries
@@ -5,8 +5,9 @@
 YAMLベースのコンテンツ生成を提供します。
 """
 
-from typing import Dict, List, Optional, Type, Union
+from typing import Dict, List, Optional, Tuple, Type, Union
 from pathlib import Path
+import importlib
 import logging
 
 from .component_renderer import (
@@ -17,6 +18,15 @@ from .component_renderer import (
 
 logger = logging.getLogger(__name__)
 
+# 標準の描画エンジン（エンジン名 -> (モジュール名, クラス名)）
+# 各エンジンの依存ライブラリ（matplotlib、plotly等）はそのエンジンを使うまで読み込まない
+STANDARD_ENGINES: Dict[str, Tuple[str, str]] = {
+    'matplotlib': ('.matplotlib_renderer', 'MatplotlibRenderer'),
+    'markdown': ('.markdown_renderer', 'MarkdownRenderer'),
+    'plotly': ('.plotly_renderer', 'PlotlyRenderer'),
+    'table': ('.table_renderer', 'TableRenderer'),
+}
+
 
 class RendererFactory:
     """
@@ -29,6 +39,9 @@ class RendererFactory:
     # 登録された描画エンジン
     _engines: Dict[str, Type[ComponentRenderer]] = {}
     
+    # 初回使用時に読み込む描画エンジン（エンジン名 -> (モジュール名, クラス名)）
+    _lazy_engines: Dict[str, Tuple[str, str]] = dict(STANDARD_ENGINES)
+    
     @classmethod
     def register_engine(cls, name: str, renderer_class: Type[ComponentRenderer]):
         """
@@ -51,8 +64,31 @@ class RendererFactory:
             logger.warning(f"エンジン名が一致しません: {name} != {renderer_class.engine_name}")
         
         cls._engines[name] = renderer_class
+        cls._lazy_engines.pop(name, None)
         logger.info(f"描画エンジン '{name}' を登録しました")
     
+    @classmethod
+    def register_lazy_engine(cls, name: str, module_name: str, class_name: str):
+        """
+        初回使用時に読み込む描画エンジンを登録
+        
+        Args:
+            name: エンジン名
+            module_name: レンダラークラスのモジュール名（"."で始まる場合はこのパッケージからの相対名）
+            class_name: レンダラークラス名
+        """
+        cls._engines.pop(name, None)
+        cls._lazy_engines[name] = (module_name, class_name)
+    
+    @classmethod
+    def _resolve_engine(cls, engine: str) -> Optional[Type[ComponentRenderer]]:
+        """エンジンのレンダラークラスを取得（遅延登録のエンジンはここで読み込んで登録する）"""
+        if engine not in cls._engines and engine in cls._lazy_engines:
+            module_name, class_name = cls._lazy_engines[engine]
+            module = importlib.import_module(module_name, __package__)
+            cls.register_engine(engine, getattr(module, class_name))
+        return cls._engines.get(engine)
+    
     @classmethod
     def create_renderer(
         cls, 
@@ -74,28 +110,28 @@ class RendererFactory:
         Raises:
             ValueError: サポートされていないエンジンの場合
         """
-        if engine not in cls._engines:
-            available_engines = list(cls._engines.keys())
+        renderer_class = cls._resolve_engine(engine)
+        if renderer_class is None:
+            available_engines = cls.get_available_engines()
             raise ValueError(
                 f"サポートされていないエンジン: {engine}. "
                 f"利用可能: {available_engines}"
             )
         
-        renderer_class = cls._engines[engine]
         return renderer_class(Path(output_dir), config)
     
     @classmethod
     def get_available_engines(cls) -> List[str]:
-        """利用可能なエンジン一覧を取得"""
-        return list(cls._engines.keys())
+        """利用可能なエンジン一覧を取得（遅延登録のエンジンは読み込まない）"""
+        return list(cls._engines.keys()) + [name for name in cls._lazy_engines if name not in cls._engines]
     
     @classmethod
     def get_engine_info(cls, engine: str) -> Dict[str, any]:
         """エンジンの詳細情報を取得"""
-        if engine not in cls._engines:
+        renderer_class = cls._resolve_engine(engine)
+        if renderer_class is None:
             raise ValueError(f"エンジンが見つかりません: {engine}")
         
-        renderer_class = cls._engines[engine]
         return {
             'engine_name': renderer_class.engine_name,
             'file_extension': renderer_class.file_extension,
@@ -106,7 +142,7 @@ class RendererFactory:
     @classmethod
     def is_engine_available(cls, engine: str) -> bool:
         """エンジンが利用可能かチェック"""
-        return engine in cls._engines
+        return engine in cls._engines or engine in cls._lazy_engines
 
 
 class UniversalContentGenerator:
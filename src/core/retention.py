@@ -0,0 +1,323 @@
+"""
+学習イベントの保持期間管理
+セグメントごとのメタデータ（イベント種別ごとの件数と最古・最新のタイムスタンプ）を記録し、
+ファイル名やイベント本体を読まずに削除・書き直しの対象を判定する
+"""
+
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Iterable, Optional, Tuple, Callable
+
+from .event_store import EventStore, LEGACY_FILENAME, SEGMENT_PATTERN
+from .analytics_store import AnalyticsStore
+
+logger = logging.getLogger(__name__)
+
+# セグメントのメタデータのファイル名
+MANIFEST_FILENAME = "segment_manifest.json"
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    """ISO形式のタイムスタンプを比較できる形に変換"""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+@dataclass
+class RetentionPolicy:
+    """イベント種別ごとの保持期間"""
+    default_days: int = 90
+    event_type_days: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for event_type, days in [(None, self.default_days), *self.event_type_days.items()]:
+            if days < 0:
+                raise ValueError(f"保持日数は0以上を指定してください: {event_type or 'default'}={days}")
+
+    def days_for(self, event_type: str) -> int:
+        """イベント種別の保持日数"""
+        return self.event_type_days.get(event_type, self.default_days)
+
+    def cutoff_for(self, event_type: str, now: datetime) -> datetime:
+        """この日時より前のイベントが期限切れとなる境界"""
+        return now - timedelta(days=self.days_for(event_type))
+
+    @property
+    def longest_days(self) -> int:
+        """最も長い保持日数"""
+        return max([self.default_days, *self.event_type_days.values()])
+
+
+@dataclass
+class RetentionReport:
+    """保持期間の適用結果"""
+    deleted_segments: List[str] = field(default_factory=list)
+    compacted_segments: List[str] = field(default_factory=list)
+    deleted_legacy_files: List[str] = field(default_factory=list)
+    rewritten_partitions: List[str] = field(default_factory=list)
+    deleted_partitions: List[str] = field(default_factory=list)
+    removed_events: int = 0
+    reclaimed_bytes: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書に変換"""
+        return {
+            "deleted_segments": list(self.deleted_segments),
+            "compacted_segments": list(self.compacted_segments),
+            "deleted_legacy_files": list(self.deleted_legacy_files),
+            "rewritten_partitions": list(self.rewritten_partitions),
+            "deleted_partitions": list(self.deleted_partitions),
+            "removed_events": self.removed_events,
+            "reclaimed_bytes": self.reclaimed_bytes
+        }
+
+
+class SegmentManifest:
+    """セグメント名 -> イベント種別ごとの件数と最古・最新のタイムスタンプ"""
+
+    def __init__(self, path: Path):
+        """
+        初期化（保存済みのメタデータがあれば読み込む）
+
+        Args:
+            path: メタデータの保存先
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"セグメントのメタデータを読み込めないため作り直します: {e}")
+
+    def add(self, positions: Iterable[Tuple[Dict[str, Any], str, int, int]]):
+        """
+        EventStore.append()が返した位置情報をメタデータに反映
+
+        Args:
+            positions: (イベント, セグメント名, オフセット, 長さ) のイテラブル
+        """
+        for record, segment_name, offset, length in positions:
+            entry = self.entries.setdefault(segment_name, {"bytes": 0, "event_types": {}})
+            timestamp = _parse_timestamp(record['timestamp']).isoformat()
+            stats = entry["event_types"].get(record['event_type'])
+            if stats is None:
+                entry["event_types"][record['event_type']] = {
+                    "count": 1, "min_timestamp": timestamp, "max_timestamp": timestamp
+                }
+            else:
+                stats["count"] += 1
+                stats["min_timestamp"] = min(stats["min_timestamp"], timestamp)
+                stats["max_timestamp"] = max(stats["max_timestamp"], timestamp)
+            entry["bytes"] = max(entry["bytes"], offset + length)
+
+    def sync(self, event_store: EventStore) -> int:
+        """
+        メタデータに未反映の記録をセグメントから補い、存在しないセグメントを除く
+
+        Args:
+            event_store: 対象のイベントストア
+
+        Returns:
+            反映した記録数
+        """
+        segments = event_store.list_segments()
+        self.prune(path.name for path in segments)
+        added = 0
+        for segment_path in segments:
+            scanned_bytes = self.entries.get(segment_path.name, {}).get("bytes", 0)
+            if segment_path.stat().st_size <= scanned_bytes:
+                continue
+            positions = [
+                (record, segment_path.name, offset, length)
+                for offset, length, record in event_store.scan_segment(segment_path, scanned_bytes)
+            ]
+            self.add(positions)
+            added += len(positions)
+        return added
+
+    def rebuild_segment(self, event_store: EventStore, segment_name: str):
+        """
+        書き直したセグメントのメタデータを作り直す
+
+        Args:
+            event_store: 対象のイベントストア
+            segment_name: セグメント名
+        """
+        self.entries.pop(segment_name, None)
+        segment_path = event_store.store_dir / segment_name
+        self.add(
+            (record, segment_name, offset, length)
+            for offset, length, record in event_store.scan_segment(segment_path)
+        )
+
+    def prune(self, existing_segments: Iterable[str]):
+        """
+        削除されたセグメントのメタデータを除く
+
+        Args:
+            existing_segments: 現存するセグメント名
+        """
+        existing = set(existing_segments)
+        self.entries = {name: entry for name, entry in self.entries.items() if name in existing}
+
+    def save(self):
+        """メタデータをアトミックに保存"""
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp{os.getpid()}")
+        tmp_path.write_text(json.dumps(self.entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class RetentionManager:
+    """保持期間を過ぎたセグメントの削除と、一部が期限切れのセグメントの書き直し"""
+
+    def __init__(
+        self,
+        event_store: EventStore,
+        manifest: SegmentManifest,
+        lock: Optional[threading.RLock] = None,
+        analytics_store: Optional[AnalyticsStore] = None
+    ):
+        """
+        初期化
+
+        Args:
+            event_store: 対象のイベントストア
+            manifest: セグメントのメタデータ
+            lock: 追記と書き直しを直列化するロック（追記側と共有する）
+            analytics_store: イベントストアから圧縮したParquetのストア（同じ保持期間を適用する）
+        """
+        self.event_store = event_store
+        self.manifest = manifest
+        self.analytics_store = analytics_store
+        self._lock = lock or threading.RLock()
+
+    def plan(self, policy: RetentionPolicy, now: datetime) -> Tuple[List[str], List[str]]:
+        """
+        メタデータから削除・書き直しの対象を判定（セグメントごとに定数時間）
+
+        Args:
+            policy: 保持期間
+            now: 基準日時
+
+        Returns:
+            (削除するセグメント名, 書き直すセグメント名)
+        """
+        to_delete, to_compact = [], []
+        for segment_name, entry in sorted(self.manifest.entries.items()):
+            expired_all, expired_any = True, False
+            for event_type, stats in entry["event_types"].items():
+                cutoff = policy.cutoff_for(event_type, now)
+                if _parse_timestamp(stats["max_timestamp"]) >= cutoff:
+                    expired_all = False
+                if _parse_timestamp(stats["min_timestamp"]) < cutoff:
+                    expired_any = True
+            if expired_all:
+                to_delete.append(segment_name)
+            elif expired_any:
+                to_compact.append(segment_name)
+        return to_delete, to_compact
+
+    def apply(
+        self,
+        policy: RetentionPolicy,
+        now: Optional[datetime] = None,
+        on_segment_changed: Optional[Callable[[str, Optional[int]], None]] = None
+    ) -> RetentionReport:
+        """
+        保持期間を適用
+
+        Args:
+            policy: 保持期間
+            now: 基準日時（省略時は現在時刻）
+            on_segment_changed: セグメントを削除・書き直した後に (セグメント名, 新しいサイズ) で呼ばれる関数
+                （削除した場合のサイズはNone。ロックを保持したまま呼ばれる）
+
+        Returns:
+            適用結果
+        """
+        now = now or datetime.now()
+        report = RetentionReport()
+        with self._lock:
+            self.manifest.sync(self.event_store)
+            to_delete, to_compact = self.plan(policy, now)
+
+        for segment_name in to_delete:
+            with self._lock:
+                if not (self.event_store.store_dir / segment_name).exists():
+                    continue
+                report.removed_events += sum(
+                    stats["count"] for stats in self.manifest.entries[segment_name]["event_types"].values()
+                )
+                report.reclaimed_bytes += self.event_store.delete_segment(segment_name)
+                self.manifest.entries.pop(segment_name, None)
+                report.deleted_segments.append(segment_name)
+                if on_segment_changed:
+                    on_segment_changed(segment_name, None)
+
+        def keep(record: Dict[str, Any]) -> bool:
+            return _parse_timestamp(record['timestamp']) >= policy.cutoff_for(record['event_type'], now)
+
+        for segment_name in to_compact:
+            with self._lock:
+                # 判定後に追記された分もメタデータに反映してから書き直す
+                self.manifest.sync(self.event_store)
+                old_size = (self.event_store.store_dir / segment_name).stat().st_size
+                new_size, removed = self.event_store.rewrite_segment(segment_name, keep)
+                self.manifest.rebuild_segment(self.event_store, segment_name)
+                report.removed_events += removed
+                report.reclaimed_bytes += old_size - new_size
+                report.compacted_segments.append(segment_name)
+                if on_segment_changed:
+                    on_segment_changed(segment_name, new_size)
+
+        # 従来の日次ファイルは書き直さず、全イベント種別が期限切れの日付のみ削除する
+        legacy_cutoff = (now - timedelta(days=policy.longest_days)).strftime('%Y-%m-%d')
+        for date_str in self.event_store.list_legacy_dates():
+            if date_str < legacy_cutoff:
+                legacy_path = self.event_store.store_dir / LEGACY_FILENAME.format(date=date_str)
+                report.reclaimed_bytes += legacy_path.stat().st_size
+                legacy_path.unlink()
+                report.deleted_legacy_files.append(legacy_path.name)
+
+        if self.analytics_store is not None:
+            self._apply_to_partitions(report, legacy_cutoff)
+
+        with self._lock:
+            self.manifest.save()
+
+        logger.info(
+            f"保持期間を適用しました: 削除 {len(report.deleted_segments)}セグメント / "
+            f"書き直し {len(report.compacted_segments)}セグメント・{len(report.rewritten_partitions)}パーティション / "
+            f"{report.removed_events}件・{report.reclaimed_bytes}バイトを削減"
+        )
+        return report
+
+    def _apply_to_partitions(self, report: RetentionReport, legacy_cutoff: str):
+        """
+        削除・書き直したイベントの日付のParquetパーティションを、保持期間適用後のイベントストアから作り直す
+        （イベントが残っていない日付と、全イベント種別が期限切れの日付のパーティションは削除する）
+        """
+        affected_dates = {
+            SEGMENT_PATTERN.match(name).group(1)
+            for name in [*report.deleted_segments, *report.compacted_segments]
+            if SEGMENT_PATTERN.match(name)
+        }
+        affected_dates.update(name[len("events_"):-len(".json")] for name in report.deleted_legacy_files)
+        affected_dates.update(date_str for date_str in self.analytics_store.list_dates() if date_str < legacy_cutoff)
+
+        for date_str in sorted(affected_dates):
+            if not self.analytics_store.is_compacted(date_str):
+                continue
+            with self._lock:
+                old_size = self.analytics_store.partition_bytes(date_str)
+                new_size = self.analytics_store.compact_date(self.event_store, date_str)
+            report.reclaimed_bytes += old_size - new_size
+            if new_size:
+                report.rewritten_partitions.append(date_str)
+            else:
+                report.deleted_partitions.append(date_str)
@@ -154,7 +154,7 @@ class TableRenderer(ComponentRenderer):
         responsive_meta = '<meta name="viewport" content="width=device-width, initial-scale=1">' if self.global_config.get('responsive') else ''
         
         # グローバルタイトル
-        title_html = f'<h1 style="color: {theme_styles["text_color"]; margin-bottom: 30px; text-align: center;">{escape(self.global_config["title"])}</h1>' if self.global_config['title'] else ''
+        title_html = f'<h1 style="color: {theme_styles["text_color"]}; margin-bottom: 30px; text-align: center;">{escape(self.global_config["title"])}</h1>' if self.global_config['title'] else ''
         
         # CSS スタイル
         css_styles = f"""
@@ -0,0 +1,132 @@
+"""
+専門用語の出現箇所を一度の走査で検出するAho-Corasickオートマトン
+用語集が大きくなっても段落ごとの処理時間が用語数に比例しないようにする
+"""
+
+import re
+import logging
+from typing import Dict, List, Iterable, Tuple, FrozenSet
+
+logger = logging.getLogger(__name__)
+
+# ツールチップを付与しないMarkdownリンクのパターン
+MARKDOWN_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+
+
+class TermMatcher:
+    """複数の用語を同時に検索するAho-Corasickオートマトン"""
+
+    def __init__(self, terms: Iterable[str]):
+        """
+        初期化（オートマトンを構築）
+
+        Args:
+            terms: 検索対象の用語
+        """
+        self.terms: FrozenSet[str] = frozenset(term for term in terms if term)
+
+        # 状態0がルート。goto[state][文字] = 次の状態
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # その状態で終わる最長の用語の長さ（0の場合は用語の終端ではない）
+        self._term_length: List[int] = [0]
+        # 失敗遷移を辿った先で最初に見つかる用語終端の状態（出力リンク）
+        self._output_link: List[int] = [0]
+
+        for term in self.terms:
+            self._add_term(term)
+        self._build_failure_links()
+        logger.debug(f"用語オートマトンを構築しました: {len(self.terms)}語, {len(self._goto)}状態")
+
+    def _add_term(self, term: str):
+        """トライ木に用語を追加"""
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._term_length.append(0)
+                self._output_link.append(0)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._term_length[state] = len(term)
+
+    def _build_failure_links(self):
+        """幅優先探索で失敗遷移と出力リンクを設定"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                fallback = self._goto[fail_state].get(char, 0)
+                self._fail[next_state] = fallback if fallback != next_state else 0
+
+                target = self._fail[next_state]
+                self._output_link[next_state] = (
+                    target if self._term_length[target] else self._output_link[target]
+                )
+                queue.append(next_state)
+
+    def find_all(
+        self, text: str, protect_links: bool = True, first_occurrence_only: bool = False
+    ) -> List[Tuple[int, int, str]]:
+        """
+        テキスト中の用語の出現箇所を検出
+        同じ位置から始まる用語は最長のものを優先し、重複しない出現箇所を先頭から順に返す
+
+        Args:
+            text: 検索対象のテキスト
+            protect_links: Markdownリンク内の出現箇所を除外するか
+            first_occurrence_only: 各用語の初出箇所だけを返すか
+                （既に返した用語の出現箇所は、重複の判定より前に候補から除外する）
+
+        Returns:
+            (開始位置, 終了位置, 用語) のリスト（開始位置の昇順）
+        """
+        if not self.terms:
+            return []
+
+        # 開始位置ごとに、そこから始まる用語の終了位置を記録
+        candidate_ends: Dict[int, List[int]] = {}
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            match_state = state if self._term_length[state] else self._output_link[state]
+            while match_state:
+                start = index + 1 - self._term_length[match_state]
+                candidate_ends.setdefault(start, []).append(index + 1)
+                match_state = self._output_link[match_state]
+
+        protected = []
+        if protect_links:
+            protected = [match.span() for match in MARKDOWN_LINK_PATTERN.finditer(text)]
+
+        matches = []
+        found_terms = set()
+        last_end = 0
+        protected_index = 0
+        for start in sorted(candidate_ends):
+            if start < last_end:
+                continue
+            while protected_index < len(protected) and protected[protected_index][1] <= start:
+                protected_index += 1
+            for end in sorted(candidate_ends[start], reverse=True):
+                term = text[start:end]
+                if first_occurrence_only and term in found_terms:
+                    continue
+                if protected_index < len(protected) and protected[protected_index][0] < end:
+                    continue
+                matches.append((start, end, term))
+                found_terms.add(term)
+                last_end = end
+                break
+        return matches
@@ -3,9 +3,13 @@
 PythonからMarkdown/HTMLを生成する際の構文の堅牢性を高める
 """
 
+import io
+import os
 import re
+import hashlib
 import logging
 import unicodedata
+from pathlib import Path
 from typing import List, Tuple, Dict, Any, Optional
 from html import escape
 import yaml
@@ -115,41 +119,86 @@ def rgb_to_hex(rgb_color: Tuple[int, int, int]) -> str:
 def apply_matplotlib_japanese_font(font_family: List[str] = None):
     """
     Matplotlibで日本語フォントが正しく表示されるように設定
+    フォントの選択結果はディスクにキャッシュされる（plotting_env.resolve_japanese_font）
     
     Args:
         font_family: 使用するフォントファミリーのリスト
     """
-    import matplotlib.pyplot as plt
-    from matplotlib import font_manager
+    from .plotting_env import resolve_japanese_font, _apply_font_rcparams
     
     if font_family is None:
         from .base_config import BASE_CHART_STYLES
         font_family = BASE_CHART_STYLES["font_family"]
     
-    # 利用可能なフォントを確認
-    available_fonts = set([f.name for f in font_manager.fontManager.ttflist])
-    
-    # 指定されたフォントから利用可能なものを選択
-    selected_font = None
-    for font in font_family:
-        if font in available_fonts:
-            selected_font = font
-            break
-    
-    if selected_font:
-        plt.rcParams['font.family'] = selected_font
-        logger.info(f"フォント '{selected_font}' を使用します")
-    else:
-        # フォールバック
-        plt.rcParams['font.family'] = 'sans-serif'
-        logger.warning(
-            f"指定されたフォント {font_family} が見つかりません。"
-            f"sans-serifにフォールバックします。"
-        )
-    
-    # 日本語の文字化けを防ぐ追加設定
-    plt.rcParams['font.sans-serif'] = font_family
-    plt.rcParams['axes.unicode_minus'] = False
+    _apply_font_rcparams(font_family, resolve_japanese_font(font_family))
+
+
+def save_figure_image(
+    fig: Any, output_dir: Path, stem: str, image_format: str = "png", **savefig_kwargs: Any
+) -> Path:
+    """
+    Matplotlib Figureを内容ハッシュ付きのファイル名で画像として保存
+    ファイル名が内容ごとに変わるため、静的サイトでは長期キャッシュ可能な画像として配信できる
+
+    Args:
+        fig: Matplotlib Figureオブジェクト
+        output_dir: 出力ディレクトリ
+        stem: ファイル名の接頭辞（図表のファイル名）
+        image_format: 画像形式（"png"または"webp"）
+        **savefig_kwargs: fig.savefigに渡す追加引数
+
+    Returns:
+        保存された画像ファイルのパス（{stem}.{ハッシュ}.{拡張子}）
+    """
+    if image_format not in ("png", "webp"):
+        raise ValueError(f"サポートされていない画像形式です: {image_format}")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=image_format, **savefig_kwargs)
+    image_bytes = buffer.getvalue()
+    content_hash = hashlib.sha256(image_bytes).hexdigest()[:10]
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    image_path = output_dir / f"{stem}.{content_hash}.{image_format}"
+
+    # 内容が変わって不要になった同じ図表の古い画像を削除
+    stale_pattern = re.compile(rf"^{re.escape(stem)}\.[0-9a-f]{{10}}\.(png|webp)$")
+    for old_path in output_dir.glob(f"{stem}.*"):
+        if old_path != image_path and stale_pattern.match(old_path.name):
+            old_path.unlink()
+
+    if not image_path.exists():
+        image_path.write_bytes(image_bytes)
+    return image_path
+
+
+def get_plotlyjs_cdn_url() -> str:
+    """
+    インストール済みのplotly.jsと同じバージョンのCDN URLを取得
+
+    Returns:
+        plotly.jsのCDN URL
+    """
+    from plotly.offline import get_plotlyjs_version
+    return f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+
+def resolve_plotlyjs_src(plotly_js_path: Optional[Path], output_dir: Optional[Path]) -> str:
+    """
+    Plotly図表HTMLに渡すinclude_plotlyjsの値を決定
+
+    Args:
+        plotly_js_path: 自前で配置したplotly.jsのパス（Noneの場合はCDNを使用）
+        output_dir: 図表HTMLの出力ディレクトリ
+
+    Returns:
+        plotly.jsへの相対パス、または"cdn"
+    """
+    if plotly_js_path is None:
+        return 'cdn'
+    relative = os.path.relpath(Path(plotly_js_path).resolve(), Path(output_dir or '.').resolve())
+    return Path(relative).as_posix()
 
 
 def create_html_tag(tag: str, content: Any = "", attributes: Dict[str, str] = None) -> str:
@@ -1,5 +1,7 @@
+import os
 import sys
 import logging
+import argparse
 from pathlib import Path
 
 # プロジェクトルートをsys.pathに追加
@@ -7,20 +9,51 @@ project_root = Path(__file__).resolve().parents[3]
 sys.path.append(str(project_root))
 
 from src.core.mkdocs_manager import MkDocsManager
-<<<<<<< HEAD
 from src.core.asset_generator import AssetGenerator, AssetType
-=======
-from src.core.asset_generator import AssetGenerator
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
 from src.materials.test_material.contents import TestMaterialContentManager
 
 # ロギング設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def parse_args():
+    """
+    コマンドライン引数を解析する。
+    """
+    parser = argparse.ArgumentParser(description="test_materialのビルド")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="ビルドマニフェストを無視して全章を再生成する"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="章の並列生成に使用するプロセス数（1の場合は逐次生成）"
+    )
+    parser.add_argument(
+        "--plotly-output",
+        choices=["html", "json"],
+        default="html",
+        help="Plotly図表の出力形式（json: iframeを使わずページ内で遅延描画する）"
+    )
+    parser.add_argument(
+        "--defer-embeds",
+        action="store_true",
+        help="図表・表のiframeを表示領域に入るまで読み込まない（サムネイルを先に表示する）"
+    )
+    parser.add_argument(
+        "--stream-markdown",
+        action="store_true",
+        help="章のMarkdownをメモリに保持せず出力ファイルへ直接書き込む"
+    )
+    return parser.parse_args()
+
 def main():
     """
     test_materialのビルドプロセス全体を実行するメイン関数。
     """
+    args = parse_args()
     logging.info("test_materialのビルドプロセスを開始します...")
 
     # --- 1. パスの設定 ---
@@ -32,7 +65,6 @@ def main():
     # --- 2. MkDocs設定の生成 ---
     logging.info("mkdocs.ymlを生成しています...")
     mkdocs_mgr = MkDocsManager(project_root)
-<<<<<<< HEAD
     # --- 2a. コンテンツ設定の読み込み ---
     import yaml
     config_data = {}
@@ -56,46 +88,42 @@ def main():
 
     process_nav_placeholders(nav_structure, material_root.name)
     
-=======
-    # TODO: 本来はconfig.ymlからナビゲーション構造を読み込む
-    # 今回はテストのため、静的なナビゲーション構造を定義
-    nav_structure = [
-        {"ホーム": "index.md"}, # サイトのトップレベルのindex.md
-        {
-            "テスト教材": [
-                {"概要": f"{material_root.name}/documents/index.md"}, # 既存のindex.mdを概要として
-                {"第1章": f"{material_root.name}/documents/chapter01.md"},
-                {"第2章": f"{material_root.name}/documents/chapter02.md"},
-                {"第3章": f"{material_root.name}/documents/chapter03.md"},
-                {"第4章": f"{material_root.name}/documents/chapter04.md"},
-                {"第5章": f"{material_root.name}/documents/chapter05.md"},
-                {"第6章": f"{material_root.name}/documents/chapter06.md"},
-                {"用語集": f"{material_root.name}/glossary.md"},
-                {"FAQ": f"{material_root.name}/faq.md"},
-                {"TIPS": f"{material_root.name}/tips.md"},
-            ]
-        }
-    ]
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
     mkdocs_mgr.generate_mkdocs_yml(nav_structure)
     logging.info("mkdocs.ymlの生成が完了しました。")
 
     # --- 3. 共通アセットの生成 ---
     logging.info("共通アセットを生成しています...")
     asset_gen = AssetGenerator(output_dir)
-<<<<<<< HEAD
     asset_gen.generate_theme_variations() # テーマ別CSS（default, darkなど）を生成
     asset_gen.generate_asset(AssetType.JAVASCRIPT, 'interactive', 'interactive.js') # インタラクティブJSを生成
-=======
-    # TODO: config.ymlから読み込むようにする
-    # asset_gen.generate_from_templates(material_root / "templates")
->>>>>>> dbde2096846e5b4398413351225cc5f784d336f1
+    # 全図表から参照するplotly.jsを自前で配置（オフライン環境でも表示できるようにする）
+    plotly_js_path = asset_gen.write_plotly_bundle()
+    loader_path = asset_gen.generate_plotly_loader(plotly_js_path)
+    lazy_embed_path = asset_gen.generate_asset(
+        AssetType.JAVASCRIPT, 'lazy_embed', 'assets/js/lazy_embed.js'
+    )
+    mkdocs_mgr.add_asset_files(js_files=[
+        path.relative_to(output_dir).as_posix() for path in (loader_path, lazy_embed_path)
+    ])
     logging.info("共通アセットの生成が完了しました。")
 
     # --- 4. コンテンツの生成 ---
     logging.info("Markdownコンテンツを生成しています...")
-    content_mgr = TestMaterialContentManager(output_dir)
-    generated_files = content_mgr.generate_content()
+    with TestMaterialContentManager(
+        output_dir,
+        incremental_build=True,
+        max_workers=args.jobs,
+        chart_cache_dir=project_root / ".cache" / "charts",
+        plotly_js_path=plotly_js_path,
+        plotly_output=args.plotly_output,
+        deferred_embeds=args.defer_embeds,
+        stream_markdown=args.stream_markdown
+    ) as content_mgr:
+        if args.full_rebuild:
+            # 全章を再生成しつつ、次回のためにマニフェストは記録し直す
+            content_mgr.build_cache.invalidate()
+        generated_files = content_mgr.generate_content()
+        logging.info(content_mgr.chart_gen.render_cache.report())
     logging.info(f"{len(generated_files)}個のファイルを生成しました。")
 
     # --- 5. ホームページの生成 (仮) ---
@@ -0,0 +1,72 @@
+"""
+AdaptiveDecisionTableのテスト
+"""
+
+from datetime import datetime
+
+from src.core.learning_analyzer import LearningAnalyzer, LearningEvent
+from src.core.adaptive_decisions import AdaptiveDecisionTable
+
+
+def test_adaptive_config_is_served_from_the_precomputed_table(tmp_path):
+    """
+    ディスク保存時に事前計算したテーブルからの設定が、その場で分析した設定と一致することをテストする。
+    """
+    now = datetime.now()
+    analyzer = LearningAnalyzer(tmp_path)
+    events = [LearningEvent("u1", "page_view", "chapter01", now) for _ in range(9)]
+    events += [LearningEvent("u1", "quiz_attempt", "chapter01", now, {"correct": True})]
+    events += [LearningEvent("u2", "page_view", "chapter01", now) for _ in range(2)]
+    events += [LearningEvent("u2", "quiz_attempt", "quiz1", now, {"correct": False})]
+    analyzer.log_events(events)
+    analyzer.flush_events()
+    analyzer.refresh_adaptive_decisions()
+
+    reopened = LearningAnalyzer(tmp_path)
+    assert reopened.adaptive_decisions.lookup_level("u1", "chapter01") == "advanced"
+    assert reopened.adaptive_decisions.lookup_level("u2", "chapter01") == "beginner"
+    for user_id in ("u1", "u2", "u3"):
+        for content_id in ("chapter01", "quiz1", "chapter99"):
+            reopened._pending_users.add(user_id)
+            expected = reopened.get_adaptive_content_config(user_id, content_id)
+            reopened._pending_users.discard(user_id)
+            assert reopened.get_adaptive_content_config(user_id, content_id) == expected
+    assert reopened.get_adaptive_content_config("u3", "chapter01") == {"difficulty_level": "standard"}
+
+    # 新しいイベントを保存すると該当ユーザーの設定だけが作り直される
+    reopened.log_events([LearningEvent("u2", "page_view", "chapter01", now) for _ in range(3)])
+    reopened.flush_events()
+    reopened.refresh_adaptive_decisions()
+    assert reopened.adaptive_decisions.lookup_level("u2", "chapter01") == "standard"
+    assert reopened.adaptive_decisions.lookup_level("u1", "chapter01") == "advanced"
+
+
+def test_flushes_update_adaptive_decisions_in_place_without_rebuilding(tmp_path):
+    """
+    ディスク保存のたびにテーブル全体を作り直さず、再計算は待ち時間の間の保存をまとめて行い、
+    既存の行はその場で書き換え、新しいユーザーは差分に保持することをテストする。
+    """
+    now = datetime.now()
+    analyzer = LearningAnalyzer(tmp_path, decision_refresh_delay=3600)
+    analyzer.log_events([LearningEvent("u1", "page_view", "chapter01", now) for _ in range(2)])
+    analyzer.flush_events()
+    analyzer.refresh_adaptive_decisions()
+    table = analyzer.adaptive_decisions
+    generation = table.generation
+    assert table.lookup_level("u1", "chapter01") == "beginner"
+
+    analyzer.log_events([LearningEvent("u1", "page_view", "chapter01", now) for _ in range(3)])
+    analyzer.flush_events()
+    analyzer.log_events([LearningEvent("u2", "page_view", "chapter02", now) for _ in range(9)])
+    analyzer.flush_events()
+    # 再計算を待っている間は古いテーブルを使わずにその場で分析する
+    assert table.lookup_level("u1", "chapter01") == "beginner"
+    assert analyzer.get_adaptive_content_config("u1", "chapter01")["difficulty_level"] == "standard"
+
+    analyzer.refresh_adaptive_decisions()
+    assert table.generation == generation
+    assert table.lookup_level("u1", "chapter01") == "standard"
+    assert table.lookup_level("u2", "chapter02") == "standard"
+    # 別のプロセスからも書き換えと差分が見える
+    other = AdaptiveDecisionTable(tmp_path / "adaptive_decisions")
+    assert dict(other.iter_user_levels()) == {"u1": {"chapter01": "standard"}, "u2": {"chapter02": "standard"}}
@@ -0,0 +1,99 @@
+"""
+列指向ストアとベクトル化した進捗集計のテスト
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.analytics_store import events_to_frame, compute_progress
+from src.core.learning_analyzer import LearningAnalyzer, LearningEvent
+
+
+def _random_events(now: datetime, count: int = 400):
+    rng = random.Random(0)
+    events = []
+    for i in range(count):
+        event_type = rng.choice(["page_view", "time_spent", "quiz_attempt", "scroll"])
+        metadata = {}
+        if event_type == "time_spent":
+            metadata = {"duration_minutes": rng.randint(1, 20) / 4}
+        elif event_type == "quiz_attempt" and rng.random() < 0.9:
+            metadata = {"correct": rng.random() < 0.5}
+        events.append(LearningEvent(
+            user_id=f"u{rng.randint(0, 7)}",
+            event_type=event_type,
+            content_id=f"c{rng.randint(0, 4)}",
+            timestamp=now - timedelta(days=rng.randint(0, 3), minutes=i),
+            metadata=metadata
+        ))
+    return events
+
+
+def test_vectorized_progress_matches_per_user_calculation(tmp_path):
+    """
+    ベクトル化した一括集計が従来のユーザー単位の計算と一致することをテストする。
+    """
+    analyzer = LearningAnalyzer(tmp_path)
+    events = _random_events(datetime.now())
+
+    results = compute_progress(events_to_frame(e.to_dict() for e in events), analyzer.difficulty_threshold)
+
+    for user_id, result in results.items():
+        expected = analyzer._calculate_progress(user_id, [e for e in events if e.user_id == user_id])
+        assert result["content_completion"] == expected.content_completion
+        assert result["quiz_performance"] == expected.quiz_performance
+        assert result["time_spent"] == pytest.approx(expected.time_spent)
+        assert result["difficulty_areas"] == expected.difficulty_areas
+
+
+def test_compacted_partitions_feed_bulk_analysis(tmp_path):
+    """
+    確定した日付がParquetに圧縮され、一括分析で圧縮分と未圧縮分の両方が使われることをテストする。
+    """
+    pytest.importorskip("pyarrow")
+    now = datetime.now()
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    events = _random_events(now)
+    for event in events:
+        analyzer.log_event(event)
+
+    compacted = analyzer.compact_events()
+    assert compacted and now.strftime("%Y-%m-%d") not in compacted
+    partition = analyzer.analytics_store.partition_dir(compacted[0])
+    assert (partition / "event_type=page_view" / "part-0.parquet").exists()
+
+    progress = analyzer.analyze_all_users()
+    for user_id, user_progress in progress.items():
+        expected = analyzer._calculate_progress(user_id, [e for e in events if e.user_id == user_id])
+        assert user_progress.quiz_performance == expected.quiz_performance
+        assert user_progress.content_completion == expected.content_completion
+
+
+def test_events_arriving_after_compaction_are_not_dropped(tmp_path):
+    """
+    圧縮済みの日付に遅れて届いたイベントが一括分析に含まれ、次の圧縮で取り込まれることをテストする。
+    """
+    pytest.importorskip("pyarrow")
+    yesterday = datetime.now() - timedelta(days=1)
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    analyzer.log_event(LearningEvent("u1", "page_view", "c1", yesterday))
+    date_str = yesterday.strftime("%Y-%m-%d")
+    assert analyzer.compact_events() == [date_str]
+
+    # 圧縮後に前日分の再送が届く
+    analyzer.log_event(LearningEvent("u1", "page_view", "c1", yesterday + timedelta(minutes=1)))
+    analyzer.log_event(LearningEvent("u1", "quiz_attempt", "q1", yesterday, {"correct": True}))
+    analyzer.flush_events()
+
+    progress = analyzer.analyze_all_users()["u1"]
+    assert progress.content_completion == {"c1": 0.2}
+    assert progress.quiz_performance == {"q1": 1.0}
+
+    assert analyzer.analytics_store.is_dirty(analyzer.event_store, date_str)
+    assert analyzer.compact_events() == [date_str]
+    assert not analyzer.analytics_store.is_dirty(analyzer.event_store, date_str)
+    assert list(analyzer.analytics_store.read_tail(analyzer.event_store, date_str)) == []
+    assert analyzer.analyze_all_users()["u1"].content_completion == {"c1": 0.2}
+    assert analyzer.compact_events() == []
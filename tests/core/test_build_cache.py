@@ -0,0 +1,69 @@
+import pytest
+from pathlib import Path
+from src.core.build_cache import BuildCache, fingerprint_data
+from src.core.content_manager import BaseContentManager
+
+
+class _SampleContentManager(BaseContentManager):
+    """テスト用の最小限のコンテンツマネージャー"""
+
+    def generate_content(self):
+        return []
+
+
+def test_build_cache_round_trip(tmp_path):
+    """
+    記録したエントリが保存後も同じフィンガープリントでヒットすることをテストする。
+    """
+    output = tmp_path / "chapter01.md"
+    output.write_text("# test", encoding="utf-8")
+
+    cache = BuildCache(tmp_path / ".build_manifest.json")
+    cache.record("chapter01.md", "abc", output, [output], [])
+    cache.save()
+
+    reloaded = BuildCache(tmp_path / ".build_manifest.json")
+    assert reloaded.lookup("chapter01.md", "abc")["output"] == output
+    assert reloaded.lookup("chapter01.md", "changed") is None
+
+    # 出力が消えている場合は再生成が必要
+    output.unlink()
+    assert reloaded.lookup("chapter01.md", "abc") is None
+
+
+def test_unchanged_chapter_is_skipped(tmp_path, monkeypatch):
+    """
+    入力に変更がない章は再生成されず、変更があれば再生成されることをテストする。
+    """
+    chapter_data = {
+        "title": "第1章",
+        "sections": [{"title": "節", "contents": [{"type": "text", "text": "本文"}]}]
+    }
+    charts_dir = tmp_path / "charts"
+    tables_dir = tmp_path / "tables"
+
+    manager = _SampleContentManager("sample", tmp_path, incremental_build=True)
+    rendered = []
+    original_render = manager._render_chapter
+
+    def counting_render(*args, **kwargs):
+        rendered.append(args[1])
+        return original_render(*args, **kwargs)
+
+    monkeypatch.setattr(manager, "_render_chapter", counting_render)
+
+    first = manager._generate_chapter_from_data(chapter_data, "chapter01.md", charts_dir, tables_dir)
+    second = manager._generate_chapter_from_data(chapter_data, "chapter01.md", charts_dir, tables_dir)
+    assert first == second
+    assert len(rendered) == 1
+
+    chapter_data["overview"] = "概要を追加"
+    manager._generate_chapter_from_data(chapter_data, "chapter01.md", charts_dir, tables_dir)
+    assert len(rendered) == 2
+
+
+def test_fingerprint_is_order_independent():
+    """
+    辞書のキー順序がフィンガープリントに影響しないことをテストする。
+    """
+    assert fingerprint_data({"a": 1, "b": 2}) == fingerprint_data({"b": 2, "a": 1})
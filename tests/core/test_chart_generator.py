@@ -1,7 +1,12 @@
 
+import os
+import re
+import json
 import pytest
 from pathlib import Path
 from src.core.chart_generator import ChartGenerator
+from src.core.chart_cache import ChartCache
+from src.core.config import BASE_CHART_STYLES
 
 def test_create_bar_chart_creates_html_file(tmp_path):
     """
@@ -32,3 +37,309 @@ def test_create_bar_chart_creates_html_file(tmp_path):
     assert generated_file_path.exists()
     assert generated_file_path.is_file()
     assert generated_file_path.name == filename
+
+
+def test_render_cache_reuses_identical_chart(tmp_path, monkeypatch):
+    """
+    同一の入力で描画した図表がキャッシュから復元され、再描画されないことをテストする。
+    """
+    cache = ChartCache(tmp_path / "cache")
+    generator = ChartGenerator(render_cache=cache)
+    test_data = {"x": ["A", "B", "C"], "y": [10, 20, 15]}
+    args = dict(data=test_data, x_col="x", y_col="y", title="Test", xlabel="X", ylabel="Y")
+
+    first = generator.create_bar_chart(output_filename="chart.html", output_dir=tmp_path / "a", **args)
+
+    # 2回目は描画処理を呼ばずにキャッシュから復元される
+    monkeypatch.setattr(generator, "_save_mpl_figure_to_html", lambda *a, **k: pytest.fail("再描画されました"))
+    second = generator.create_bar_chart(output_filename="chart.html", output_dir=tmp_path / "b", **args)
+
+    assert second.parent == tmp_path / "b"
+    assert second.read_bytes() == first.read_bytes()
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path):
+    """
+    上限サイズを超えた場合に古いエントリから削除されることをテストする。
+    """
+    cache = ChartCache(tmp_path / "cache", max_bytes=1)
+    generator = ChartGenerator(render_cache=cache)
+    for i in range(2):
+        generator.create_bar_chart(
+            {"x": ["A"], "y": [i]}, "x", "y", "Test", "X", "Y",
+            output_filename=f"chart{i}.html", output_dir=tmp_path
+        )
+
+    assert cache.get_stats()["evictions"] == 2
+    assert cache.total_bytes() == 0
+
+
+def test_render_cache_tracks_usage_without_rescanning(tmp_path, monkeypatch):
+    """
+    保存のたびにキャッシュディレクトリを走査せず、メモリ上の使用量とLRUの順序で削除し、
+    再起動時には最終使用時刻から順序を復元することをテストする。
+    """
+    def store(cache, key, size):
+        output = tmp_path / f"{key}.html"
+        output.write_bytes(b"x" * size)
+        cache.store(key, output)
+
+    cache = ChartCache(tmp_path / "cache", max_bytes=250)
+    store(cache, "aa01", 100)
+    store(cache, "bb02", 100)
+    assert cache.fetch("aa01", tmp_path / "restored.html") == []  # aa01を最近使用したものにする
+    os.utime(tmp_path / "cache" / "aa" / "aa01" / "entry.json", (2_000_000_000, 2_000_000_000))
+
+    def glob(self, pattern):
+        raise AssertionError("保存時にキャッシュディレクトリを走査しています")
+    with monkeypatch.context() as patch:
+        patch.setattr(Path, "glob", glob)
+        store(cache, "cc03", 100)
+
+    assert cache.get_stats()["evictions"] == 1 and cache.total_bytes() == 200
+    assert not (tmp_path / "cache" / "bb" / "bb02").exists()
+
+    # 再起動時は最終使用時刻の古い順（cc03 -> aa01）に復元される
+    reopened = ChartCache(tmp_path / "cache", max_bytes=150)
+    assert reopened.total_bytes() == 200
+    store(reopened, "dd04", 10)
+    assert reopened.fetch("cc03", tmp_path / "restored.html") is None
+    assert reopened.fetch("aa01", tmp_path / "restored.html") == []
+    assert reopened.total_bytes() == 110
+
+def test_external_image_mode_writes_hashed_sibling(tmp_path):
+    """
+    外部画像モードでハッシュ付き画像が出力され、HTMLから参照されることをテストする。
+    """
+    styles = dict(BASE_CHART_STYLES, image_mode="external")
+    cache = ChartCache(tmp_path / "cache")
+    generator = ChartGenerator(styles=styles, render_cache=cache)
+    args = dict(data={"x": ["A", "B"], "y": [1, 2]}, x_col="x", y_col="y", title="T", xlabel="X", ylabel="Y")
+
+    html_path = generator.create_bar_chart(output_filename="bar.html", output_dir=tmp_path / "a", **args)
+    image_path, = generator.last_companion_files
+    assert re.fullmatch(r"bar\.[0-9a-f]{10}\.png", image_path.name)
+    html = html_path.read_text(encoding="utf-8")
+    assert f'src="{image_path.name}"' in html
+    assert "base64" not in html
+
+    # キャッシュから復元する場合もHTMLが参照する画像が同じ名前で配置される
+    restored_html = generator.create_bar_chart(output_filename="bar.html", output_dir=tmp_path / "b", **args)
+    restored, = generator.last_companion_files
+    assert cache.get_stats()["hits"] == 1
+    assert restored.name == image_path.name
+    assert f'src="{restored.name}"' in restored_html.read_text(encoding="utf-8")
+
+
+def test_plotly_chart_references_self_hosted_bundle(tmp_path):
+    """
+    plotly_js_pathを指定した場合にCDNではなく相対パスでplotly.jsを参照することをテストする。
+    """
+    bundle = tmp_path / "assets" / "js" / "plotly-test.min.js"
+    generator = ChartGenerator(plotly_js_path=bundle)
+
+    html_path = generator.create_bar_chart(
+        {"x": ["A", "B"], "y": [1, 2]}, "x", "y", "T", "X", "Y",
+        output_filename="bar.html", use_plotly=True, output_dir=tmp_path / "charts"
+    )
+
+    html = html_path.read_text(encoding="utf-8")
+    assert 'src="../assets/js/plotly-test.min.js"' in html
+    assert "cdn.plot.ly" not in html
+
+
+def test_plotly_json_output_writes_payload(tmp_path):
+    """
+    JSON出力モードで図表のペイロードが書き出され、付随ファイルとして記録されることをテストする。
+    """
+    generator = ChartGenerator(plotly_output="json")
+
+    html_path = generator.create_bar_chart(
+        {"x": ["A", "B"], "y": [1, 2]}, "x", "y", "T", "X", "Y",
+        output_filename="bar.html", use_plotly=True, output_dir=tmp_path
+    )
+
+    json_path, = generator.last_companion_files
+    assert json_path == tmp_path / "bar.json"
+    figure = json.loads(json_path.read_text(encoding="utf-8"))
+    assert figure["data"][0]["type"] == "bar"
+    assert "config" in figure
+    assert 'fetch("bar.json")' in html_path.read_text(encoding="utf-8")
+
+
+def test_thumbnail_is_generated_for_matplotlib_chart(tmp_path):
+    """
+    サムネイル生成を有効にした場合に低解像度のPNGが付随ファイルとして出力されることをテストする。
+    """
+    generator = ChartGenerator(thumbnails=True)
+
+    generator.create_bar_chart(
+        {"x": ["A", "B"], "y": [1, 2]}, "x", "y", "T", "X", "Y",
+        output_filename="bar.html", output_dir=tmp_path
+    )
+
+    assert generator.last_companion_files == [tmp_path / "bar.thumb.png"]
+    assert (tmp_path / "bar.thumb.png").stat().st_size > 0
+
+
+def test_plotting_environment_is_initialized_once_and_shared(tmp_path):
+    """
+    描画環境（Aggバックエンド・日本語フォント）がプロセスで一度だけ初期化され、
+    ChartGeneratorとMatplotlibRendererで共有されることをテストする。
+    """
+    import matplotlib
+    from src.core import plotting_env
+    from src.core.matplotlib_renderer import MatplotlibRenderer
+
+    first = ChartGenerator()
+    second = ChartGenerator()
+    assert first.plotting_env is second.plotting_env
+    assert first.plotting_env.backend.lower() == "agg"
+    assert matplotlib.rcParams['axes.unicode_minus'] is False
+
+    # 別のフォントファミリーの環境に切り替えても、元の環境に戻せる
+    other = ChartGenerator(styles={**BASE_CHART_STYLES, "font_family": ["DejaVu Sans"]})
+    assert other.plotting_env.selected_font == "DejaVu Sans"
+    assert matplotlib.rcParams['font.sans-serif'] == ["DejaVu Sans"]
+    ChartGenerator()
+    assert matplotlib.rcParams['font.sans-serif'] == list(first.plotting_env.font_family)
+
+    renderer = MatplotlibRenderer(tmp_path)
+    assert renderer.plotting_env is first.plotting_env
+    assert renderer._chart_generator is None
+    assert renderer.chart_generator.colors == renderer.drawing_context['colors']
+    assert plotting_env.FONT_CACHE_FILENAME in {path.name for path in Path(matplotlib.get_cachedir()).iterdir()}
+
+
+def test_renderer_styles_do_not_leak_into_later_charts(tmp_path):
+    """
+    レンダラーの仕様で指定したスタイルがその描画の間だけ適用され、
+    以降のChartGeneratorの描画環境（日本語フォント設定）に残らないことをテストする。
+    """
+    import matplotlib
+    from src.core.matplotlib_renderer import MatplotlibRenderer
+
+    generator = ChartGenerator()
+    expected = dict(generator.plotting_env.rc_snapshot)
+
+    renderer = MatplotlibRenderer(tmp_path)
+    renderer.render_spec({
+        'engine': 'matplotlib',
+        'filename': 'styled',
+        'config': {'style': 'default', 'seaborn_style': 'dark'},
+        'components': [],
+    })
+    assert matplotlib.rcParams['font.sans-serif'] == expected['font.sans-serif']
+    assert matplotlib.rcParams['axes.facecolor'] == expected['axes.facecolor']
+
+    # レンダラーの外で変更された場合も、ChartGeneratorの作成時に戻す
+    matplotlib.pyplot.style.use('default')
+    assert matplotlib.rcParams['axes.unicode_minus'] is True
+    ChartGenerator()
+    assert matplotlib.rcParams['axes.unicode_minus'] is False
+    assert matplotlib.rcParams['font.sans-serif'] == expected['font.sans-serif']
+
+
+def test_figure_pool_reuses_cleared_figures_without_pyplot():
+    """
+    返却したFigureがクリアされて同じサイズ・解像度の要求に再利用され、
+    再利用したFigureの描画結果が新しいFigureと一致することをテストする。
+    """
+    import io
+    import matplotlib.pyplot as plt
+    from src.core.figure_pool import FigurePool
+
+    def render(pool):
+        fig, ax = pool.subplots(figsize=(4, 3), dpi=50)
+        ax.plot([0, 1, 2], [2, 0, 1])
+        fig.set_facecolor("#eeeeee")
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        pool.release(fig)
+        return fig, buffer.getvalue()
+
+    figures_before = plt.get_fignums()
+    pool = FigurePool(max_idle_per_key=1)
+    first, first_png = render(pool)
+    second, second_png = render(pool)
+
+    assert second is first and first_png == second_png
+    assert first.axes == [] and first.get_size_inches().tolist() == [4, 3]
+    assert pool.acquire((4, 3), dpi=100) is not first
+    assert pool.get_stats() == {"created": 2, "reused": 1, "discarded": 0, "idle": 1, "in_use": 1}
+    assert plt.get_fignums() == figures_before
+    assert pool.release(plt.figure()) is False
+    plt.close("all")
+
+
+def test_animation_gif_is_streamed_with_shared_palette(tmp_path):
+    """
+    create_animation_from_dataがフレームを逐次書き出し、変化のないフレームを直前のフレームにまとめることをテストする。
+    """
+    from PIL import Image
+
+    generator = ChartGenerator()
+    frames_data = [
+        {"x": [0, 5], "y": [0, 5], "title": "A"},
+        {"x": [0, 5], "y": [0, 5], "title": "A"},
+        {"x": [0, 5], "y": [5, 0], "title": "B", "type": "bar"},
+    ]
+
+    output_path = generator.create_animation_from_data(
+        frames_data, {"fps": 2}, "anim.gif", output_dir=tmp_path
+    )
+
+    with Image.open(output_path) as gif:
+        assert gif.n_frames == 2
+        assert gif.info["loop"] == 0
+        durations = []
+        for index in range(gif.n_frames):
+            gif.seek(index)
+            durations.append(gif.info["duration"])
+        assert durations == [1000, 500]
+        dpi = BASE_CHART_STYLES.get("figure_dpi", 150)
+        assert gif.size == tuple(round(size * dpi) for size in BASE_CHART_STYLES["figsize"])
+
+
+def test_parallel_frame_rendering_matches_sequential(tmp_path):
+    """
+    プロセスプールで描画したアニメーションが、1プロセスで描画した場合と同じGIFになることをテストする。
+    """
+    frames_data = [
+        {"x": list(range(i + 2)), "y": [(j * 3) % 7 for j in range(i + 2)], "title": f"frame {i}"}
+        for i in range(5)
+    ]
+
+    sequential = ChartGenerator().create_animation_from_data(
+        frames_data, {"fps": 5}, "sequential.gif", output_dir=tmp_path
+    )
+    generator = ChartGenerator(animation_workers=2)
+    try:
+        parallel = generator.create_animation_from_data(
+            frames_data, {"fps": 5}, "parallel.gif", output_dir=tmp_path
+        )
+        pool = generator._animation_pool
+        # 2つ目のアニメーションはプロセスプールを使い回す
+        again = generator.create_animation_from_data(
+            frames_data, {"fps": 5}, "again.gif", output_dir=tmp_path
+        )
+        assert generator._animation_pool is pool
+    finally:
+        generator.close()
+
+    assert parallel.read_bytes() == sequential.read_bytes() == again.read_bytes()
+
+
+def test_animation_without_frames_is_rejected(tmp_path):
+    """
+    フレームのないアニメーションは、書き出されていないGIFのパスを返さずにエラーとすることをテストする。
+    """
+    generator = ChartGenerator()
+    with pytest.raises(ValueError):
+        generator.create_animation_from_data([], {}, "empty.gif", output_dir=tmp_path)
+    with pytest.raises(ValueError):
+        generator.create_animation_gif([], "empty.gif", output_dir=tmp_path)
+    assert not (tmp_path / "empty.gif").exists()
+
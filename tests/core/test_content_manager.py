@@ -0,0 +1,60 @@
+import pytest
+
+from src.core.content_manager import BaseContentManager
+from src.core.knowledge_manager import Term
+
+
+class _SampleContentManager(BaseContentManager):
+    """テスト用の最小限のコンテンツマネージャー"""
+
+    def generate_content(self):
+        return []
+
+
+def test_parallel_chapters_merge_term_usage(tmp_path):
+    """
+    並列生成した章の用語使用箇所が親プロセスのKnowledgeManagerに統合されることをテストする。
+    """
+    manager = _SampleContentManager("sample", tmp_path, max_workers=2)
+    manager.knowledge_mgr.register_term(Term(term="電圧", definition="電位差", category="電気", first_chapter="共通"))
+
+    chapter_jobs = []
+    for i in range(1, 4):
+        chapter_jobs.append({
+            "chapter_data": {
+                "title": f"第{i}章",
+                "sections": [{"title": "節", "contents": [
+                    {"type": "text_with_tooltips", "text": "電圧の説明", "terms": "共通"}
+                ]}]
+            },
+            "filename": str(tmp_path / "documents" / f"chapter{i:02d}.md"),
+            "charts_dir": tmp_path / "charts",
+            "tables_dir": tmp_path / "tables"
+        })
+
+    outputs = manager.generate_chapters(chapter_jobs)
+    assert [path.name for path in outputs] == ["chapter01.md", "chapter02.md", "chapter03.md"]
+    assert all(path.exists() for path in outputs)
+
+    usage_paths = [usage["path"] for usage in manager.knowledge_mgr.term_usage["電圧"]]
+    assert usage_paths == [job["filename"] for job in chapter_jobs]
+
+
+def test_chapter_workers_render_animation_frames_in_their_own_process(tmp_path):
+    """
+    章を並列生成するワーカーは、フレーム描画のプロセスを起動しない設定で再構築されることをテストする。
+    """
+    manager = _SampleContentManager("test", tmp_path, max_workers=2, animation_workers=None)
+    _, _, kwargs = manager._get_worker_spec()
+    assert kwargs["animation_workers"] == 1
+
+
+def test_closing_the_manager_shuts_down_the_frame_pool(tmp_path):
+    """
+    マネージャーをwith文で使うと、ビルドの終了時にフレーム描画のプロセスプールが終了することをテストする。
+    """
+    with _SampleContentManager("test", tmp_path, animation_workers=2) as manager:
+        pool = manager.chart_gen._get_animation_pool(2)
+    assert manager.chart_gen._animation_pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
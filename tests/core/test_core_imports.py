@@ -0,0 +1,82 @@
+"""
+src.coreの遅延読み込みのテスト
+"""
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+from src.core.renderer_factory import STANDARD_ENGINES
+
+# import src.coreにかける時間の上限（秒）
+IMPORT_TIME_BUDGET = 0.1
+
+# 計測の回数（CIの負荷による揺らぎを除くため、最も速い回を上限と比べる）
+IMPORT_TIME_RUNS = 5
+
+HEAVY_MODULES = ["matplotlib", "seaborn", "plotly", "pandas", "PIL", "imageio"]
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _run_in_subprocess(code: str) -> dict:
+    """新しいインタープリタでコードを実行し、最後に出力されたJSONを返す"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    # 子プロセスが失敗した場合は原因（ImportError、SyntaxError等）を表示する
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_core_does_not_load_plotting_stacks():
+    """
+    import src.coreが時間の上限内に終わり、描画ライブラリを読み込まないことをテストする。
+    """
+    results = [
+        _run_in_subprocess(
+            "import sys, time, json\n"
+            "start = time.perf_counter()\n"
+            "import src.core\n"
+            "elapsed = time.perf_counter() - start\n"
+            f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+        )
+        for _ in range(IMPORT_TIME_RUNS)
+    ]
+    assert all(result["loaded"] == [] for result in results)
+    assert min(result["elapsed"] for result in results) < IMPORT_TIME_BUDGET
+
+
+def test_engine_dependencies_load_on_first_use():
+    """
+    描画エンジンの依存ライブラリが、そのエンジンを初めて使うときに読み込まれることをテストする。
+    """
+    result = _run_in_subprocess(
+        "import sys, json, tempfile\n"
+        "from src.core import RendererFactory\n"
+        "engines = RendererFactory.get_available_engines()\n"
+        "before = 'matplotlib' in sys.modules\n"
+        "for engine in engines:\n"
+        "    RendererFactory.create_renderer(engine, tempfile.mkdtemp())\n"
+        "print(json.dumps({'engines': engines, 'before': before, 'after': 'matplotlib' in sys.modules}))\n"
+    )
+    assert result["engines"] == list(STANDARD_ENGINES)
+    assert result["before"] is False and result["after"] is True
+
+
+def test_initialize_component_system_restores_the_standard_engines():
+    """
+    initialize_component_systemが、置き換えられた標準エンジンをRendererFactoryの初期状態と同じ遅延登録に戻すことをテストする。
+    """
+    result = _run_in_subprocess(
+        "import json\n"
+        "from src.core import RendererFactory, initialize_component_system\n"
+        "initial = dict(RendererFactory._lazy_engines)\n"
+        "RendererFactory.register_lazy_engine('table', 'other.module', 'OtherRenderer')\n"
+        "initialize_component_system()\n"
+        "print(json.dumps({'initial': initial, 'restored': dict(RendererFactory._lazy_engines)}))\n"
+    )
+    expected = {name: list(target) for name, target in STANDARD_ENGINES.items()}
+    assert result["initial"] == expected
+    assert result["restored"] == expected
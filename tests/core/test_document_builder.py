@@ -0,0 +1,129 @@
+import pytest
+from pathlib import Path
+from src.core.document_builder import DocumentBuilder
+from src.core.knowledge_manager import KnowledgeManager, Term
+from src.core.term_matcher import TermMatcher
+
+
+def test_deferred_iframe_uses_data_src_and_placeholder(tmp_path):
+    """
+    遅延読み込みのiframeがdata-srcとサムネイルのプレースホルダー付きで出力されることをテストする。
+    """
+    builder = DocumentBuilder(tmp_path)
+    builder.add_html_component_reference(
+        Path("../../charts/chart.html"), "100%", None,
+        deferred=True, placeholder=Path("../../charts/chart.thumb.png")
+    )
+
+    html = "\n".join(builder.content_buffer)
+    assert 'data-src="../../charts/chart.html"' in html
+    assert ' src="../../charts/chart.html"' not in html
+    assert 'loading="lazy"' in html
+    assert '<img src="../../charts/chart.thumb.png"' in html
+
+
+def test_term_matcher_prefers_longest_match_and_skips_links():
+    """
+    同じ位置から始まる用語は最長のものが優先され、Markdownリンク内は検出されないことをテストする。
+    """
+    matcher = TermMatcher(["電圧", "電圧計", "計測"])
+
+    matches = matcher.find_all("電圧計で計測する。[電圧](glossary.md)と電圧")
+
+    assert [term for _, _, term in matches] == ["電圧計", "計測", "電圧"]
+    assert matches[-1][0] == len("電圧計で計測する。[電圧](glossary.md)と")
+
+
+def test_tooltips_wrap_first_occurrence_and_record_usage(tmp_path):
+    """
+    各用語の初出箇所のみにツールチップが付与され、使用箇所が記録されることをテストする。
+    """
+    knowledge_mgr = KnowledgeManager(tmp_path)
+    for name in ["電圧", "電圧計"]:
+        knowledge_mgr.register_term(Term(term=name, definition=f"{name}の説明", category="電気"))
+    terms_info = {name: {"tooltip_text": f"{name}の説明"} for name in ["電圧", "電圧計"]}
+
+    builder = DocumentBuilder(tmp_path)
+    builder.add_paragraph_with_tooltips(
+        "電圧計は電圧を測る。電圧は重要。", terms_info, knowledge_mgr, "第1章", "chapter01.md"
+    )
+
+    html = "\n".join(builder.content_buffer)
+    assert html.count('data-tooltip="電圧計の説明">電圧計</span>') == 1
+    assert html.count('data-tooltip="電圧の説明">電圧</span>') == 1
+    assert html.count("custom-tooltip") == 2
+    assert [usage["term"] for usage in knowledge_mgr.get_term_usage_for_path("chapter01.md")] == ["電圧計", "電圧"]
+
+
+def test_tooltips_skip_used_terms_before_resolving_overlaps(tmp_path):
+    """
+    既にツールチップを付与した用語の出現箇所が、重なっている未使用の用語の初出を隠さないことをテストする。
+    """
+    knowledge_mgr = KnowledgeManager(tmp_path)
+    terms_info = {name: {"tooltip_text": f"{name}の説明"} for name in ["AB", "BC"]}
+    matcher = TermMatcher(terms_info)
+
+    assert [term for _, _, term in matcher.find_all("AB x ABC")] == ["AB", "AB"]
+    assert matcher.find_all("AB x ABC", first_occurrence_only=True) == [(0, 2, "AB"), (6, 8, "BC")]
+
+    builder = DocumentBuilder(tmp_path)
+    builder.add_paragraph_with_tooltips("AB x ABC", terms_info, knowledge_mgr, "第1章", "chapter01.md")
+
+    html = "\n".join(builder.content_buffer)
+    assert '<span class="custom-tooltip" data-tooltip="ABの説明">AB</span> x A' in html
+    assert 'data-tooltip="BCの説明">BC</span>' in html
+    assert html.count("custom-tooltip") == 2
+
+
+def test_streaming_output_matches_buffered_output(tmp_path):
+    """
+    ストリーミングモードでもバッファモードと同一のMarkdownが保存され、
+    保存前は出力先にファイルが存在しないことをテストする。
+    """
+    def build(builder, filename):
+        builder.begin_document(filename)
+        builder.add_heading("見出し", 1)
+        builder.add_paragraph("本文")
+        builder.add_unordered_list(["A", "B"])
+        builder.add_code_block("print('x')")
+        return builder
+
+    buffered = build(DocumentBuilder(tmp_path), "buffered.md").save_markdown("buffered.md")
+
+    streaming = build(DocumentBuilder(tmp_path, stream_markdown=True), "streamed.md")
+    assert not (tmp_path / "streamed.md").exists()
+    assert streaming.get_content() == buffered.read_text(encoding="utf-8")
+    streamed = streaming.save_markdown("streamed.md")
+
+    assert streamed.read_text(encoding="utf-8") == buffered.read_text(encoding="utf-8")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["buffered.md", "streamed.md"]
+
+
+def test_streaming_document_is_discarded_when_restarted(tmp_path):
+    """
+    保存前に新しい文書を開始すると、書きかけの一時ファイルが破棄されることをテストする。
+    """
+    builder = DocumentBuilder(tmp_path, stream_markdown=True)
+    builder.begin_document("first.md")
+    builder.add_paragraph("途中まで")
+
+    builder.begin_document("second.md")
+    builder.add_paragraph("完成")
+    builder.save_markdown("second.md")
+
+    assert [p.name for p in tmp_path.iterdir()] == ["second.md"]
+
+
+def test_learning_tracker_batches_events_and_sends_beacons(tmp_path):
+    """
+    学習行動追跡スクリプトがイベントをまとめてsendBeaconで送信し、値が安全にエスケープされることをテストする。
+    """
+    builder = DocumentBuilder(tmp_path)
+    builder.add_learning_tracker("chapter'01", endpoint="http://127.0.0.1:8765/events")
+
+    script = builder.get_content()
+    assert 'const contentId = "chapter\'01";' in script
+    assert 'const endpoint = "http://127.0.0.1:8765/events";' in script
+    assert "navigator.sendBeacon" in script
+    assert "requestIdleCallback" in script
+    assert "console.log" not in script
@@ -0,0 +1,123 @@
+"""
+EventStoreのテスト
+"""
+
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+from src.core.event_store import EventStore
+from src.core.learning_analyzer import LearningAnalyzer, LearningEvent
+
+
+def _record(index: int, day: str = "2024-05-01"):
+    return {"user_id": f"u{index % 3}", "event_type": "page_view",
+            "content_id": "chapter01", "timestamp": f"{day}T10:00:{index % 60:02d}"}
+
+
+def test_append_rotates_segments_and_keeps_order(tmp_path):
+    """
+    上限サイズを超えるとセグメントが切り替わり、書き込み順に読み戻せることをテストする。
+    """
+    store = EventStore(tmp_path, segment_max_bytes=300, fsync_policy="never")
+    records = [_record(i) for i in range(10)]
+    positions = store.append(records[:6])
+    positions += store.append(records[6:])
+
+    segments = store.list_segments("2024-05-01")
+    assert len(segments) > 1
+    assert all(path.stat().st_size <= 300 for path in segments)
+    assert list(store.read_date("2024-05-01")) == records
+    # 返された位置から個別に読み込める
+    assert [store.read_at(name, offset, length) for _, name, offset, length in positions] == records
+
+
+def test_truncated_tail_is_recovered_before_next_append(tmp_path):
+    """
+    書き込み途中で中断された末尾の行が読み飛ばされ、次の追記前に切り詰められることをテストする。
+    """
+    EventStore(tmp_path).append([_record(0), _record(1)])
+    segment = EventStore(tmp_path).list_segments()[0]
+    with open(segment, "ab") as f:
+        f.write(b'{"user_id": "u9", "event_ty')
+
+    store = EventStore(tmp_path)
+    assert len(list(store.read_date("2024-05-01"))) == 2
+
+    store.append([_record(2)])
+    lines = segment.read_bytes().splitlines()
+    assert [json.loads(line)["timestamp"][-2:] for line in lines] == ["00", "01", "02"]
+
+
+def test_invalid_fsync_policy_is_rejected(tmp_path):
+    """
+    未対応のfsyncポリシーを指定するとValueErrorになることをテストする。
+    """
+    with pytest.raises(ValueError):
+        EventStore(tmp_path, fsync_policy="sometimes")
+
+
+def test_analyzer_reads_flushed_and_legacy_events(tmp_path):
+    """
+    LearningAnalyzerが追記ストアと従来の日次JSONファイルの両方からイベントを読み込むことをテストする。
+    """
+    today = datetime.now().replace(microsecond=0)
+    legacy = LearningEvent("u1", "quiz_attempt", "quiz1", today, {"correct": False})
+    (tmp_path / f"events_{today:%Y-%m-%d}.json").write_text(
+        json.dumps([legacy.to_dict()]), encoding="utf-8"
+    )
+
+    analyzer = LearningAnalyzer(tmp_path)
+    analyzer.log_event(LearningEvent("u1", "quiz_attempt", "quiz1", today, {"correct": True}))
+    analyzer.log_event(LearningEvent("u2", "page_view", "chapter01", today))
+    analyzer._flush_events_to_disk()
+
+    progress = analyzer.analyze_user_progress("u1")
+    assert progress.quiz_performance == {"quiz1": 0.5}
+
+
+def test_user_index_reads_only_the_users_records_and_recovers_missing_entries(tmp_path):
+    """
+    索引から1ユーザー分の記録だけを読み込み、索引に未登録の追記分が起動時に補われることをテストする。
+    """
+    today = datetime.now().replace(microsecond=0)
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    for i in range(30):
+        analyzer.log_event(LearningEvent(f"u{i % 3}", "page_view", f"chapter{i:02d}", today))
+    analyzer._flush_events_to_disk()
+
+    # 索引を更新する前に中断された追記を再現
+    EventStore(tmp_path).append([
+        LearningEvent("u1", "page_view", "chapter99", today).to_dict()
+    ])
+
+    reopened = LearningAnalyzer(tmp_path)
+    events = reopened._load_user_events("u1")
+    assert [event.content_id for event in events] == [f"chapter{i:02d}" for i in range(1, 30, 3)] + ["chapter99"]
+    assert reopened.event_index.lookup("u9", "2000-01-01", "2100-01-01") == []
+
+
+def test_reader_during_flush_does_not_see_events_twice(tmp_path, monkeypatch):
+    """
+    ディスク保存で索引に追加したイベントを、別スレッドの読み手がメモリキャッシュの分と二重に数えないことをテストする。
+    """
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    analyzer.log_event(LearningEvent("u1", "time_spent", "c1", datetime.now(), {"duration_minutes": 5}))
+    results = []
+    reader = threading.Thread(target=lambda: results.append(analyzer.analyze_user_progress("u1")))
+    add = analyzer.event_index.add
+
+    def add_and_read(positions):
+        add(positions)
+        # 索引の更新直後に別スレッドから分析する
+        reader.start()
+        reader.join(timeout=0.5)
+    monkeypatch.setattr(analyzer.event_index, "add", add_and_read)
+
+    analyzer.flush_events()
+    reader.join()
+
+    assert results[0].time_spent == {"c1": 5.0}
+    assert analyzer.analyze_user_progress("u1").time_spent == {"c1": 5.0}
@@ -0,0 +1,97 @@
+"""
+IngestionServerのテスト
+"""
+
+import json
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.core.ingestion_server import IngestionServer, validate_event
+from src.core.learning_analyzer import LearningAnalyzer
+
+
+async def _post(port: int, payload, path: str = "/events"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: text/plain;charset=UTF-8\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(response_body)
+
+
+def _event(user_id: str, index: int):
+    return {"user_id": user_id, "event_type": "page_view", "content_id": f"chapter{index:02d}",
+            "timestamp": datetime.now().isoformat()}
+
+
+def test_batches_are_validated_queued_and_ingested(tmp_path):
+    """
+    受信したバッチが検証され、キューの空きを超える場合は503で拒否され、停止時に全て記録されることをテストする。
+    """
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    server = IngestionServer(analyzer, port=0, queue_size=5, flush_interval=60)
+
+    async def scenario():
+        await server.start()
+        try:
+            accepted = await _post(server.port, {"events": [_event("u1", i) for i in range(3)]})
+            invalid = await _post(server.port, [{"user_id": "u1", "event_type": "page_view"}])
+            overloaded = await _post(server.port, [_event("u2", i) for i in range(6)])
+            return accepted, invalid, overloaded
+        finally:
+            await server.stop()
+
+    accepted, invalid, overloaded = asyncio.run(scenario())
+
+    assert accepted == (202, {"accepted": 3})
+    assert invalid[0] == 400
+    assert overloaded[0] == 503
+    assert [e.content_id for e in analyzer._load_user_events("u1")] == ["chapter00", "chapter01", "chapter02"]
+    assert server.get_stats()["ingested"] == 3
+
+
+def test_validate_event_normalizes_utc_timestamps():
+    """
+    sendBeaconが送るUTCのタイムスタンプがローカル時刻に変換され、不正な値が拒否されることをテストする。
+    """
+    event = validate_event({"user_id": "u1", "event_type": "page_view", "content_id": "c1",
+                            "timestamp": "2024-05-01T00:00:00.000Z"})
+    assert event.timestamp.tzinfo is None
+    with pytest.raises(ValueError):
+        validate_event({"user_id": "u1", "event_type": "page_view", "content_id": "c1",
+                        "timestamp": "2024-05-01", "metadata": []})
+
+
+@pytest.mark.parametrize("metadata", [
+    {"duration_minutes": "10"},
+    {"duration_minutes": -1},
+    {"duration_minutes": float("nan")},
+    {"duration_minutes": True},
+    {"correct": "no"},
+])
+def test_beacon_with_malformed_metadata_is_rejected(tmp_path, metadata):
+    """
+    集計に使うmetadataの型が不正なビーコンが400で拒否され、記録されないことをテストする。
+    """
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    server = IngestionServer(analyzer, port=0, flush_interval=60)
+    beacon = [_event("u1", 0), {**_event("u1", 1), "event_type": "quiz_answer", "metadata": metadata}]
+
+    async def scenario():
+        await server.start()
+        try:
+            return await _post(server.port, beacon)
+        finally:
+            await server.stop()
+
+    status, _ = asyncio.run(scenario())
+
+    assert status == 400
+    assert analyzer._load_user_events("u1") == []
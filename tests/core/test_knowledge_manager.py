@@ -0,0 +1,33 @@
+"""
+KnowledgeManagerのテスト
+"""
+
+from src.core.knowledge_manager import KnowledgeManager, Term
+
+
+def test_indexes_follow_registration_and_overwrite(tmp_path):
+    """
+    用語の登録・上書きに応じて章・カテゴリ・スラッグの索引が更新されることをテストする。
+    """
+    knowledge_mgr = KnowledgeManager(tmp_path)
+    knowledge_mgr.register_terms_batch([
+        Term(term="電圧", definition="電位差" * 40, category="電気", first_chapter="第1章"),
+        Term(term="第1章のまとめ", definition="まとめ", category="その他"),
+        Term(term="電流", definition="電荷の流れ", category="電気", first_chapter="第2章"),
+    ])
+
+    terms_info = knowledge_mgr.get_terms_for_chapter("第1章")
+    assert list(terms_info) == ["電圧", "第1章のまとめ"]
+    assert len(terms_info["電圧"]["tooltip_text"]) == 100
+    assert terms_info["電圧"]["tooltip_text"].endswith("...")
+    assert [t.term for t in knowledge_mgr.get_terms_by_category("電気")] == ["電圧", "電流"]
+
+    # 上書き登録すると古い索引とキャッシュ済みの結果が置き換わる
+    knowledge_mgr.register_term(
+        Term(term="電圧", definition="電位の差", category="基礎", first_chapter="第2章")
+    )
+
+    assert list(knowledge_mgr.get_terms_for_chapter("第1章")) == ["第1章のまとめ"]
+    assert knowledge_mgr.get_terms_for_chapter("第2章")["電圧"] == {"tooltip_text": "電位の差"}
+    assert [t.term for t in knowledge_mgr.get_terms_by_category("電気")] == ["電流"]
+    assert knowledge_mgr.get_term_by_slug(knowledge_mgr.terms["電圧"].slug).category == "基礎"
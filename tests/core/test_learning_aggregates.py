@@ -0,0 +1,66 @@
+"""
+CohortAggregatesのテスト
+"""
+
+from datetime import datetime
+
+from src.core.learning_analyzer import LearningAnalyzer, LearningEvent
+
+
+def _log_sample_events(analyzer):
+    day1 = datetime(2024, 5, 1, 10, 0)
+    day2 = datetime(2024, 5, 2, 10, 0)
+    analyzer.log_event(LearningEvent("u1", "quiz_attempt", "quiz1", day1, {"correct": True}))
+    analyzer.log_events([
+        LearningEvent("u2", "quiz_attempt", "quiz1", day1, {"correct": False}),
+        LearningEvent("u1", "quiz_attempt", "quiz1", day2, {"correct": True}),
+        LearningEvent("u1", "quiz_attempt", "quiz2", day2, {"correct": False}),
+        LearningEvent("u1", "time_spent", "chapter01", day2, {"duration_minutes": 3}),
+        LearningEvent("u2", "time_spent", "chapter01", day2, {"duration_minutes": 45}),
+        LearningEvent("u2", "page_view", "chapter01", day2),
+    ])
+
+
+def test_aggregates_answer_dashboard_queries_by_day_and_content(tmp_path):
+    """
+    記録時に更新された集計値から、期間別の正答率・日別件数・滞在時間の分布が得られることをテストする。
+    """
+    analyzer = LearningAnalyzer(tmp_path)
+    _log_sample_events(analyzer)
+
+    assert analyzer.get_quiz_scores(datetime(2024, 5, 1), datetime(2024, 5, 2)) == {
+        "quiz1": 2 / 3, "quiz2": 0.0
+    }
+    assert analyzer.aggregates.get_quiz_scores("2024-05-02", "2024-05-02") == {"quiz1": 1.0, "quiz2": 0.0}
+    assert analyzer.aggregates.get_daily_counts() == {"2024-05-01": 2, "2024-05-02": 5}
+    assert analyzer.aggregates.get_daily_counts("page_view") == {"2024-05-01": 0, "2024-05-02": 1}
+
+    summary = analyzer.aggregates.get_content_summary("chapter01")
+    assert summary["events"] == {"time_spent": 2, "page_view": 1}
+    assert summary["time_total"] == 48
+    # 3分は2〜5分の区間、45分は30〜60分の区間
+    assert summary["time_histogram"] == [0, 0, 1, 0, 0, 0, 1, 0]
+    assert summary["correct_ratio"] is None
+
+
+def test_aggregates_are_persisted_and_catch_up_with_unsaved_segments(tmp_path):
+    """
+    保存済みの集計値を読み込み、保存後に追記されたイベントだけを反映して再集計と一致することをテストする。
+    """
+    analyzer = LearningAnalyzer(tmp_path)
+    _log_sample_events(analyzer)
+    analyzer.flush_events()
+    expected = analyzer.aggregates.buckets
+
+    # スナップショットを保存する前に終了した追記分
+    analyzer.event_store.append([
+        LearningEvent("u3", "quiz_attempt", "quiz2", datetime(2024, 5, 2, 11, 0), {"correct": True}).to_dict()
+    ])
+    reopened = LearningAnalyzer(tmp_path)
+    assert reopened.aggregates.get_quiz_scores() == {"quiz1": 2 / 3, "quiz2": 0.5}
+
+    # スナップショットがない場合は全イベントから集計し直す
+    (tmp_path / "aggregates.json").unlink()
+    rebuilt = LearningAnalyzer(tmp_path)
+    assert rebuilt.aggregates.buckets == reopened.aggregates.buckets
+    assert expected["2024-05-01"] == rebuilt.aggregates.buckets["2024-05-01"]
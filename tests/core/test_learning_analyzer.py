@@ -0,0 +1,73 @@
+"""
+LearningAnalyzerのレポート一括生成のテスト
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from src.core.learning_analyzer import LearningAnalyzer, LearningEvent
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_bulk_reports_match_individual_reports(tmp_path, max_workers):
+    """
+    一括生成したレポートがユーザーごとに生成したレポートと一致することをテストする。
+    """
+    today = datetime.now().replace(microsecond=0)
+    analyzer = LearningAnalyzer(tmp_path / "events", fsync_policy="never")
+    for i in range(60):
+        analyzer.log_event(LearningEvent(f"u{i % 4}", "quiz_attempt", f"quiz{i % 5}", today, {"correct": i % 3 == 0}))
+        analyzer.log_event(LearningEvent(f"u{i % 4}", "page_view", f"chapter{i % 2}", today))
+
+    output_path = tmp_path / "reports" / "reports.jsonl"
+    metrics = analyzer.generate_reports_bulk(output_path, max_workers=max_workers, batch_size=2)
+
+    assert metrics["users"] == 4 and metrics["events"] == 120
+    reports = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    for report in reports:
+        expected = analyzer.generate_learning_report(report["user_id"])
+        for key in ("overall_completion", "quiz_scores", "recommendations", "areas_for_improvement"):
+            assert report[key] == expected[key]
+
+
+def test_bulk_reports_read_events_user_by_user(tmp_path, monkeypatch):
+    """
+    一括生成が日付単位で全イベントを読み込まず、索引からバッチ単位で読み込んだイベントと
+    従来の日次ファイルのイベントをParquetに書き出すことをテストする。
+    """
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    today = datetime.now().replace(microsecond=0)
+    legacy = [
+        LearningEvent("u0", "quiz_attempt", "quiz1", today, {"correct": False}).to_dict(),
+        LearningEvent("legacy_only", "page_view", "chapter01", today).to_dict(),
+    ]
+    (tmp_path / f"events_{today:%Y-%m-%d}.json").write_text(json.dumps(legacy), encoding="utf-8")
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    analyzer.log_events([
+        LearningEvent(f"u{i % 5}", "quiz_attempt", "quiz1", today, {"correct": True}) for i in range(20)
+    ])
+
+    def read_date(date_str):
+        raise AssertionError("全ユーザーのイベントを日付単位で読み込んでいます")
+    monkeypatch.setattr(analyzer.event_store, "read_date", read_date)
+    positions_per_read = []
+    read_many = analyzer.event_store.read_many
+
+    def read_user_events(positions):
+        positions_per_read.append(len(positions))
+        return read_many(positions)
+    monkeypatch.setattr(analyzer.event_store, "read_many", read_user_events)
+
+    output_path = tmp_path / "reports.parquet"
+    metrics = analyzer.generate_reports_bulk(output_path, batch_size=2)
+
+    assert metrics["users"] == 6 and metrics["events"] == 22
+    # ユーザーごとに索引の位置だけを読み込む（legacy_onlyは従来の日次ファイルのみ）
+    assert positions_per_read == [0, 4, 4, 4, 4, 4]
+    reports = pd.read_parquet(output_path).set_index("user_id")
+    assert list(reports.index) == ["legacy_only", "u0", "u1", "u2", "u3", "u4"]
+    assert json.loads(reports.loc["u0", "quiz_scores"]) == {"quiz1": 0.8}
+    assert reports["overall_completion"].dtype == float
@@ -0,0 +1,100 @@
+"""
+ProgressCacheのテスト
+"""
+
+import threading
+from datetime import datetime
+
+from src.core.progress_cache import ProgressCache
+from src.core.learning_analyzer import LearningAnalyzer, LearningEvent
+
+
+def test_lru_eviction_and_ttl_expiry():
+    """
+    上限を超えると最も古く使われた結果が削除され、期限切れの結果は返されないことをテストする。
+    """
+    now = [0.0]
+    cache = ProgressCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("u1", "p1")
+    cache.put("u2", "p2")
+    assert cache.get("u1") == "p1"  # u1を最近使用したものにする
+    cache.put("u3", "p3")
+
+    assert "u2" not in cache and cache.get("u1") == "p1"
+    now[0] = 10.0
+    assert cache.get("u3") is None
+    assert cache.get_stats() == {
+        "hits": 2, "misses": 1, "evictions": 1, "expirations": 1, "invalidations": 0, "size": 1
+    }
+
+
+def test_result_computed_before_invalidation_is_not_stored(tmp_path, monkeypatch):
+    """
+    分析中に新しいイベントが記録された場合、その前のイベントで計算した結果がキャッシュされないことをテストする。
+    """
+    now = datetime.now()
+    analyzer = LearningAnalyzer(tmp_path)
+    analyzer.log_event(LearningEvent("u1", "quiz_attempt", "quiz1", now, {"correct": True}))
+    calculate = analyzer._calculate_progress
+
+    def calculate_while_logging(user_id, events):
+        progress = calculate(user_id, events)
+        # 読み込み後・格納前に受信スレッドが記録したイベント
+        analyzer.log_event(LearningEvent("u1", "quiz_attempt", "quiz1", now, {"correct": False}))
+        return progress
+    monkeypatch.setattr(analyzer, "_calculate_progress", calculate_while_logging)
+    assert analyzer.analyze_user_progress("u1").quiz_performance == {"quiz1": 1.0}
+    monkeypatch.setattr(analyzer, "_calculate_progress", calculate)
+
+    assert "u1" not in analyzer._progress_cache
+    assert analyzer.analyze_user_progress("u1").quiz_performance == {"quiz1": 0.5}
+
+    cache = ProgressCache()
+    version = cache.version("u2")
+    cache.clear()
+    cache.put("u2", "stale", version)
+    assert cache.get("u2") is None
+
+def test_concurrent_access_keeps_entries_and_stats_consistent():
+    """
+    記録スレッドの無効化と読み手の参照・格納が並行しても、上限と統計情報が崩れないことをテストする。
+    """
+    cache = ProgressCache(max_entries=50)
+
+    def reader(offset):
+        for i in range(2000):
+            user_id = f"u{(i + offset) % 80}"
+            if cache.get(user_id) is None:
+                cache.put(user_id, i)
+
+    def writer():
+        for i in range(2000):
+            cache.invalidate(f"u{i % 80}")
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(4)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.get_stats()
+    assert stats["hits"] + stats["misses"] == 8000
+    assert stats["size"] == len(cache) <= 50
+
+def test_logging_an_event_invalidates_the_users_progress(tmp_path):
+    """
+    イベントを記録すると、そのユーザーのキャッシュ済みの分析結果だけが無効化されることをテストする。
+    """
+    now = datetime.now()
+    analyzer = LearningAnalyzer(tmp_path)
+    analyzer.log_event(LearningEvent("u1", "quiz_attempt", "quiz1", now, {"correct": True}))
+    analyzer.log_event(LearningEvent("u2", "page_view", "chapter01", now))
+    assert analyzer.analyze_user_progress("u1").quiz_performance == {"quiz1": 1.0}
+    analyzer.analyze_user_progress("u2")
+
+    analyzer.log_event(LearningEvent("u1", "quiz_attempt", "quiz1", now, {"correct": False}))
+
+    assert analyzer.analyze_user_progress("u1").quiz_performance == {"quiz1": 0.5}
+    analyzer.analyze_user_progress("u2")
+    stats = analyzer.get_progress_cache_stats()
+    assert stats["invalidations"] == 1 and stats["hits"] == 1
@@ -0,0 +1,101 @@
+"""
+保持期間管理のテスト
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.retention import RetentionPolicy
+from src.core.learning_analyzer import LearningAnalyzer, LearningEvent
+
+
+def test_retention_deletes_expired_segments_and_compacts_partially_expired_ones(tmp_path):
+    """
+    全イベントが期限切れのセグメントは削除され、一部が期限切れのセグメントは種別ごとの保持期間に従って
+    書き直され、索引と削減量の報告が追従することをテストする。
+    """
+    now = datetime.now().replace(microsecond=0)
+    old_day = now - timedelta(days=100)
+    recent_day = now - timedelta(days=10)
+    analyzer = LearningAnalyzer(tmp_path)
+    analyzer.log_events([
+        LearningEvent("u1", "page_view", "chapter01", old_day),
+        LearningEvent("u1", "page_view", "chapter01", recent_day),
+        LearningEvent("u1", "time_spent", "chapter01", recent_day, {"duration_minutes": 5}),
+        LearningEvent("u1", "quiz_attempt", "quiz1", recent_day, {"correct": True}),
+    ])
+    analyzer.flush_events()
+    old_segment = analyzer.event_store.list_segments(f"{old_day:%Y-%m-%d}")[0].name
+    recent_segment = analyzer.event_store.list_segments(f"{recent_day:%Y-%m-%d}")[0].name
+    before_size = (tmp_path / recent_segment).stat().st_size
+
+    report = analyzer.cleanup_old_data(days_to_keep=30, event_type_days={"time_spent": 7})
+
+    assert report.deleted_segments == [old_segment]
+    assert report.compacted_segments == [recent_segment]
+    assert report.removed_events == 2
+    assert report.reclaimed_bytes > before_size - (tmp_path / recent_segment).stat().st_size > 0
+    assert [event.event_type for event in analyzer._load_user_events("u1")] == ["page_view", "quiz_attempt"]
+    manifest = json.loads((tmp_path / "segment_manifest.json").read_text(encoding="utf-8"))
+    assert set(manifest) == {recent_segment}
+    assert set(manifest[recent_segment]["event_types"]) == {"page_view", "quiz_attempt"}
+
+    # 書き直したセグメントへの追記も読み込める
+    analyzer.log_event(LearningEvent("u1", "page_view", "chapter02", recent_day))
+    analyzer.flush_events()
+    assert analyzer.analyze_user_progress("u1").content_completion == {"chapter01": 0.1, "chapter02": 0.1}
+
+
+def test_retention_runs_in_background_and_rejects_negative_days(tmp_path):
+    """
+    バックグラウンドで実行した保持期間の適用結果をFutureで受け取れ、負の保持日数は拒否されることをテストする。
+    """
+    analyzer = LearningAnalyzer(tmp_path)
+    analyzer.log_event(LearningEvent("u1", "page_view", "chapter01", datetime.now() - timedelta(days=3)))
+    analyzer.flush_events()
+
+    report = analyzer.cleanup_old_data(days_to_keep=1, background=True).result(timeout=10)
+    assert len(report.deleted_segments) == 1 and analyzer.event_store.list_segments() == []
+
+    with pytest.raises(ValueError):
+        RetentionPolicy(default_days=-1)
+
+
+def test_retention_prunes_compacted_partitions_and_adaptive_decisions(tmp_path):
+    """
+    保持期間の適用でParquetのパーティションも削除・作り直され、一括分析と適応的設定から
+    期限切れのイベントが除かれることをテストする。
+    """
+    pytest.importorskip("pyarrow")
+    now = datetime.now().replace(microsecond=0)
+    old_day = now - timedelta(days=20)
+    recent_day = now - timedelta(days=5)
+    analyzer = LearningAnalyzer(tmp_path, fsync_policy="never")
+    analyzer.time_window_days = 30
+    analyzer.log_events(
+        [LearningEvent("u1", "quiz_attempt", "chapter01", old_day, {"correct": False})] * 4
+        + [LearningEvent("u1", "page_view", "chapter01", recent_day)] * 10
+        + [LearningEvent("u1", "quiz_attempt", "chapter01", recent_day, {"correct": True}),
+           LearningEvent("u1", "time_spent", "chapter01", recent_day, {"duration_minutes": 5})]
+    )
+    analyzer.compact_events()
+    store = analyzer.analytics_store
+    old_date, recent_date = f"{old_day:%Y-%m-%d}", f"{recent_day:%Y-%m-%d}"
+    assert store.list_dates() == [old_date, recent_date]
+    assert analyzer.adaptive_decisions.lookup_level("u1", "chapter01") == "beginner"
+    partitions_before = store.partition_bytes(old_date) + store.partition_bytes(recent_date)
+
+    report = analyzer.cleanup_old_data(days_to_keep=10, event_type_days={"time_spent": 1})
+
+    assert report.deleted_partitions == [old_date]
+    assert report.rewritten_partitions == [recent_date]
+    assert store.list_dates() == [recent_date]
+    assert report.reclaimed_bytes >= partitions_before - store.partition_bytes(recent_date) > 0
+
+    progress = analyzer.analyze_all_users()["u1"]
+    assert progress.quiz_performance == {"chapter01": 1.0}
+    assert progress.time_spent == {}
+    # 期限切れの不正解が除かれた正答率で判定し直される
+    assert analyzer.adaptive_decisions.lookup_level("u1", "chapter01") == "advanced"